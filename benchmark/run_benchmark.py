@@ -0,0 +1,212 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+"""
+Benchmark mash on a synthetic workspace.
+
+Every scenario runs mash in a new process so that no in-memory cache
+survives between runs:
+
+* ``cold``: no rosdistro snapshot, rosdep cache or previous recipes
+* ``warm``: all caches populated, every recipe is regenerated (``--force``)
+* ``noop``: all caches populated and nothing changed since the last run
+
+The per-phase timings of :mod:`mash.Profiler` and the end-to-end wall time
+of each run are written as JSON, ``--compare`` prints the ratios to a
+previous result file.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import mash
+import synthetic_workspace
+
+"""Version of the result file format"""
+RESULT_FORMAT_VERSION = 1
+
+"""The benchmarked scenarios in the order they are run"""
+SCENARIOS = ('cold', 'warm', 'noop')
+
+
+def run_mash_child(argv, profile_path):
+    """Run mash in this process and write the profiler phases as JSON."""
+    from mash.command import main
+    from mash.Profiler import get_profiler
+
+    rc = main(argv=argv)
+    profiler = get_profiler()
+    with open(profile_path, 'w') as h:
+        json.dump({
+            'rc': rc,
+            'phases': profiler.get_phases(),
+            'packages': len(profiler.get_packages()),
+        }, h)
+    return rc
+
+
+def run_mash(workspace, env, build_base, extra_args, workers):
+    """Run mash in a new process and return its timings."""
+    with tempfile.NamedTemporaryFile(suffix='.json') as profile:
+        argv = [
+            '--build-base', build_base, '--profile',
+            '--parallel-workers', str(workers), *extra_args]
+        start_time = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child',
+             profile.name, '--', *argv],
+            cwd=workspace, env={**os.environ, **env}, check=True,
+            stdout=subprocess.DEVNULL)
+        wall = time.perf_counter() - start_time
+        with open(profile.name, 'r') as h:
+            result = json.load(h)
+    if result['rc']:
+        raise RuntimeError(f"mash failed: {result['rc']}")
+    return {'wall': wall, 'phases': result['phases']}
+
+
+def clear_caches(env, build_base):
+    """Remove the mash caches and the generated recipes."""
+    shutil.rmtree(os.path.join(env['MASH_HOME'], 'cache'), ignore_errors=True)
+    shutil.rmtree(build_base, ignore_errors=True)
+
+
+def summarize(runs, packages):
+    """Compute the median wall time and throughput of repeated runs."""
+    median_wall = statistics.median(run['wall'] for run in runs)
+    phases = {}
+    for name in runs[0]['phases']:
+        phases[name] = statistics.median(
+            run['phases'].get(name, {}).get('wall', 0.0) for run in runs)
+    return {
+        'runs': runs,
+        'median_wall': median_wall,
+        'packages_per_second': packages / median_wall if median_wall else None,
+        'median_phases': phases,
+    }
+
+
+def run_benchmark(root, packages, repeat, workers):
+    """Run all scenarios on a generated workspace."""
+    with open(os.path.join(root, 'parameters.json'), 'r') as h:
+        parameters = json.load(h)
+    env = parameters['env']
+    workspace = os.path.join(root, 'ws')
+    build_base = os.path.join(root, 'build_mash')
+
+    results = {}
+    for scenario in SCENARIOS:
+        runs = []
+        for _ in range(repeat):
+            extra_args = []
+            if scenario == 'cold':
+                clear_caches(env, build_base)
+            elif scenario == 'warm':
+                extra_args.append('--force')
+            runs.append(run_mash(
+                workspace, env, build_base, extra_args, workers))
+        results[scenario] = summarize(runs, packages)
+        print(
+            f'{scenario:<6}\tmedian {results[scenario]["median_wall"]:.3f}s'
+            f'\t{results[scenario]["packages_per_second"]:.1f} packages/s')
+    return results
+
+
+def compare(results, baseline):
+    """Print the ratio of the median times to a baseline result."""
+    for scenario in SCENARIOS:
+        current = results['scenarios'].get(scenario)
+        previous = baseline['scenarios'].get(scenario)
+        if not current or not previous:
+            continue
+        print(
+            f"{scenario:<30}\t{previous['median_wall']:>10.3f}\t"
+            f"{current['median_wall']:>10.3f}\t"
+            f"{current['median_wall'] / previous['median_wall']:>6.2f}x")
+        for name, wall in sorted(current['median_phases'].items()):
+            previous_wall = previous['median_phases'].get(name)
+            if not previous_wall:
+                continue
+            print(
+                f'  {name:<28}\t{previous_wall:>10.3f}\t{wall:>10.3f}\t'
+                f'{wall / previous_wall:>6.2f}x')
+
+
+def main(argv=None):  # noqa: D103
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['--child']:
+        return run_mash_child(argv[3:], argv[1])
+
+    parser = argparse.ArgumentParser(
+        description='Benchmark mash on a synthetic workspace')
+    parser.add_argument(
+        '--root',
+        help='Directory of the synthetic workspace, it is generated if it '
+             'does not exist (default: a temporary directory)')
+    parser.add_argument('--packages', type=int, default=100)
+    parser.add_argument('--repositories', type=int, default=10)
+    parser.add_argument('--fanout', type=int, default=3)
+    parser.add_argument('--commits', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--parallel-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        '--output', default='benchmark.json',
+        help='The JSON file to write the results to '
+             '(default: benchmark.json)')
+    parser.add_argument(
+        '--compare', metavar='PATH',
+        help='A previous result file to compare the results with')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = args.root or os.path.join(tmp_dir, 'bench')
+        root = os.path.abspath(root)
+        if not os.path.exists(root):
+            print(f'Generating {args.packages} packages in {root}')
+            synthetic_workspace.generate(
+                root, packages=args.packages,
+                repositories=args.repositories, fanout=args.fanout,
+                commits=args.commits)
+
+        try:
+            with open(os.path.join(root, 'parameters.json'), 'r') as h:
+                parameters = json.load(h)
+        except OSError as e:
+            return f"Error: '{root}' is not a synthetic workspace: {e}"
+        scenarios = run_benchmark(
+            root, parameters['packages'], args.repeat, args.parallel_workers)
+
+    results = {
+        'format': RESULT_FORMAT_VERSION,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'mash_version': mash.__version__,
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'parallel_workers': args.parallel_workers,
+        'repeat': args.repeat,
+        'parameters': {
+            name: value for name, value in parameters.items()
+            if name != 'env'},
+        'scenarios': scenarios,
+    }
+    with open(args.output, 'w') as h:
+        json.dump(results, h, indent=1, sort_keys=True)
+    print(f'Results: {args.output}')
+
+    if args.compare:
+        with open(args.compare, 'r') as h:
+            compare(results, json.load(h))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+"""
+Generate a synthetic colcon workspace for benchmarking mash.
+
+Besides the workspace a local rosdistro index with a distribution cache and
+a local rosdep source are written, so that mash runs without network access.
+The environment variables pointing mash to them are written to ``env.sh``,
+together with the generation parameters they are written to
+``parameters.json`` for ``run_benchmark.py --root``.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import subprocess
+import sys
+
+import yaml
+
+"""Name of the ROS distribution of the synthetic index"""
+DISTRO_NAME = 'benchdistro'
+
+PACKAGE_XML_TEMPLATE = """\
+<?xml version="1.0"?>
+<package format="3">
+  <name>{name}</name>
+  <version>{version}</version>
+  <description>Synthetic package {name} for benchmarking mash</description>
+  <maintainer email="maintainer@example.com">Bench Maintainer</maintainer>
+  <license>Apache License 2.0</license>
+  <url type="website">https://example.com/{name}</url>
+  <author email="author@example.com">Bench Author</author>
+  <buildtool_depend>ament_cmake</buildtool_depend>
+{depends}  <test_depend>ament_lint_auto</test_depend>
+  <export>
+    <build_type>ament_cmake</build_type>
+  </export>
+</package>
+"""
+
+
+def format_package_xml(name, version, depends):
+    """Return the content of a package manifest."""
+    return PACKAGE_XML_TEMPLATE.format(
+        name=name, version=version,
+        depends=''.join(f'  <depend>{dep}</depend>\n' for dep in depends))
+
+
+def git(path, *args):
+    """Run a git command in a repository."""
+    subprocess.run(
+        ['git', '-C', path, '-c', 'user.name=Bench', '-c',
+         'user.email=bench@example.com', '-c', 'commit.gpgsign=false',
+         *args],
+        check=True, stdout=subprocess.DEVNULL)
+
+
+def write_rosdistro_index(root, released_packages):
+    """Write a rosdistro index with a distribution cache."""
+    index_dir = os.path.join(root, 'rosdistro')
+    os.makedirs(os.path.join(index_dir, DISTRO_NAME), exist_ok=True)
+
+    distribution = {
+        'type': 'distribution',
+        'version': 2,
+        'release_platforms': {'ubuntu': ['jammy']},
+        'repositories': {},
+    }
+    package_xmls = {}
+    for name in released_packages:
+        distribution['repositories'][name] = {
+            'release': {
+                'url': f'https://example.com/{name}-release.git',
+                'version': '1.0.0-1',
+                'tags': {
+                    'release':
+                        f'release/{DISTRO_NAME}/{{package}}/{{version}}'},
+            },
+            'source': {
+                'type': 'git',
+                'url': f'https://example.com/{name}.git',
+                'version': DISTRO_NAME,
+            },
+        }
+        package_xmls[name] = format_package_xml(name, '1.0.0', [])
+
+    with open(os.path.join(
+        index_dir, DISTRO_NAME, 'distribution.yaml'), 'w'
+    ) as h:
+        yaml.safe_dump(distribution, h)
+
+    cache_path = os.path.join(index_dir, f'{DISTRO_NAME}-cache.yaml.gz')
+    with gzip.open(cache_path, 'wt') as h:
+        yaml.safe_dump({
+            'type': 'cache',
+            'version': 2,
+            'name': DISTRO_NAME,
+            'distribution_file': [distribution],
+            'release_package_xmls': package_xmls,
+        }, h)
+
+    index_path = os.path.join(index_dir, 'index.yaml')
+    with open(index_path, 'w') as h:
+        yaml.safe_dump({
+            'type': 'index',
+            'version': 4,
+            'distributions': {
+                DISTRO_NAME: {
+                    'distribution': [f'{DISTRO_NAME}/distribution.yaml'],
+                    'distribution_cache': f'file://{cache_path}',
+                    'distribution_status': 'active',
+                    'distribution_type': 'ros2',
+                    'python_version': 3,
+                },
+            },
+        }, h)
+    return f'file://{index_path}'
+
+
+def write_rosdep_source(root, system_keys):
+    """Write a rosdep source resolving the system keys for openembedded."""
+    rosdep_dir = os.path.join(root, 'rosdep')
+    sources_dir = os.path.join(rosdep_dir, 'sources.list.d')
+    os.makedirs(sources_dir, exist_ok=True)
+
+    rules_path = os.path.join(rosdep_dir, 'base.yaml')
+    with open(rules_path, 'w') as h:
+        yaml.safe_dump({
+            key: {
+                'openembedded': [f'{key.replace("_", "-")}@meta-bench'],
+                'ubuntu': [f'{key.replace("_", "-")}-dev'],
+            } for key in system_keys}, h)
+
+    with open(os.path.join(sources_dir, '20-default.list'), 'w') as h:
+        h.write(f'yaml file://{rules_path}\n')
+    return sources_dir
+
+
+def write_repository(
+    path, packages, dependencies, commits, detached, tags, rng
+):
+    """Write the packages of a repository and create its git history."""
+    os.makedirs(path, exist_ok=True)
+    git(path, 'init', '-q', '-b', DISTRO_NAME)
+    with open(os.path.join(path, 'LICENSE'), 'w') as h:
+        h.write('Apache License\nVersion 2.0, January 2004\n')
+
+    for commit in range(commits):
+        version = f'1.{commit}.0'
+        for name in packages:
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+            with open(os.path.join(path, name, 'package.xml'), 'w') as h:
+                h.write(format_package_xml(
+                    name, version, dependencies[name]))
+        git(path, 'add', '-A')
+        git(path, 'commit', '-q', '-m', f'Release {version}')
+        if tags and (commit == commits - 1 or rng.random() < 0.5):
+            git(path, 'tag', '-a', '-m', version, version)
+
+    repo_name = os.path.basename(path)
+    git(path, 'remote', 'add', 'origin',
+        f'git@example.com:bench/{repo_name}.git')
+    git(path, 'update-ref', f'refs/remotes/origin/{DISTRO_NAME}', 'HEAD')
+    if detached:
+        git(path, 'checkout', '-q', '--detach')
+
+
+def generate(
+    root, packages=100, repositories=10, fanout=3, commits=3,
+    detached=True, tags=True, released=50, system_keys=50, seed=0
+):
+    """
+    Generate a synthetic workspace, rosdistro index and rosdep source.
+
+    :param root: The directory to create everything in
+    :param packages: The number of packages in the workspace
+    :param repositories: The number of git repositories holding them
+    :param fanout: The maximum number of workspace packages each package
+      depends on
+    :param commits: The number of commits in each repository
+    :param detached: Check out a detached HEAD in each repository
+    :param tags: Tag the commits of each repository
+    :param released: The number of packages released in the rosdistro
+    :param system_keys: The number of rosdep keys of the rosdep source
+    :param seed: The seed of the random dependency graph
+    :returns: A dictionary of the environment variables for mash
+    """
+    rng = random.Random(seed)
+    released_packages = [f'bench_released_{i:04}' for i in range(released)]
+    system_key_names = [f'bench_system_{i:04}' for i in range(system_keys)]
+    package_names = [f'bench_pkg_{i:05}' for i in range(packages)]
+
+    dependencies = {}
+    for i, name in enumerate(package_names):
+        # Only depend on earlier packages to keep the graph acyclic
+        internal = rng.sample(
+            package_names[:i], min(i, rng.randint(0, fanout)))
+        external = rng.sample(released_packages, min(released, 2)) + \
+            rng.sample(system_key_names, min(system_keys, 2))
+        # Keys which rosdep cannot resolve exercise the fallback naming
+        if rng.random() < 0.1:
+            external.append(f'bench_unknown_{i:05}')
+        dependencies[name] = sorted(internal + external)
+
+    src_dir = os.path.join(root, 'ws', 'src')
+    for r in range(repositories):
+        repo_packages = package_names[r::repositories]
+        if repo_packages:
+            write_repository(
+                os.path.join(src_dir, f'bench_repo_{r:03}'), repo_packages,
+                dependencies, commits, detached, tags, rng)
+
+    env = {
+        'ROSDISTRO_INDEX_URL': write_rosdistro_index(root, released_packages),
+        'ROSDEP_SOURCE_PATH': write_rosdep_source(root, system_key_names),
+        'ROS_HOME': os.path.join(root, 'ros_home'),
+        'MASH_HOME': os.path.join(root, 'mash_home'),
+        'ROSDISTRO': DISTRO_NAME,
+    }
+    with open(os.path.join(root, 'env.sh'), 'w') as h:
+        for name, value in env.items():
+            h.write(f'export {name}={value}\n')
+    with open(os.path.join(root, 'parameters.json'), 'w') as h:
+        json.dump({
+            'packages': packages,
+            'repositories': repositories,
+            'fanout': fanout,
+            'commits': commits,
+            'detached': detached,
+            'tags': tags,
+            'released': released,
+            'system_keys': system_keys,
+            'seed': seed,
+            'env': env,
+        }, h, indent=1)
+
+    # Populate the rosdep sources cache from the local source
+    subprocess.run(
+        ['rosdep', 'update', '--rosdistro', DISTRO_NAME],
+        check=True, stdout=subprocess.DEVNULL,
+        env={**os.environ, **env})
+    return env
+
+
+def main(argv=None):  # noqa: D103
+    parser = argparse.ArgumentParser(
+        description='Generate a synthetic colcon workspace for benchmarking '
+                    'mash')
+    parser.add_argument('root', help='The directory to create')
+    parser.add_argument('--packages', type=int, default=100)
+    parser.add_argument('--repositories', type=int, default=10)
+    parser.add_argument('--fanout', type=int, default=3)
+    parser.add_argument('--commits', type=int, default=3)
+    parser.add_argument('--no-detached', action='store_true')
+    parser.add_argument('--no-tags', action='store_true')
+    parser.add_argument('--released', type=int, default=50)
+    parser.add_argument('--system-keys', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.root):
+        return f'Error: {args.root} already exists'
+
+    generate(
+        args.root, packages=args.packages, repositories=args.repositories,
+        fanout=args.fanout, commits=args.commits,
+        detached=not args.no_detached, tags=not args.no_tags,
+        released=args.released, system_keys=args.system_keys,
+        seed=args.seed)
+    print(f'Workspace: {os.path.join(args.root, "ws")}')
+    print(f'Environment: {os.path.join(args.root, "env.sh")}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
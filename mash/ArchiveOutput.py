@@ -0,0 +1,193 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import gzip
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+"""Archive formats by file name extension"""
+ARCHIVE_FORMATS = {
+    '.tar': 'tar',
+    '.tar.gz': 'tar.gz',
+    '.tgz': 'tar.gz',
+    '.tar.bz2': 'tar.bz2',
+    '.tar.xz': 'tar.xz',
+    '.zip': 'zip',
+}
+
+"""The earliest timestamp a zip archive can store, 1980-01-01"""
+ZIP_EPOCH = 315532800
+
+LAYER_CONF_TEMPLATE = """\
+# Layer configuration created by mash
+
+BBPATH .= ":${{LAYERDIR}}"
+
+BBFILES += "${{LAYERDIR}}/*/*.bb ${{LAYERDIR}}/*/*.bbappend"
+
+BBFILE_COLLECTIONS += "{name}"
+BBFILE_PATTERN_{name} = "^${{LAYERDIR}}/"
+BBFILE_PRIORITY_{name} = "6"
+
+LAYERVERSION_{name} = "1"
+LAYERDEPENDS_{name} = "core"
+LAYERSERIES_COMPAT_{name} = "${{LAYERSERIES_COMPAT_core}}"
+"""
+
+
+def get_archive_format(path):
+    """
+    Get the archive format of a path from its extension.
+
+    :returns: The format or None if the extension is not supported
+    """
+    for extension, archive_format in ARCHIVE_FORMATS.items():
+        if path.endswith(extension):
+            return archive_format
+    return None
+
+
+def get_source_date_epoch():
+    """Return the timestamp of all archive entries, $SOURCE_DATE_EPOCH or 0."""
+    try:
+        return int(os.environ.get('SOURCE_DATE_EPOCH', 0))
+    except ValueError:
+        return 0
+
+
+def format_layer_conf(name):
+    """Return the content of the conf/layer.conf of a layer."""
+    return LAYER_CONF_TEMPLATE.format(name=name)
+
+
+class ArchiveOutput:
+    """
+    Write generated files into a single tar or zip archive.
+
+    The files are written sequentially in the order they are flushed, with
+    a fixed timestamp, owner and mode, so that the same recipes always
+    result in the same archive.  The archive is written next to its final
+    path and only renamed on commit.
+    It has the interface of :class:`OutputManager` except for keep(): every
+    run writes a complete archive, so no file is ever up to date or
+    removed, and without a generation state no package is skipped.
+    """
+
+    build_base = None
+
+    def __init__(self, path, layer_name):
+        """
+        Start writing an archive.
+
+        :param path: The path of the archive, its extension selects the
+          format
+        :param layer_name: The collection name of the layer
+        :raises: :exc:`ValueError` if the extension is not supported
+        """
+        self.path = os.path.abspath(path)
+        self.format = get_archive_format(self.path)
+        if self.format is None:
+            raise ValueError(
+                f"Unsupported archive format of '{path}', use one of "
+                f"{', '.join(ARCHIVE_FORMATS)}")
+        self.mtime = get_source_date_epoch()
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        self._file = open(self._tmp_path, 'wb')
+        self._gzip = None
+        if self.format == 'zip':
+            self._archive = zipfile.ZipFile(
+                self._file, 'w', compression=zipfile.ZIP_DEFLATED)
+        else:
+            fileobj = self._file
+            compression = self.format[len('tar.'):]
+            if compression == 'gz':
+                # tarfile would store the current time in the gzip header
+                self._gzip = gzip.GzipFile(
+                    filename='', mode='wb', fileobj=self._file,
+                    mtime=self.mtime)
+                fileobj = self._gzip
+                compression = ''
+            self._archive = tarfile.open(
+                fileobj=fileobj, mode=f'w|{compression}',
+                format=tarfile.PAX_FORMAT)
+
+        self._write('conf/layer.conf', format_layer_conf(layer_name))
+
+    def _write(self, relpath, content):
+        data = content.encode('utf-8')
+        if self.format == 'zip':
+            info = zipfile.ZipInfo(
+                relpath, date_time=time.gmtime(max(self.mtime, ZIP_EPOCH))[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o100644 << 16
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(relpath)
+            info.size = len(data)
+            info.mtime = self.mtime
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def add(self, relpath, content):
+        """
+        Stage a generated file until it is flushed.
+
+        :param relpath: The path of the file inside the archive
+        :param content: The text content of the file
+        :returns: The location of the file in the archive
+        """
+        location = os.path.join(self.path, relpath)
+        with self._lock:
+            self._pending[location] = (relpath, content)
+        return location
+
+    def flush(self, location):
+        """Write a staged file into the archive."""
+        with self._lock:
+            relpath, content = self._pending.pop(location)
+            self._write(relpath, content)
+            self.added += 1
+
+    def remove(self, relpath):
+        """Files of previous runs are not part of a new archive."""
+        pass
+
+    def commit(self):
+        """Write the remaining files and move the archive into place."""
+        for location in sorted(self._pending):
+            self.flush(location)
+        self._archive.close()
+        if self._gzip is not None:
+            self._gzip.close()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def close(self):
+        """Remove the partially written archive if it was not committed."""
+        if self._file.closed:
+            return
+        try:
+            self._archive.close()
+            if self._gzip is not None:
+                self._gzip.close()
+        except (OSError, ValueError, tarfile.TarError):
+            # the archive is discarded anyway
+            pass
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def get_summary(self):
+        """Return a one line summary of the written archive."""
+        return f'Recipes: {self.added} written to {self.path}'
@@ -13,8 +13,9 @@
 # limitations under the License.
 
 import os.path
-from mash.SPDXLicense import is_spdx_license, map_license
-from mash.rosdep_support import resolve_rosdep_key
+
+from mash.DependencyResolver import DependencyResolver
+from mash.SPDXLicense import convert_license
 
 ROS_DISTRO_DEFAULT = "rolling"
 
@@ -47,18 +48,22 @@ RDEPENDS:${PN} += \"${ROS_EXEC_DEPENDS}\"\n\
 
         self.rosdistro = ROS_DISTRO_DEFAULT
 
-        self.internal_packages = []
+        self.internal_packages = frozenset()
+        self.dependency_resolver = None
 
         self.section = None
 
         # license should be an SPDX identifier
         self.license = []
 
-        self.lic_files_chksum = None
+        # (path relative to the package, md5) of the license files
+        self.lic_files_chksum = []
 
         self.src_uri = None
         self.srcrev = None
         self.branch = None
+        self.repo_name = None
+        self.tag_name = None
 
         self.pkg_path = None
 
@@ -66,12 +71,26 @@ RDEPENDS:${PN} += \"${ROS_EXEC_DEPENDS}\"\n\
 
     def set_rosdistro(self, rosdistro):
         self.rosdistro = rosdistro
+        self.dependency_resolver = None
 
     # Set a list of internal packages (released in the same distro)
     def set_internal_packages(self, internal_packages):
         # print(f"DEBUG: Print internal packages:\n{internal_packages}")
 
-        self.internal_packages = internal_packages
+        self.internal_packages = frozenset(internal_packages)
+        self.dependency_resolver = None
+
+    def set_dependency_resolver(self, dependency_resolver):
+        """Share a resolver between recipes to resolve each key once."""
+        self.dependency_resolver = dependency_resolver
+
+    def get_dependency_resolver(self):
+        """Get the shared resolver or create one for this recipe."""
+        if self.dependency_resolver is None:
+            self.dependency_resolver = DependencyResolver(
+                self.rosdistro, self.internal_packages,
+                self.ROS_PLATFORM_NAME)
+        return self.dependency_resolver
 
     def importPackage(self, pkg):
         self.name = pkg.name
@@ -95,18 +114,11 @@ RDEPENDS:${PN} += \"${ROS_EXEC_DEPENDS}\"\n\
         else:
             self.maintainer = None
 
-        # license should be an SPDX identifier
-        self.license = []
-        for license_str in pkg.upstream_license:
-            if (is_spdx_license(license_str)):
-                self.license.append(license_str)
-            else:
-                spdx_license = map_license(license_str)
-                if (len(spdx_license) > 0):
-                    # print("mapped {} to {}".format(license_str, spdx_license))
-                    self.license.append(spdx_license)
-                else:
-                    self.license.append(license_str)
+        # license should be an SPDX identifier, several licenses all apply
+        nested = len(pkg.upstream_license) > 1
+        self.license = [
+            convert_license(license_str, nested)
+            for license_str in pkg.upstream_license]
 
         self.license_line = pkg.license_line
         self.license_md5 = pkg.license_md5
@@ -123,42 +135,7 @@ RDEPENDS:${PN} += \"${ROS_EXEC_DEPENDS}\"\n\
         self.build_type = pkg.build_type
 
     def convert_to_oe_naming(self, ros_pkgname, isNative=False):
-        oe_pkgname = ""
-        result = ""
-
-        if str(ros_pkgname) in self.internal_packages:
-           oe_pkgname = str(ros_pkgname)
-           oe_pkgname = oe_pkgname.lower().replace('_', '-')
-        else:
-            # print(f"Resolving external package: {ros_pkgname}, {self.ROS_PLATFORM_NAME}, {self.rosdistro}")
-            try:
-                (resolved_key, _, _) = \
-                    resolve_rosdep_key(str(ros_pkgname), self.ROS_PLATFORM_NAME, '', self.rosdistro)
-
-                result = resolved_key[0]
-            except Exception as e:
-                result = None
-                print(f"\t- Warning: Could not resolve external package {ros_pkgname}: {e}")
-
-                pass
-
-            if result:
-                # Remove any layer information from the first resolved key
-                # print(f"DEBUG: Resolved rosdep key {ros_pkgname} to {result} {type(result)}")
-                oe_pkgname = str(result).split('@')[0]
-
-                # OpenEmbedded entries should already follow OE naming convention
-                # oe_pkgname = oe_pkgname.lower().replace('_', '-')
-            else:
-                # Fallback to ROS package name conversion
-                oe_pkgname = str(ros_pkgname)
-                oe_pkgname = oe_pkgname.lower().replace('_', '-')
-                print(f"\t- Falling back to using OE-naming convention: {oe_pkgname}")
-
-        if isNative:
-            oe_pkgname = oe_pkgname + "-native"
-
-        return oe_pkgname
+        return self.get_dependency_resolver().resolve(ros_pkgname, isNative)
 
     def bitbake_recipe_filename(self):
         recipename = self.name.replace('_', '-')
@@ -195,6 +172,10 @@ RDEPENDS:${PN} += \"${ROS_EXEC_DEPENDS}\"\n\
     def set_pkg_path(self, pkg_path):
         self.pkg_path = pkg_path
 
+    def set_license_files(self, license_files):
+        """Set the ``(path, md5)`` pairs of the license files."""
+        self.lic_files_chksum = list(license_files)
+
     def get_recipe_text(self):
         lines = []
         lines.append(self.recipe_boilerplate)
@@ -220,7 +201,16 @@ RDEPENDS:${PN} += \"${ROS_EXEC_DEPENDS}\"\n\
         license_expression = " & ".join(self.license)
         lines.append(f'LICENSE = "{license_expression}"')
 
-        lines.append(f'LIC_FILES_CHKSUM = "file://package.xml;beginline={self.license_line};endline={self.license_line};md5={self.license_md5}"')
+        lic_files_chksum = (
+            f'file://package.xml;beginline={self.license_line};'
+            f'endline={self.license_line};md5={self.license_md5}')
+        if self.lic_files_chksum:
+            lines.append(self.get_multiline_variable('LIC_FILES_CHKSUM', [
+                lic_files_chksum,
+                *(f'file://{path};md5={md5}'
+                  for path, md5 in self.lic_files_chksum)]))
+        else:
+            lines.append(f'LIC_FILES_CHKSUM = "{lic_files_chksum}"')
 
         lines.append("")
         lines.append(f'ROS_CN = "{self.repo_name}"')
@@ -0,0 +1,93 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+from pathlib import Path
+import subprocess
+
+from mash.LicenseFileIndex import is_license_file
+
+
+class ChangesUnavailable(Exception):
+    """The changes of a repository since a revision cannot be listed."""
+
+    def __init__(self, message):  # noqa: D107
+        super().__init__(message)
+        self.message = message
+
+
+def _run_git(root, *arguments):
+    try:
+        result = subprocess.run(
+            ['git', '-C', root, *arguments],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    except subprocess.CalledProcessError as e:
+        # The first line of git's error is the message, hints follow
+        error = e.stderr.decode('utf-8', 'replace').strip().split('\n')[0]
+        raise ChangesUnavailable(
+            f"'git {' '.join(arguments)}' failed in '{root}': {error}")
+    except OSError as e:
+        raise ChangesUnavailable(f"Could not run git in '{root}': {e}")
+    return result.stdout.decode('utf-8', 'surrogateescape')
+
+
+def list_changed_paths(root, rev):
+    """
+    List the paths in a git working tree which changed since a revision.
+
+    The recipes contain the commit of HEAD, so if HEAD is not the revision
+    all packages of the repository change and no paths are listed.
+    Otherwise the files which differ from HEAD and the untracked files
+    which are not ignored changed.
+
+    :param root: The root of the working tree
+    :param rev: The git revision
+    :returns: The list of absolute paths or None if HEAD moved
+    :raises: :exc:`ChangesUnavailable` if the revision cannot be resolved
+      or git fails
+    """
+    head, commit = _run_git(
+        root, 'rev-parse', 'HEAD', f'{rev}^{{commit}}').split()
+    if head != commit:
+        return None
+    changed = _run_git(root, 'diff', '--name-only', '-z', 'HEAD', '--')
+    untracked = _run_git(
+        root, 'ls-files', '--others', '--exclude-standard', '-z')
+    return [
+        os.path.join(root, path)
+        for path in (changed + untracked).split('\0') if path]
+
+
+def map_changed_paths(paths, packages, repository_index):
+    """
+    Find the packages containing changed paths.
+
+    A license file in the root of a repository is part of the recipes of
+    all packages of the repository.
+
+    :param paths: The changed paths
+    :param packages: The package descriptors
+    :param repository_index: The :class:`RepositoryIndex` to find the
+      repository of a license file
+    :returns: The set of package names
+    """
+    packages_by_path = {}
+    packages_by_root = {}
+    for pkg in packages:
+        packages_by_path[Path(pkg.path).resolve()] = pkg.name
+        root = repository_index.find_working_tree(pkg.path)
+        packages_by_root.setdefault(root, set()).add(pkg.name)
+
+    names = set()
+    for path in paths:
+        path = Path(path).resolve()
+        for candidate in [path, *path.parents]:
+            if candidate in packages_by_path:
+                names.add(packages_by_path[candidate])
+                break
+        else:
+            if is_license_file(path) and \
+                    repository_index.find_working_tree(path.parent) == \
+                    str(path.parent):
+                names.update(packages_by_root.get(str(path.parent), ()))
+    return names
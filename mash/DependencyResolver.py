@@ -0,0 +1,120 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import threading
+
+from mash.rosdep_support import resolve_rosdep_key
+
+"""Dependency categories of a package manifest resolved for a recipe"""
+DEPENDENCY_CATEGORIES = (
+    'build_depends',
+    'build_export_depends',
+    'buildtool_depends',
+    'buildtool_export_depends',
+    'exec_depends',
+    'run_depends',
+    'test_depends',
+    'doc_depends',
+)
+
+
+class DependencyResolver:
+    """
+    Resolve ROS dependency keys to OpenEmbedded recipe names.
+
+    A single resolver is shared by all recipes of a run so that every
+    dependency key is only resolved once.
+    """
+
+    def __init__(
+        self, rosdistro, internal_packages=(), os_name='openembedded'
+    ):
+        """
+        Create a resolver for a ROS distribution.
+
+        :param rosdistro: The name of the ROS distribution
+        :param internal_packages: The names of the packages released in the
+          distribution, they are converted by naming convention only
+        :param os_name: The rosdep platform name
+        """
+        self.rosdistro = rosdistro
+        self.internal_packages = frozenset(internal_packages)
+        self.os_name = os_name
+        self.unresolved_keys = set()
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def collect_keys(pkg):
+        """Collect the unique dependency keys of a package metadata object."""
+        keys = set()
+        for category in DEPENDENCY_CATEGORIES:
+            keys.update(str(dep) for dep in getattr(pkg, category))
+        return keys
+
+    def resolve_all(self, keys):
+        """
+        Resolve a set of dependency keys in a deterministic order.
+
+        :returns: The report lines of the keys which were not resolved
+          before, e.g. to show them with the package needing them
+        """
+        messages = []
+        for key in sorted(keys):
+            if key in self._resolved:
+                continue
+            with self._lock:
+                if key not in self._resolved:
+                    oe_pkgname = self._resolve(key, messages.append)
+                    self._resolved[key] = (oe_pkgname, oe_pkgname + '-native')
+        return messages
+
+    def resolve(self, ros_pkgname, isNative=False):  # noqa: N803
+        """
+        Resolve a dependency key to an OpenEmbedded recipe name.
+
+        :param ros_pkgname: The ROS package name or rosdep key
+        :param isNative: Return the name of the native recipe
+        :returns: The OpenEmbedded recipe name
+        """
+        key = str(ros_pkgname)
+        names = self._resolved.get(key)
+        if names is None:
+            with self._lock:
+                names = self._resolved.get(key)
+                if names is None:
+                    oe_pkgname = self._resolve(key, print)
+                    names = (oe_pkgname, oe_pkgname + '-native')
+                    self._resolved[key] = names
+
+        return names[1] if isNative else names[0]
+
+    def get_resolutions(self):
+        """Get the recipe names of the keys resolved so far by key."""
+        with self._lock:
+            return {key: names[0] for key, names in self._resolved.items()}
+
+    def _resolve(self, ros_pkgname, report):
+        if ros_pkgname in self.internal_packages:
+            return ros_pkgname.lower().replace('_', '-')
+
+        result = None
+        try:
+            (resolved_key, _, _) = resolve_rosdep_key(
+                ros_pkgname, self.os_name, '', self.rosdistro)
+            result = resolved_key[0]
+        except Exception as e:  # noqa: B902
+            report(
+                f'\t- Warning: Could not resolve external package '
+                f'{ros_pkgname}: {e}')
+
+        if result:
+            # Remove any layer information from the first resolved key
+            # OpenEmbedded entries should already follow OE naming convention
+            return str(result).split('@')[0]
+
+        # Fallback to ROS package name conversion
+        self.unresolved_keys.add(ros_pkgname)
+        oe_pkgname = ros_pkgname.lower().replace('_', '-')
+        report(f'\t- Falling back to using OE-naming convention: {oe_pkgname}')
+        return oe_pkgname
@@ -0,0 +1,360 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import time
+
+from colcon_core.dependency_descriptor import DependencyDescriptor
+from colcon_core.location import get_config_path
+from colcon_core.logging import colcon_logger
+from colcon_core.package_augmentation import augment_packages
+from colcon_core.package_augmentation import \
+    get_package_augmentation_extensions
+from colcon_core.package_descriptor import PackageDescriptor
+from colcon_core.package_discovery import get_package_discovery_extensions
+from colcon_core.package_discovery import PackageDiscoveryExtensionPoint
+from colcon_core.package_identification import \
+    get_package_identification_extensions
+from colcon_core.package_identification import identify
+from colcon_core.package_identification import IgnoreLocationException
+from colcon_core.package_selection import get_package_selection_extensions
+
+logger = colcon_logger.getChild(__name__)
+
+"""Version of the on-disk discovery cache format"""
+DISCOVERY_CACHE_FORMAT_VERSION = 1
+
+"""Files whose content identifies a package or ends up in its descriptor"""
+MANIFEST_FILES = frozenset((
+    'package.xml',
+    'manifest.xml',
+    'CMakeLists.txt',
+    'setup.py',
+    'setup.cfg',
+    'pyproject.toml',
+    'colcon.pkg',
+))
+
+"""Discovery extensions which do not discover packages when crawling"""
+KNOWN_DISCOVERY_EXTENSIONS = frozenset((
+    'colcon_meta',
+    'ignore',
+    'path',
+    'recursive',
+))
+
+"""Environment variables used to evaluate the conditions of manifests"""
+CONDITION_ENVIRONMENT_VARIABLES = (
+    'ROS_DISTRO',
+    'ROS_PYTHON_VERSION',
+    'ROS_VERSION',
+)
+
+
+def get_discovery_cache_path(base_paths):
+    """Return the path of the discovery cache of base paths in MASH_HOME."""
+    key = hashlib.sha256(
+        json.dumps(sorted(base_paths)).encode('utf-8')).hexdigest()
+    return Path(get_config_path()) / 'cache' / 'discovery' / f'{key}.json'
+
+
+def _stat_file(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+
+def _forget_ros_package(path):
+    # colcon-ros keeps the manifests it parsed for the lifetime of the
+    # process, e.g. of the server, so a changed one would not be read again
+    try:
+        from colcon_ros.package_identification.ros import _cached_packages
+    except ImportError:
+        return
+    _cached_packages.pop(str(path), None)
+
+
+def _serialize_descriptor(desc):
+    # Descriptors whose metadata does not survive JSON, e.g. callables of
+    # Python packages, are identified again on every run
+    data = {
+        'type': desc.type,
+        'name': desc.name,
+        'dependencies': {
+            category: sorted(
+                ([str(dep), dep.metadata] for dep in dependencies),
+                key=lambda dep: dep[0])
+            for category, dependencies in desc.dependencies.items()},
+        'hooks': list(desc.hooks),
+        'metadata': desc.metadata,
+    }
+    try:
+        text = json.dumps(data, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+    if json.loads(text) != data:
+        return None
+    return data
+
+
+def _deserialize_descriptor(path, data):
+    desc = PackageDescriptor(path)
+    desc.type = data['type']
+    desc.name = data['name']
+    for category, dependencies in data['dependencies'].items():
+        desc.dependencies[category] = {
+            DependencyDescriptor(name, metadata=metadata)
+            for name, metadata in dependencies}
+    desc.hooks = list(data['hooks'])
+    desc.metadata.update(data['metadata'])
+    return desc
+
+
+def uses_recursive_crawl(args):
+    """
+    Check if colcon would discover the packages by crawling the base paths.
+
+    Other discovery extensions than the known ones might find packages
+    elsewhere, so the cache is not used with them.
+    """
+    return set(get_package_discovery_extensions()) <= \
+        KNOWN_DISCOVERY_EXTENSIONS and \
+        not getattr(args, 'paths', None) and \
+        bool(getattr(args, 'base_paths', None))
+
+
+class DiscoveryCache:
+    """
+    The packages discovered in the base paths of a workspace.
+
+    The crawl of colcon's recursive discovery is repeated, but a directory
+    whose modification time and manifest files did not change since the
+    last run is neither listed nor identified again.  Its subdirectories or
+    the augmented package descriptor found in it are taken from the cache
+    in MASH_HOME instead.  Only changed subtrees are identified and
+    augmented by the colcon extensions, except for the augmentation
+    extensions which filter the packages by the arguments, e.g.
+    --packages-ignore, which are applied to all packages on every run.
+    The cache is only used for the same extensions, colcon.meta files and
+    ROS environment variables.
+    """
+
+    def __init__(self, args, read=True):
+        """
+        Load the cache of the base paths of the arguments.
+
+        :param args: The parsed arguments with the base paths
+        :param read: Read the cache, otherwise all directories are
+          identified again and the cache is replaced
+        """
+        self.args = args
+        self.base_paths = [os.path.abspath(path) for path in args.base_paths]
+        self.path = get_discovery_cache_path(self.base_paths)
+        self.identification_extensions = \
+            get_package_identification_extensions()
+        self.augmentation_extensions = get_package_augmentation_extensions()
+        self.key = self._get_key()
+        self._directories = {}
+        self._time = 0
+        self._changed = False
+        if not read:
+            return
+        try:
+            with open(self.path, 'r') as h:
+                data = json.load(h)
+        except (OSError, ValueError):
+            return
+        if data.get('format') == DISCOVERY_CACHE_FORMAT_VERSION and \
+                data.get('key') == self.key:
+            self._directories = data.get('directories', {})
+            self._time = data.get('time', 0)
+
+    def _get_key(self):
+        meta_files = []
+        for meta in getattr(self.args, 'metas', None) or []:
+            path = os.path.abspath(meta)
+            if os.path.isdir(path):
+                path = os.path.join(path, 'colcon.meta')
+            meta_files.append([path, _stat_file(path)])
+        if not getattr(self.args, 'ignore_user_meta', True):
+            try:
+                from colcon_metadata.metadata import get_metadata_files
+            except ImportError:
+                pass
+            else:
+                for path in sorted(get_metadata_files()):
+                    meta_files.append([str(path), _stat_file(path)])
+        content = json.dumps({
+            'identification': list(self.identification_extensions),
+            'augmentation': list(self.augmentation_extensions),
+            'environment': {
+                name: os.environ.get(name)
+                for name in CONDITION_ENVIRONMENT_VARIABLES},
+            'meta_files': meta_files,
+        }, sort_keys=True)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def discover(self):
+        """
+        Discover the packages in the base paths.
+
+        :returns: The set of augmented package descriptors
+        """
+        start_time = time.time_ns()
+        # Like colcon, which also loads the colcon.meta files and passes the
+        # arguments to the filtering extensions
+        for extension in get_package_discovery_extensions().values():
+            try:
+                extension.has_parameters(args=self.args)
+            except Exception:  # noqa: B902
+                # colcon skips failing extensions as well
+                continue
+
+        directories = {}
+        identified = 0
+        descriptors = set()
+        new_descriptors = {}
+        visited_directories = set()
+        for base_path in self.args.base_paths:
+            pending = [base_path]
+            while pending:
+                path = pending.pop()
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # avoid crawling the same directories again, e.g. through
+                # symlinks
+                if (stat.st_dev, stat.st_ino) in visited_directories:
+                    continue
+                visited_directories.add((stat.st_dev, stat.st_ino))
+
+                entry = self._get_entry(path, stat)
+                if entry is None:
+                    identified += 1
+                    entry, desc = self._identify(path, stat)
+                    if entry is None:
+                        continue
+                    if desc is not None:
+                        new_descriptors[path] = desc
+                else:
+                    if entry['result'] == 'package':
+                        descriptors.add(_deserialize_descriptor(
+                            path, entry['descriptor']))
+                directories[path] = entry
+                if entry['result'] == 'directory':
+                    pending += [
+                        os.path.join(path, name)
+                        for name in reversed(entry['subdirectories'])]
+
+        self._check_selection_arguments(
+            {desc.name for desc in descriptors} |
+            {desc.name for desc in new_descriptors.values()})
+
+        augmentation_extensions = {}
+        filter_extensions = {}
+        for name, extension in self.augmentation_extensions.items():
+            if isinstance(extension, PackageDiscoveryExtensionPoint):
+                filter_extensions[name] = extension
+            else:
+                augmentation_extensions[name] = extension
+        new_set = set(new_descriptors.values())
+        augment_packages(
+            new_set, augmentation_extensions=augmentation_extensions)
+        for path, desc in new_descriptors.items():
+            data = _serialize_descriptor(desc)
+            if data is None:
+                del directories[path]
+            else:
+                directories[path]['descriptor'] = data
+        descriptors |= new_set
+        augment_packages(
+            descriptors, augmentation_extensions=filter_extensions)
+
+        logger.info(
+            f'Identified {identified} of {len(directories)} directories, '
+            'the others are unchanged')
+        if identified or directories.keys() != self._directories.keys():
+            self._directories = directories
+            self._time = start_time
+            self._changed = True
+        return descriptors
+
+    def _get_entry(self, path, stat):
+        # A directory is unchanged if its entries and manifest files are,
+        # entries as new as the cache may have changed afterwards
+        entry = self._directories.get(path)
+        if entry is None:
+            return None
+        if entry['result'] == 'package' and 'descriptor' not in entry:
+            return None
+        if stat.st_mtime_ns != entry['mtime'] or \
+                stat.st_mtime_ns >= self._time:
+            return None
+        for name, file_stat in entry['files'].items():
+            if _stat_file(os.path.join(path, name)) != file_stat or \
+                    file_stat[0] >= self._time:
+                return None
+        return entry
+
+    def _identify(self, path, stat):
+        try:
+            subdirectories = []
+            files = {}
+            with os.scandir(path) as it:
+                for dir_entry in it:
+                    if dir_entry.name in MANIFEST_FILES and \
+                            dir_entry.is_file():
+                        files[dir_entry.name] = _stat_file(dir_entry.path)
+                    elif dir_entry.is_dir() and \
+                            not dir_entry.name.startswith('.'):
+                        subdirectories.append(dir_entry.name)
+        except OSError:
+            return None, None
+        entry = {
+            'mtime': stat.st_mtime_ns,
+            'files': files,
+            'result': 'directory',
+            'subdirectories': [],
+        }
+
+        _forget_ros_package(path)
+        try:
+            desc = identify(self.identification_extensions, path)
+        except IgnoreLocationException:
+            entry['result'] = 'ignored'
+            return entry, None
+        if desc:
+            entry['result'] = 'package'
+            return entry, desc
+        entry['subdirectories'] = sorted(subdirectories)
+        return entry, None
+
+    def _check_selection_arguments(self, pkg_names):
+        # Warn about unknown package names like colcon's discovery
+        for extension in get_package_selection_extensions().values():
+            try:
+                extension.check_parameters(args=self.args, pkg_names=pkg_names)
+            except Exception:  # noqa: B902
+                continue
+
+    def save(self):
+        """Write the cache atomically if it changed."""
+        if not self._changed:
+            return
+        os.makedirs(self.path.parent, exist_ok=True)
+        tmp_path = self.path.with_name(f'.{self.path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as h:
+            json.dump({
+                'format': DISCOVERY_CACHE_FORMAT_VERSION,
+                'key': self.key,
+                'time': self._time,
+                'directories': self._directories,
+            }, h, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._changed = False
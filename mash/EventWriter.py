@@ -0,0 +1,40 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import json
+import sys
+import threading
+
+
+class EventWriter:
+    """
+    Write events as newline delimited JSON.
+
+    Every event is written as a single line and flushed immediately so that
+    consumers can follow the file while mash is still running.
+    """
+
+    def __init__(self, path):
+        """
+        Open the event stream.
+
+        :param path: The path of the file or - for stdout
+        """
+        self.is_stdout = path == '-'
+        if self.is_stdout:
+            self._file = sys.stdout
+        else:
+            self._file = open(path, 'w')
+        self._lock = threading.Lock()
+
+    def write_event(self, event):
+        """Write a JSON serializable event."""
+        line = json.dumps(event, sort_keys=True)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        """Close the event stream unless it is stdout."""
+        if not self.is_stdout:
+            self._file.close()
@@ -0,0 +1,242 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from abc import ABC
+from abc import abstractmethod
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+"""Seconds to wait for further changes after the first one"""
+SETTLE_TIME = 0.05
+
+"""Seconds between two scans of the polling watcher"""
+POLL_INTERVAL = 0.2
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _is_lock_file(path):
+    return path.endswith('.lock')
+
+
+class FileWatcher(ABC):
+    """
+    Watch files and directory trees for changes.
+
+    Single files are watched through their parent directory so that files
+    replaced by a rename, as most editors and git do, are noticed too.
+    """
+
+    def __init__(self):  # noqa: D107
+        self._files = set()
+        self._trees = set()
+
+    def add_file(self, path):
+        """Watch a single file, which does not need to exist yet."""
+        self._files.add(os.path.abspath(path))
+
+    def add_tree(self, path):
+        """Watch all files in a directory and its subdirectories."""
+        self._trees.add(os.path.abspath(path))
+
+    def is_watched(self, path):
+        """Check if a changed path is one of the watched files."""
+        if _is_lock_file(path):
+            return False
+        if path in self._files:
+            return True
+        return any(
+            path.startswith(tree + os.sep) for tree in self._trees)
+
+    @abstractmethod
+    def wait(self, timeout=None):
+        """
+        Wait for changes of the watched files.
+
+        :param timeout: The maximum number of seconds to wait, None to wait
+          until a change happens
+        :returns: The set of changed paths, empty if the timeout expired
+        """
+
+    def close(self):
+        """Release the resources of the watcher."""
+        pass
+
+
+class InotifyWatcher(FileWatcher):
+    """Watch files using the Linux inotify API."""
+
+    def __init__(self):
+        """
+        Create an inotify instance.
+
+        :raises: :exc:`OSError` if inotify is not available
+        """
+        super().__init__()
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError('No C library found')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watches = {}
+        self._directories = set()
+
+    def _watch_directory(self, path):
+        if path in self._directories:
+            return
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            # the directory does not exist (anymore)
+            return
+        self._watches[wd] = path
+        self._directories.add(path)
+
+    def add_file(self, path):  # noqa: D102
+        super().add_file(path)
+        self._watch_directory(os.path.dirname(os.path.abspath(path)))
+
+    def add_tree(self, path):  # noqa: D102
+        super().add_tree(path)
+        for dirpath, _, _ in os.walk(os.path.abspath(path)):
+            self._watch_directory(dirpath)
+
+    def _read_events(self):
+        changed = set()
+        data = os.read(self._fd, 64 * 1024)
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = data[pos:pos + length].rstrip(b'\0')
+            pos += length
+
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                self._directories.discard(directory)
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) \
+                if name else directory
+
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and \
+                    self.is_watched(path):
+                # new directories in a watched tree, e.g. refs/remotes/new
+                for dirpath, _, filenames in os.walk(path):
+                    self._watch_directory(dirpath)
+                    changed.update(
+                        os.path.join(dirpath, filename)
+                        for filename in filenames)
+            elif self.is_watched(path):
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):  # noqa: D102
+        changed = set()
+        while not changed:
+            readable, _, _ = select.select([self._fd], [], [], timeout)
+            if not readable:
+                return changed
+            changed |= self._read_events()
+        # collect the remaining events of e.g. a git checkout
+        while True:
+            readable, _, _ = select.select([self._fd], [], [], SETTLE_TIME)
+            if not readable:
+                return changed
+            changed |= self._read_events()
+
+    def close(self):  # noqa: D102
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(FileWatcher):
+    """Watch files by comparing their status periodically."""
+
+    def __init__(self, interval=POLL_INTERVAL):
+        """
+        Create a polling watcher.
+
+        :param interval: The number of seconds between two scans
+        """
+        super().__init__()
+        self.interval = interval
+        self._status = None
+
+    def _scan(self):
+        status = {}
+        paths = list(self._files)
+        for tree in self._trees:
+            for dirpath, _, filenames in os.walk(tree):
+                paths.extend(
+                    os.path.join(dirpath, filename) for filename in filenames)
+        for path in paths:
+            if _is_lock_file(path):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            status[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        return status
+
+    def add_file(self, path):  # noqa: D102
+        super().add_file(path)
+        self._status = None
+
+    def add_tree(self, path):  # noqa: D102
+        super().add_tree(path)
+        self._status = None
+
+    def wait(self, timeout=None):  # noqa: D102
+        if self._status is None:
+            self._status = self._scan()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            status = self._scan()
+            changed = {
+                path for path in set(status) | set(self._status)
+                if status.get(path) != self._status.get(path)}
+            self._status = status
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return changed
+
+
+def create_watcher():
+    """Create an inotify based watcher, or a polling one if unavailable."""
+    try:
+        return InotifyWatcher()
+    except OSError:
+        return PollingWatcher()
@@ -0,0 +1,277 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+
+from colcon_core.logging import colcon_logger
+from mash.EventWriter import EventWriter
+from mash.rosdep_support import refresh_sources_hash
+from mash.rosdistro_support import get_distro_snapshot
+from mash.rosdistro_support import is_snapshot_fresh
+from mash.rosdistro_support import SnapshotUnavailable
+from mash.verb.bitbake import ManifestCache
+
+logger = colcon_logger.getChild(__name__)
+
+"""Arguments holding paths which are relative to the client directory"""
+PATH_ARGUMENTS = ('archive', 'build_base', 'events_json', 'metadata_db')
+
+"""Arguments of the command line which the server does not support"""
+UNSUPPORTED_ARGUMENTS = (
+    'watch', 'changed_paths_from_stdin', 'profile', 'profile_cprofile',
+    'profile_tracemalloc')
+
+"""Arguments holding lists of paths relative to the client directory"""
+PATH_LIST_ARGUMENTS = ('base_paths', 'paths', 'metas')
+
+
+class _ThreadLocalStdout:
+    """Route the output of each request thread to its own client."""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def set_stream(self, stream):
+        self._local.stream = stream
+
+    def _get_stream(self):
+        return getattr(self._local, 'stream', None) or self._default
+
+    def write(self, text):
+        return self._get_stream().write(text)
+
+    def flush(self):
+        return self._get_stream().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._default, name)
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+
+    def error(self, message):
+        raise ValueError(f'Invalid arguments: {message}')
+
+
+class _ClientStream:
+    """Send written text to a client as JSON messages."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        self.send({'stdout': text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def send(self, message):
+        data = json.dumps(message).encode('utf-8') + b'\n'
+        with self._lock:
+            self._wfile.write(data)
+            self._wfile.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        stream = _ClientStream(self.wfile)
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError as e:
+            stream.send({'rc': f'Error: Invalid request: {e}'})
+            return
+
+        self.server.stdout.set_stream(stream)
+        try:
+            rc = self.server.generation_server.handle_request(request)
+        except Exception as e:  # noqa: B902
+            logger.error(
+                f'Request failed: {e}\n{traceback.format_exc()}')
+            rc = f'Error: {e}'
+        finally:
+            self.server.stdout.set_stream(None)
+        try:
+            stream.send({'rc': rc or 0})
+        except OSError:
+            # the client disconnected
+            pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+
+class GenerationServer:
+    """
+    Serve recipe generation requests with warm caches.
+
+    The rosdistro snapshots, rosdep views and resolutions and the colcon
+    extensions stay loaded between requests.  Requests for different build
+    bases run concurrently, requests for the same build base one after the
+    other.
+    """
+
+    def __init__(self, verb, socket_path):
+        """
+        Create a server.
+
+        :param verb: The :class:`BitbakeVerb` generating the recipes
+        :param socket_path: The path of the Unix socket to listen on
+        """
+        self.verb = verb
+        self.socket_path = socket_path
+        self._snapshots = {}
+        self._snapshot_lock = threading.Lock()
+        self._discovery_lock = threading.Lock()
+        self._build_base_locks = {}
+        self._lock = threading.Lock()
+
+    def create_parser(self):
+        """Create the parser for the arguments of a request."""
+        parser = _ArgumentParser(prog='mash-client', add_help=False)
+        self.verb.add_arguments(parser=parser)
+        return parser
+
+    def parse_arguments(self, request):
+        """
+        Parse the arguments of a request.
+
+        Relative paths are resolved against the directory of the client.
+        """
+        parser = self.create_parser()
+        env = request.get('env', {})
+        if env.get('ROSDISTRO'):
+            parser.set_defaults(rosdistro=[env['ROSDISTRO']])
+        args = parser.parse_args(request.get('argv', []))
+
+        cwd = request['cwd']
+        for name in PATH_ARGUMENTS:
+            value = getattr(args, name, None)
+            if value and value != '-':
+                setattr(args, name, os.path.join(cwd, value))
+        for name in PATH_LIST_ARGUMENTS:
+            values = getattr(args, name, None)
+            if values:
+                setattr(args, name, [
+                    os.path.join(cwd, value) for value in values])
+        return args
+
+    def get_snapshot(self, args):
+        """Get the rosdistro snapshot kept in memory while it is fresh."""
+        with self._snapshot_lock:
+            snapshot = self._snapshots.get(args.rosdistro)
+            if snapshot is None or \
+                    not is_snapshot_fresh(snapshot, args.rosdistro_cache_ttl):
+                snapshot = get_distro_snapshot(
+                    args.rosdistro, ttl=args.rosdistro_cache_ttl,
+                    offline=args.offline)
+                self._snapshots[args.rosdistro] = snapshot
+            return snapshot
+
+    def _get_build_base_lock(self, build_base):
+        with self._lock:
+            return self._build_base_locks.setdefault(
+                os.path.realpath(build_base), threading.Lock())
+
+    def handle_request(self, request):
+        """
+        Generate the recipes of a request.
+
+        :param request: A dictionary with the directory of the client
+          (``cwd``), the arguments (``argv``) and environment variables
+          (``env``)
+        :returns: The return code, a string for errors
+        """
+        try:
+            args = self.parse_arguments(request)
+        except (KeyError, ValueError) as e:
+            return f'Error: {e}'
+        for name in UNSUPPORTED_ARGUMENTS:
+            if getattr(args, name):
+                option = '--' + name.replace('_', '-')
+                return f'Error: {option} is not supported by the server'
+        if args.events_json == '-':
+            return 'Error: --events-json - is not supported by the server'
+        rc = self.verb.check_arguments(args)
+        if rc:
+            return rc
+        # Pick up a 'rosdep update' since the previous request
+        refresh_sources_hash()
+
+        rosdistro_args = [
+            self.verb.get_rosdistro_arguments(args, rosdistro)
+            for rosdistro in args.rosdistro]
+        try:
+            snapshots = [
+                self.get_snapshot(distro_args)
+                for distro_args in rosdistro_args]
+        except SnapshotUnavailable as e:
+            return f'Error: {e.message}'
+
+        # colcon extensions are not meant to be used from several threads
+        with self._discovery_lock:
+            descriptors = self.verb.discover_packages(
+                rosdistro_args[0], snapshots[0])
+
+        manifest_cache = ManifestCache() if len(rosdistro_args) > 1 else None
+        events = EventWriter(args.events_json) if args.events_json else None
+        try:
+            for distro_args, snapshot in zip(rosdistro_args, snapshots):
+                with self._get_build_base_lock(
+                    distro_args.archive or distro_args.build_base
+                ):
+                    rc = self.verb.generate(
+                        distro_args, events, snapshot=snapshot,
+                        descriptors=descriptors,
+                        manifest_cache=manifest_cache)
+                if rc:
+                    return rc
+        finally:
+            if events is not None:
+                events.close()
+
+    def serve_forever(self):
+        """Listen on the socket until interrupted."""
+        if os.path.exists(self.socket_path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                try:
+                    s.connect(self.socket_path)
+                except OSError:
+                    # a stale socket of a previous server
+                    os.remove(self.socket_path)
+                else:
+                    return 'Error: A server is already listening on ' \
+                        f"'{self.socket_path}'"
+
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        # only the user running the server may connect
+        umask = os.umask(0o077)
+        try:
+            server = _UnixServer(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(umask)
+
+        server.generation_server = self
+        server.stdout = _ThreadLocalStdout(sys.stdout)
+        sys.stdout = server.stdout
+        print(f"Listening on '{self.socket_path}', press Ctrl-C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sys.stdout = server.stdout._default
+            server.server_close()
+            os.remove(self.socket_path)
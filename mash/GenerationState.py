@@ -0,0 +1,96 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import hashlib
+import json
+import os
+
+"""Version of the state file format"""
+STATE_FORMAT_VERSION = 1
+
+
+def compute_fingerprint(**inputs):
+    """
+    Compute the fingerprint of the inputs of a recipe.
+
+    :param inputs: JSON serializable values, bytes are hashed first
+    :returns: A hex digest identifying the inputs
+    """
+    data = {}
+    for name, value in inputs.items():
+        if isinstance(value, bytes):
+            value = hashlib.sha256(value).hexdigest()
+        data[name] = value
+    content = json.dumps(data, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+class GenerationState:
+    """
+    The state file in the build base recording what each recipe was made of.
+
+    For every package the fingerprint of its inputs and the generated
+    recipe file, relative to the build base, are stored.  The build base of
+    a shard also records which shard it contains.
+    """
+
+    FILENAME = '.mash_state.json'
+
+    def __init__(self, build_base):
+        """
+        Load the state of a build base, if any.
+
+        :param build_base: The base directory of the generated recipes
+        """
+        self.build_base = build_base
+        self.path = os.path.join(build_base, self.FILENAME)
+        self.packages = {}
+        self.shard = None
+        try:
+            with open(self.path, 'r') as h:
+                data = json.load(h)
+        except (OSError, ValueError):
+            return
+        if data.get('format') == STATE_FORMAT_VERSION:
+            self.packages = data.get('packages', {})
+            self.shard = data.get('shard')
+
+    def get_package(self, name):
+        """Get the recorded state of a package or None."""
+        return self.packages.get(name)
+
+    def is_up_to_date(self, name, fingerprint):
+        """
+        Check if the recipe of a package was generated from the same inputs.
+
+        The recipe file must also still exist in the build base.
+        """
+        entry = self.packages.get(name)
+        if entry is None or entry.get('fingerprint') != fingerprint:
+            return False
+        return os.path.isfile(os.path.join(self.build_base, entry['recipe']))
+
+    def update_package(self, name, fingerprint, recipe):
+        """Record the fingerprint and recipe file of a generated package."""
+        self.packages[name] = {
+            'fingerprint': fingerprint,
+            'recipe': os.path.relpath(recipe, self.build_base),
+        }
+
+    def remove_package(self, name):
+        """Forget a package."""
+        self.packages.pop(name, None)
+
+    def save(self):
+        """Write the state file atomically."""
+        os.makedirs(self.build_base, exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as h:
+            data = {
+                'format': STATE_FORMAT_VERSION,
+                'packages': self.packages,
+            }
+            if self.shard is not None:
+                data['shard'] = self.shard
+            json.dump(data, h, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
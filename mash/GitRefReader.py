@@ -0,0 +1,818 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import heapq
+import itertools
+import mmap
+import os
+import re
+import struct
+import zlib
+
+SHA1_LENGTH = 20
+
+# Object types as stored in pack files
+OBJ_COMMIT = 1
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+OBJ_TYPE_NAMES = {1: 'commit', 2: 'tree', 3: 'blob', 4: 'tag'}
+
+# Parent positions in the commit-graph file
+GRAPH_PARENT_NONE = 0x70000000
+GRAPH_EXTRA_EDGES = 0x80000000
+GRAPH_LAST_EDGE = 0x80000000
+
+# Number of tags git describe considers
+DESCRIBE_CANDIDATES = 10
+
+
+class UnsupportedRepository(Exception):
+    """Raised when the repository layout can not be read in-process."""
+
+
+class GitRefReader:
+    """
+    Read refs and commits of a git repository without running git.
+
+    HEAD, loose refs, packed-refs, the commit-graph and loose or packed
+    objects are parsed directly.  Anything else, e.g. SHA-256 object ids,
+    reftable or config includes, raises :exc:`UnsupportedRepository` so
+    that the caller can fall back to GitPython.
+    """
+
+    def __init__(self, working_tree):
+        """
+        Open the repository of a working tree.
+
+        :param working_tree: The root of the working tree
+        :raises: :exc:`UnsupportedRepository` if the layout is unsupported
+        """
+        self.git_dir = self._find_git_dir(working_tree)
+        common_dir = self.git_dir
+        commondir_file = os.path.join(self.git_dir, 'commondir')
+        if os.path.isfile(commondir_file):
+            with open(commondir_file, 'r') as h:
+                common_dir = os.path.join(self.git_dir, h.read().strip())
+        self.common_dir = os.path.normpath(common_dir)
+
+        self.config = read_git_config(
+            os.path.join(self.common_dir, 'config'))
+        for key in ('extensions.objectformat', 'extensions.refstorage'):
+            value = self.config.get(key)
+            if value and value[0] not in ('sha1', 'files'):
+                raise UnsupportedRepository(f'{key} = {value[0]}')
+
+        self._refs = None
+        self._peeled = {}
+        self._objects = None
+        self._graph = None
+        self._shallow = None
+        self._commits = {}
+        self._dates = {}
+
+    @staticmethod
+    def _find_git_dir(working_tree):
+        git_dir = os.path.join(working_tree, '.git')
+        if os.path.isfile(git_dir):
+            with open(git_dir, 'r') as h:
+                content = h.read().strip()
+            if not content.startswith('gitdir:'):
+                raise UnsupportedRepository(f"Unknown '.git' file: {git_dir}")
+            git_dir = os.path.join(
+                working_tree, content[len('gitdir:'):].strip())
+        if not os.path.isfile(os.path.join(git_dir, 'HEAD')):
+            raise UnsupportedRepository(f'No git directory: {git_dir}')
+        return os.path.normpath(git_dir)
+
+    def read_head(self):
+        """
+        Read HEAD of the working tree.
+
+        :returns: The commit id of HEAD and the name of the checked out
+          branch, or None for the branch if HEAD is detached
+        """
+        with open(os.path.join(self.git_dir, 'HEAD'), 'r') as h:
+            head = h.read().strip()
+        if not head.startswith('ref:'):
+            return head, None
+        ref = head[len('ref:'):].strip()
+        sha = self.get_refs().get(ref)
+        if sha is None:
+            raise UnsupportedRepository(f'Unborn branch: {ref}')
+        return sha, ref.removeprefix('refs/heads/')
+
+    def get_refs(self):
+        """
+        Get all refs of the repository.
+
+        Symbolic refs other than HEAD are skipped.
+
+        :returns: A dictionary mapping full ref names to object ids
+        """
+        if self._refs is None:
+            refs = {}
+            packed_refs = os.path.join(self.common_dir, 'packed-refs')
+            if os.path.isfile(packed_refs):
+                refs.update(self._read_packed_refs(packed_refs))
+            refs_dir = os.path.join(self.common_dir, 'refs')
+            for dirpath, dirnames, filenames in os.walk(refs_dir):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    path = os.path.join(dirpath, filename)
+                    with open(path, 'r') as h:
+                        value = h.read().strip()
+                    if value.startswith('ref:'):
+                        continue
+                    name = os.path.relpath(path, self.common_dir)
+                    refs[name.replace(os.sep, '/')] = value
+            self._refs = refs
+        return self._refs
+
+    def _read_packed_refs(self, path):
+        refs = {}
+        last_ref = None
+        with open(path, 'r') as h:
+            for line in h:
+                line = line.rstrip('\n')
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith('^'):
+                    if last_ref is not None:
+                        self._peeled[last_ref] = line[1:]
+                    continue
+                sha, last_ref = line.split(' ', 1)
+                refs[last_ref] = sha
+        return refs
+
+    def get_remote_urls(self):
+        """Get the URLs of the remotes in the order of the configuration."""
+        urls = {}
+        for key, values in self.config.items():
+            match = re.match(r'^remote\.(.+)\.url$', key)
+            if match:
+                urls[match.group(1)] = values[0]
+        return urls
+
+    def get_branches(self):
+        """
+        Get the local and remote branches of the repository.
+
+        :returns: A dictionary mapping branch names, e.g. 'main' or
+          'origin/main', to commit ids
+        """
+        branches = {}
+        remotes = self.get_remote_urls().keys()
+        for ref, sha in self.get_refs().items():
+            if ref.startswith('refs/heads/'):
+                branches[ref[len('refs/heads/'):]] = sha
+            elif ref.startswith('refs/remotes/'):
+                name = ref[len('refs/remotes/'):]
+                if name.split('/', 1)[0] in remotes:
+                    branches[name] = sha
+        return branches
+
+    def branches_containing(self, sha):
+        """Get the names of all branches which contain a commit."""
+        reaching = {sha}
+        not_reaching = set()
+        target_level = self._get_level(sha)
+        branches = []
+        for name, tip in sorted(self.get_branches().items()):
+            if self._reaches(tip, sha, target_level, reaching, not_reaching):
+                branches.append(name)
+        return branches
+
+    def _reaches(self, tip, sha, target_level, reaching, not_reaching):
+        seen = set()
+        queue = [tip]
+        while queue:
+            commit = queue.pop()
+            if commit in reaching:
+                reaching.add(tip)
+                return True
+            if commit in not_reaching or commit in seen:
+                continue
+            seen.add(commit)
+            level = self._get_level(commit)
+            if level is not None and target_level is not None and \
+                    level <= target_level:
+                # ancestors always have a lower topological level
+                continue
+            queue.extend(self.get_parents(commit))
+        not_reaching.update(seen)
+        return False
+
+    def nearest_tag(self, sha):
+        """
+        Find the tag of a commit like `git describe --tags --abbrev=0`.
+
+        The history is walked from the most recent commit date on and the
+        first tags found are the candidates.  The candidate leaving out the
+        fewest commits of the history wins, ties are broken by the order in
+        which they were found.  An annotated tag is preferred over a
+        lightweight tag on the same commit, then the most recently tagged
+        one and then the first by name.
+
+        :returns: The tag name or None if no tag is reachable
+        """
+        names = self._get_tag_names()
+        if not names:
+            return None
+
+        order = itertools.count()
+        queue = [(-self.get_commit_date(sha), next(order), sha)]
+        flags = {sha: 0}
+        candidates = []
+        seen_commits = 0
+        annotated_count = 0
+        while queue:
+            _, _, commit = heapq.heappop(queue)
+            seen_commits += 1
+            commit_flags = flags[commit]
+            if commit in names:
+                if len(candidates) == DESCRIBE_CANDIDATES:
+                    break
+                annotated, name = names[commit]
+                flag = 1 << len(candidates)
+                # the depth, found order, name and flag of the commits
+                # reaching the tag
+                candidates.append(
+                    [seen_commits - 1, len(candidates), name, flag])
+                commit_flags |= flag
+                if annotated:
+                    annotated_count += 1
+            for candidate in candidates:
+                if not commit_flags & candidate[3]:
+                    candidate[0] += 1
+            if annotated_count and not queue:
+                # stop if the last path is covered by the best candidates
+                best_depth = min(candidate[0] for candidate in candidates)
+                best_flags = 0
+                for candidate in candidates:
+                    if candidate[0] == best_depth:
+                        best_flags |= candidate[3]
+                if commit_flags & best_flags == best_flags:
+                    break
+            for parent in self.get_parents(commit):
+                if parent not in flags:
+                    flags[parent] = 0
+                    heapq.heappush(queue, (
+                        -self.get_commit_date(parent), next(order), parent))
+                flags[parent] |= commit_flags
+        if not candidates:
+            return None
+        return min(candidates)[2]
+
+    def _get_tag_names(self):
+        # The tag of each tagged commit chosen like git describe
+        tags = {}
+        for ref, target in sorted(self.get_refs().items()):
+            if not ref.startswith('refs/tags/'):
+                continue
+            commit, annotated = self._peel(ref, target)
+            if commit is None:
+                continue
+            previous = tags.get(commit)
+            if previous is not None:
+                if previous[0] > annotated:
+                    continue
+                if previous[0] == annotated and not (
+                    annotated and
+                    self._get_tag_date(previous[2]) < self._get_tag_date(
+                        target)
+                ):
+                    continue
+            tags[commit] = (annotated, ref[len('refs/tags/'):], target)
+        return {
+            commit: (annotated, name)
+            for commit, (annotated, name, _) in tags.items()}
+
+    def _get_tag_date(self, sha):
+        _, data = self.read_object(sha)
+        return _parse_signature_date(data, b'tagger ')
+
+    def _peel(self, ref, sha):
+        if ref in self._peeled:
+            return self._peeled[ref], True
+        obj_type, data = self.read_object(sha)
+        if obj_type == 'commit':
+            return sha, False
+        annotated = False
+        while obj_type == 'tag':
+            annotated = True
+            sha = data.split(b'\n', 1)[0].split(b' ', 1)[1].decode()
+            obj_type, data = self.read_object(sha)
+        return (sha if obj_type == 'commit' else None), annotated
+
+    def get_parents(self, sha):
+        """Get the parent commit ids of a commit."""
+        parents = self._commits.get(sha)
+        if parents is None:
+            if self._shallow is None:
+                self._shallow = set()
+                shallow_file = os.path.join(self.common_dir, 'shallow')
+                if os.path.isfile(shallow_file):
+                    with open(shallow_file, 'r') as h:
+                        self._shallow = set(h.read().split())
+            if sha in self._shallow:
+                parents = ()
+            else:
+                parents = self._get_graph().get_parents(sha)
+            if parents is None:
+                data = self._read_commit(sha)
+                parents = parse_commit_parents(data)
+                self._dates[sha] = _parse_signature_date(data, b'committer ')
+            self._commits[sha] = parents
+        return parents
+
+    def get_commit_date(self, sha):
+        """Get the committer date of a commit as a Unix timestamp."""
+        date = self._dates.get(sha)
+        if date is None:
+            date = self._get_graph().get_commit_date(sha)
+            if date is None:
+                date = _parse_signature_date(
+                    self._read_commit(sha), b'committer ')
+            self._dates[sha] = date
+        return date
+
+    def _read_commit(self, sha):
+        obj_type, data = self.read_object(sha)
+        if obj_type != 'commit':
+            raise UnsupportedRepository(f'Not a commit: {sha}')
+        return data
+
+    def _get_level(self, sha):
+        return self._get_graph().get_level(sha)
+
+    def _get_graph(self):
+        if self._graph is None:
+            self._graph = CommitGraph(
+                os.path.join(self.common_dir, 'objects', 'info'))
+        return self._graph
+
+    def read_object(self, sha):
+        """
+        Read an object from the loose objects or the pack files.
+
+        :returns: The object type name and the uncompressed content
+        """
+        if self._objects is None:
+            self._objects = ObjectDatabase(
+                os.path.join(self.common_dir, 'objects'))
+        return self._objects.read_object(sha)
+
+
+def read_git_index(path, select=None):
+    """
+    Read the entries of a git index file.
+
+    Versions 2 to 4 of the format are supported, extensions are ignored.
+
+    :param path: The path of the index file
+    :param select: An optional callable selecting the paths to return
+    :returns: A dictionary mapping the selected paths to their modification
+      time in nanoseconds, size and blob id
+    :raises: :exc:`UnsupportedRepository` if the format is not supported
+    """
+    with open(path, 'rb') as h:
+        data = h.read()
+    if len(data) < 12 or data[:4] != b'DIRC':
+        raise UnsupportedRepository(f'Invalid index file: {path}')
+    version, count = struct.unpack('>II', data[4:12])
+    if version not in (2, 3, 4):
+        raise UnsupportedRepository(f'Index version {version}: {path}')
+
+    entries = {}
+    pos = 12
+    name = b''
+    for _ in range(count):
+        start = pos
+        mtime, mtime_nsec = struct.unpack('>II', data[pos + 8:pos + 16])
+        size, = struct.unpack('>I', data[pos + 36:pos + 40])
+        sha = data[pos + 40:pos + 40 + SHA1_LENGTH].hex()
+        flags, = struct.unpack('>H', data[pos + 60:pos + 62])
+        pos += 62
+        if flags & 0x4000:
+            # the extended flags of version 3
+            pos += 2
+        if version == 4:
+            # the path is prefix compressed against the previous one
+            strip, pos = _read_offset(data, pos)
+            end = data.index(b'\0', pos)
+            name = name[:len(name) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = data.index(b'\0', pos)
+            name = data[pos:end]
+            pos = start + ((end - start + 8) & ~7)
+        path = name.decode('utf-8', 'surrogateescape')
+        if select is None or select(path):
+            entries[path] = (mtime * 1000000000 + mtime_nsec, size, sha)
+    return entries
+
+
+def _read_offset(data, pos):
+    # The variable length offset encoding of ofs-delta and index v4
+    byte = data[pos]
+    value = byte & 0x7f
+    pos += 1
+    while byte & 0x80:
+        byte = data[pos]
+        value = ((value + 1) << 7) | (byte & 0x7f)
+        pos += 1
+    return value, pos
+
+
+def read_git_config(path):
+    """
+    Read a git config file into a dictionary.
+
+    Keys use the `section.subsection.name` notation of `git config`, the
+    values are lists in the order of their appearance.
+    """
+    config = {}
+    section = None
+    try:
+        with open(path, 'r') as h:
+            lines = h.read().splitlines()
+    except OSError:
+        return config
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in '#;':
+            continue
+        if line.endswith('\\'):
+            raise UnsupportedRepository('Continued lines in git config')
+        match = re.match(
+            r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\](.*)$',
+            line)
+        if match:
+            section = match.group(1).lower()
+            if section in ('include', 'includeif'):
+                raise UnsupportedRepository('Includes in git config')
+            if match.group(2) is not None:
+                section += '.' + re.sub(r'\\(.)', r'\1', match.group(2))
+            line = match.group(3).strip()
+            if not line or line[0] in '#;':
+                continue
+        if section is None:
+            continue
+        name, sep, value = line.partition('=')
+        value = value.strip() if sep else 'true'
+        if value.startswith('"') and value.endswith('"') and len(value) > 1:
+            value = value[1:-1]
+        else:
+            value = re.split(r'\s[#;]', value, 1)[0].strip()
+        key = f'{section}.{name.strip().lower()}'
+        config.setdefault(key, []).append(value)
+    return config
+
+
+def _parse_signature_date(data, prefix):
+    # The timestamp of the committer or tagger line of an object header
+    for line in data.split(b'\n'):
+        if not line:
+            break
+        if line.startswith(prefix):
+            try:
+                return int(line.rsplit(b' ', 2)[1])
+            except (IndexError, ValueError):
+                return 0
+    return 0
+
+
+def parse_commit_parents(data):
+    """Parse the parent commit ids from the content of a commit object."""
+    parents = []
+    for line in data.split(b'\n'):
+        if not line:
+            break
+        if line.startswith(b'parent '):
+            parents.append(line[len(b'parent '):].decode())
+    return tuple(parents)
+
+
+class CommitGraph:
+    """The commit-graph file or chain of a repository, if any."""
+
+    def __init__(self, info_dir):  # noqa: D107
+        self._layers = []
+        single = os.path.join(info_dir, 'commit-graph')
+        chain = os.path.join(info_dir, 'commit-graphs', 'commit-graph-chain')
+        paths = []
+        if os.path.isfile(chain):
+            with open(chain, 'r') as h:
+                paths = [
+                    os.path.join(
+                        info_dir, 'commit-graphs', f'graph-{name}.graph')
+                    for name in h.read().split()]
+        elif os.path.isfile(single):
+            paths = [single]
+        base = 0
+        for path in paths:
+            layer = _CommitGraphLayer(path, base)
+            self._layers.append(layer)
+            base += layer.count
+        self._count = base
+
+    def _lookup(self, sha):
+        if not self._layers:
+            return None, None
+        oid = bytes.fromhex(sha)
+        for layer in self._layers:
+            pos = layer.find(oid)
+            if pos is not None:
+                return layer, pos
+        return None, None
+
+    def _layer_at(self, global_pos):
+        for layer in self._layers:
+            if global_pos < layer.base + layer.count:
+                return layer
+        raise UnsupportedRepository('Corrupt commit-graph')
+
+    def get_parents(self, sha):
+        """Get the parents of a commit or None if it is not in the graph."""
+        layer, pos = self._lookup(sha)
+        if layer is None:
+            return None
+        return tuple(
+            self._layer_at(p).oid(p) for p in layer.parent_positions(pos))
+
+    def get_level(self, sha):
+        """Get the topological level of a commit or None if unknown."""
+        layer, pos = self._lookup(sha)
+        if layer is None:
+            return None
+        return layer.level(pos)
+
+    def get_commit_date(self, sha):
+        """Get the committer date of a commit or None if unknown."""
+        layer, pos = self._lookup(sha)
+        if layer is None:
+            return None
+        return layer.commit_date(pos)
+
+
+class _CommitGraphLayer:
+
+    def __init__(self, path, base):
+        self.base = base
+        with open(path, 'rb') as h:
+            self._data = mmap.mmap(h.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._data
+        if data[0:4] != b'CGPH' or data[4] != 1:
+            raise UnsupportedRepository(f'Unknown commit-graph: {path}')
+        if data[5] != 1:
+            raise UnsupportedRepository(f'Unsupported hash in: {path}')
+        chunk_count = data[6]
+        chunks = {}
+        for i in range(chunk_count):
+            offset = 8 + i * 12
+            chunk_id = bytes(data[offset:offset + 4])
+            (chunk_offset, ) = struct.unpack_from('>Q', data, offset + 4)
+            chunks[chunk_id] = chunk_offset
+        for chunk_id in (b'OIDF', b'OIDL', b'CDAT'):
+            if chunk_id not in chunks:
+                raise UnsupportedRepository(f'Missing {chunk_id} in: {path}')
+        self._fanout = chunks[b'OIDF']
+        self._oids = chunks[b'OIDL']
+        self._cdat = chunks[b'CDAT']
+        self._edges = chunks.get(b'EDGE')
+        (self.count, ) = struct.unpack_from('>I', data, self._fanout + 255 * 4)
+
+    def find(self, oid):
+        data = self._data
+        first = oid[0]
+        lo = 0 if first == 0 else struct.unpack_from(
+            '>I', data, self._fanout + (first - 1) * 4)[0]
+        (hi, ) = struct.unpack_from('>I', data, self._fanout + first * 4)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = self._oids + mid * SHA1_LENGTH
+            value = data[offset:offset + SHA1_LENGTH]
+            if value < oid:
+                lo = mid + 1
+            elif value > oid:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def oid(self, global_pos):
+        offset = self._oids + (global_pos - self.base) * SHA1_LENGTH
+        return self._data[offset:offset + SHA1_LENGTH].hex()
+
+    def parent_positions(self, pos):
+        offset = self._cdat + pos * (SHA1_LENGTH + 16) + SHA1_LENGTH
+        parent1, parent2 = struct.unpack_from('>II', self._data, offset)
+        parents = []
+        if parent1 != GRAPH_PARENT_NONE:
+            parents.append(parent1)
+        if parent2 == GRAPH_PARENT_NONE:
+            return parents
+        if not parent2 & GRAPH_EXTRA_EDGES:
+            parents.append(parent2)
+            return parents
+        if self._edges is None:
+            raise UnsupportedRepository('Missing EDGE chunk')
+        index = parent2 & ~GRAPH_EXTRA_EDGES
+        while True:
+            (edge, ) = struct.unpack_from(
+                '>I', self._data, self._edges + index * 4)
+            parents.append(edge & ~GRAPH_LAST_EDGE)
+            if edge & GRAPH_LAST_EDGE:
+                return parents
+            index += 1
+
+    def level(self, pos):
+        offset = self._cdat + pos * (SHA1_LENGTH + 16) + SHA1_LENGTH + 8
+        (value, ) = struct.unpack_from('>I', self._data, offset)
+        return value >> 2
+
+    def commit_date(self, pos):
+        offset = self._cdat + pos * (SHA1_LENGTH + 16) + SHA1_LENGTH + 8
+        high, low = struct.unpack_from('>II', self._data, offset)
+        return (high & 0x3) << 32 | low
+
+
+class ObjectDatabase:
+    """Loose objects and pack files of a repository."""
+
+    def __init__(self, objects_dir):  # noqa: D107
+        self._dirs = [objects_dir]
+        alternates = os.path.join(objects_dir, 'info', 'alternates')
+        if os.path.isfile(alternates):
+            with open(alternates, 'r') as h:
+                for line in h.read().splitlines():
+                    if line and not line.startswith('#'):
+                        self._dirs.append(
+                            os.path.normpath(os.path.join(objects_dir, line)))
+        self._packs = None
+
+    def _get_packs(self):
+        if self._packs is None:
+            self._packs = []
+            for objects_dir in self._dirs:
+                pack_dir = os.path.join(objects_dir, 'pack')
+                if not os.path.isdir(pack_dir):
+                    continue
+                for name in sorted(os.listdir(pack_dir)):
+                    if name.endswith('.idx'):
+                        self._packs.append(
+                            PackFile(os.path.join(pack_dir, name)))
+        return self._packs
+
+    def read_object(self, sha):
+        """Read an object, see :meth:`GitRefReader.read_object`."""
+        for objects_dir in self._dirs:
+            path = os.path.join(objects_dir, sha[:2], sha[2:])
+            if os.path.isfile(path):
+                with open(path, 'rb') as h:
+                    raw = zlib.decompress(h.read())
+                header, data = raw.split(b'\0', 1)
+                return header.split(b' ', 1)[0].decode(), data
+        oid = bytes.fromhex(sha)
+        for pack in self._get_packs():
+            offset = pack.find(oid)
+            if offset is not None:
+                obj_type, data = pack.read_at(offset, self)
+                return OBJ_TYPE_NAMES[obj_type], data
+        raise UnsupportedRepository(f'Object not found: {sha}')
+
+
+class PackFile:
+    """A pack file with a version 2 pack index."""
+
+    def __init__(self, idx_path):  # noqa: D107
+        with open(idx_path, 'rb') as h:
+            self._idx = mmap.mmap(h.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._idx[0:8] != b'\xfftOc\x00\x00\x00\x02':
+            raise UnsupportedRepository(f'Unsupported pack index: {idx_path}')
+        (self.count, ) = struct.unpack_from('>I', self._idx, 8 + 255 * 4)
+        self._oids = 8 + 256 * 4
+        self._offsets = self._oids + self.count * (SHA1_LENGTH + 4)
+        self._large_offsets = self._offsets + self.count * 4
+        self._pack_path = idx_path[:-len('.idx')] + '.pack'
+        self._pack = None
+
+    def find(self, oid):
+        """Get the offset of an object in the pack or None."""
+        idx = self._idx
+        first = oid[0]
+        lo = 0 if first == 0 else struct.unpack_from(
+            '>I', idx, 8 + (first - 1) * 4)[0]
+        (hi, ) = struct.unpack_from('>I', idx, 8 + first * 4)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = self._oids + mid * SHA1_LENGTH
+            value = idx[offset:offset + SHA1_LENGTH]
+            if value < oid:
+                lo = mid + 1
+            elif value > oid:
+                hi = mid
+            else:
+                (pack_offset, ) = struct.unpack_from(
+                    '>I', idx, self._offsets + mid * 4)
+                if pack_offset & 0x80000000:
+                    (pack_offset, ) = struct.unpack_from(
+                        '>Q', idx,
+                        self._large_offsets + (pack_offset & 0x7fffffff) * 8)
+                return pack_offset
+        return None
+
+    def read_at(self, offset, database):
+        """Read and undeltify the object at an offset of the pack."""
+        if self._pack is None:
+            with open(self._pack_path, 'rb') as h:
+                self._pack = mmap.mmap(
+                    h.fileno(), 0, access=mmap.ACCESS_READ)
+        pack = self._pack
+        pos = offset
+        c = pack[pos]
+        pos += 1
+        obj_type = (c >> 4) & 7
+        shift = 4
+        while c & 0x80:
+            c = pack[pos]
+            pos += 1
+            shift += 7
+
+        if obj_type == OBJ_OFS_DELTA:
+            c = pack[pos]
+            pos += 1
+            base_offset = c & 0x7f
+            while c & 0x80:
+                c = pack[pos]
+                pos += 1
+                base_offset = ((base_offset + 1) << 7) | (c & 0x7f)
+            base_type, base = self.read_at(offset - base_offset, database)
+            return base_type, apply_delta(base, _inflate(pack, pos))
+        if obj_type == OBJ_REF_DELTA:
+            base_sha = pack[pos:pos + SHA1_LENGTH].hex()
+            pos += SHA1_LENGTH
+            base_type_name, base = database.read_object(base_sha)
+            base_type = {v: k for k, v in OBJ_TYPE_NAMES.items()}[
+                base_type_name]
+            return base_type, apply_delta(base, _inflate(pack, pos))
+        if obj_type not in OBJ_TYPE_NAMES:
+            raise UnsupportedRepository(f'Unknown pack object type {obj_type}')
+        return obj_type, _inflate(pack, pos)
+
+
+def _inflate(data, pos):
+    decompressor = zlib.decompressobj()
+    chunks = []
+    while not decompressor.eof:
+        chunk = data[pos:pos + 4096]
+        if not chunk:
+            raise UnsupportedRepository('Truncated pack file')
+        pos += len(chunk)
+        chunks.append(decompressor.decompress(chunk))
+    return b''.join(chunks)
+
+
+def _read_delta_size(delta, pos):
+    size = 0
+    shift = 0
+    while True:
+        c = delta[pos]
+        pos += 1
+        size |= (c & 0x7f) << shift
+        shift += 7
+        if not c & 0x80:
+            return size, pos
+
+
+def apply_delta(base, delta):
+    """Apply a git delta to the content of its base object."""
+    _, pos = _read_delta_size(delta, 0)
+    size, pos = _read_delta_size(delta, pos)
+    result = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            copy_offset = 0
+            copy_size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    copy_offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    copy_size |= delta[pos] << (8 * i)
+                    pos += 1
+            if copy_size == 0:
+                copy_size = 0x10000
+            result += base[copy_offset:copy_offset + copy_size]
+        elif op:
+            result += delta[pos:pos + op]
+            pos += op
+        else:
+            raise UnsupportedRepository('Invalid delta opcode')
+    if len(result) != size:
+        raise UnsupportedRepository('Delta size mismatch')
+    return bytes(result)
@@ -0,0 +1,167 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import threading
+
+from colcon_core.location import get_config_path
+from mash.GitRefReader import GitRefReader
+from mash.GitRefReader import read_git_index
+from mash.GitRefReader import UnsupportedRepository
+
+"""Version of the on-disk license checksum cache format"""
+LICENSE_CHECKSUMS_FORMAT_VERSION = 1
+
+"""File names of license texts, e.g. LICENSE, LICENSE.txt or COPYING.LGPL"""
+LICENSE_FILE_PATTERN = re.compile(
+    r'^(LICEN[CS]E|COPYING|COPYRIGHT)([._-].*)?$', re.IGNORECASE)
+
+
+def get_license_checksums_path():
+    """Return the path of the cache of license file checksums in MASH_HOME."""
+    return Path(get_config_path()) / 'cache' / 'license_checksums.json'
+
+
+def is_license_file(path):
+    """Check if the name of a file is the name of a license text."""
+    return bool(LICENSE_FILE_PATTERN.match(os.path.basename(path)))
+
+
+def compute_blob_id(data):
+    """Compute the git blob id of the content of a file."""
+    sha = hashlib.sha1(f'blob {len(data)}\0'.encode('utf-8'))
+    sha.update(data)
+    return sha.hexdigest()
+
+
+class LicenseFileIndex:
+    """
+    The license files of packages and the md5 checksums of their content.
+
+    The license files of a package are the ones in the package directory
+    and the root of its git working tree.  The checksums are cached in
+    MASH_HOME by git blob id.  A file which is unmodified according to the
+    git index is identified by the blob id in the index, so it is not read
+    at all if its checksum is cached.  Each directory is only listed once.
+    """
+
+    def __init__(self):  # noqa: D107
+        self._checksums = {}
+        self._changed = False
+        self._directories = {}
+        self._git_indexes = {}
+        self._lock = threading.Lock()
+        try:
+            with open(get_license_checksums_path(), 'r') as h:
+                data = json.load(h)
+        except (OSError, ValueError):
+            return
+        if data.get('format') == LICENSE_CHECKSUMS_FORMAT_VERSION:
+            self._checksums = data.get('checksums', {})
+
+    def get_license_files(self, pkg_path, root):
+        """
+        Get the license files of a package.
+
+        :param pkg_path: The path of the package
+        :param root: The root of the git working tree of the package or None
+        :returns: A list of the paths relative to the package and the md5
+          checksums of the license files
+        """
+        pkg_path = str(Path(pkg_path).resolve())
+        license_files = list(self._list_directory(pkg_path, root))
+        if root is not None and root != pkg_path:
+            license_files += self._list_directory(root, root)
+        return [
+            (os.path.relpath(path, pkg_path), md5)
+            for path, md5 in license_files]
+
+    def _list_directory(self, path, root):
+        with self._lock:
+            if path in self._directories:
+                return self._directories[path]
+        try:
+            filenames = sorted(
+                filename for filename in os.listdir(path)
+                if is_license_file(filename) and
+                os.path.isfile(os.path.join(path, filename)))
+        except OSError:
+            filenames = []
+        license_files = []
+        for filename in filenames:
+            file_path = os.path.join(path, filename)
+            try:
+                md5 = self._get_checksum(file_path, root)
+            except OSError:
+                continue
+            license_files.append((file_path, md5))
+        with self._lock:
+            return self._directories.setdefault(path, license_files)
+
+    def _get_checksum(self, path, root):
+        blob_id = self._get_index_blob_id(path, root)
+        if blob_id is not None:
+            with self._lock:
+                md5 = self._checksums.get(blob_id)
+            if md5 is not None:
+                return md5
+
+        with open(path, 'rb') as h:
+            data = h.read()
+        md5 = hashlib.md5(data).hexdigest()
+        with self._lock:
+            self._checksums[compute_blob_id(data)] = md5
+            self._changed = True
+        return md5
+
+    def _get_index_blob_id(self, path, root):
+        # The blob id of an unmodified file as recorded in the git index
+        if root is None:
+            return None
+        with self._lock:
+            index = self._git_indexes.get(root)
+        if index is None:
+            index = self._read_git_index(root)
+            with self._lock:
+                index = self._git_indexes.setdefault(root, index)
+        entries, index_mtime = index
+        entry = entries.get(
+            os.path.relpath(path, root).replace(os.sep, '/'))
+        if entry is None:
+            return None
+        mtime, size, blob_id = entry
+        stat = os.stat(path)
+        # A file modified in the same instant as the index may differ from
+        # its entry, git calls that racy
+        if stat.st_mtime_ns != mtime or stat.st_size != size or \
+                stat.st_mtime_ns >= index_mtime:
+            return None
+        return blob_id
+
+    def _read_git_index(self, root):
+        try:
+            reader = GitRefReader(root)
+            path = os.path.join(reader.git_dir, 'index')
+            index_mtime = os.stat(path).st_mtime_ns
+            return read_git_index(path, select=is_license_file), index_mtime
+        except (OSError, ValueError, UnsupportedRepository):
+            return {}, 0
+
+    def save(self):
+        """Write the cache of checksums atomically if it changed."""
+        if not self._changed:
+            return
+        path = get_license_checksums_path()
+        os.makedirs(path.parent, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as h:
+            json.dump({
+                'format': LICENSE_CHECKSUMS_FORMAT_VERSION,
+                'checksums': self._checksums,
+            }, h, sort_keys=True)
+        os.replace(tmp_path, path)
+        self._changed = False
@@ -0,0 +1,166 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+import sqlite3
+
+from mash.DependencyResolver import DEPENDENCY_CATEGORIES
+
+"""Version of the database schema, stored as its user_version"""
+METADATA_FORMAT_VERSION = 1
+
+"""Dependency categories whose keys resolve to native recipes"""
+NATIVE_DEPENDENCY_CATEGORIES = (
+    'buildtool_depends',
+    'buildtool_export_depends',
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    name TEXT PRIMARY KEY,
+    version TEXT,
+    path TEXT,
+    type TEXT,
+    license TEXT,
+    recipe TEXT,
+    fingerprint TEXT,
+    rosdistro TEXT
+);
+CREATE TABLE IF NOT EXISTS dependencies (
+    package TEXT NOT NULL,
+    category TEXT NOT NULL,
+    key TEXT NOT NULL,
+    recipe TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dependencies_package ON dependencies (package);
+CREATE INDEX IF NOT EXISTS dependencies_key ON dependencies (key);
+CREATE INDEX IF NOT EXISTS dependencies_recipe ON dependencies (recipe);
+CREATE TABLE IF NOT EXISTS git (
+    package TEXT PRIMARY KEY,
+    src_uri TEXT,
+    branch TEXT,
+    srcrev TEXT,
+    tag TEXT,
+    path TEXT
+);
+CREATE INDEX IF NOT EXISTS git_srcrev ON git (srcrev);
+CREATE TABLE IF NOT EXISTS resolutions (
+    rosdistro TEXT NOT NULL,
+    key TEXT NOT NULL,
+    recipe TEXT NOT NULL,
+    fallback INTEGER NOT NULL,
+    PRIMARY KEY (rosdistro, key)
+);
+CREATE INDEX IF NOT EXISTS resolutions_recipe ON resolutions (recipe);
+"""
+
+
+class MetadataStore:
+    """
+    An SQLite database of the generated recipes and how they were made.
+
+    It records the packages, their recipes and git metadata, the dependency
+    keys of every category with the recipe each one was mapped to and the
+    rosdep resolutions.  Only the packages whose recipe is generated are
+    replaced, so the database is updated incrementally like the recipes.
+    All changes of a run are written in a single transaction on commit.
+    The connection must only be used by the thread which created it.
+    """
+
+    def __init__(self, path):
+        """
+        Open or create a database.
+
+        A database of another schema version is recreated.
+
+        :param path: The path of the database file
+        """
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        version = self._connection.execute('PRAGMA user_version').fetchone()
+        if version[0] != METADATA_FORMAT_VERSION:
+            for (table, ) in self._connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall():
+                self._connection.execute(f'DROP TABLE "{table}"')
+            self._connection.execute(
+                f'PRAGMA user_version = {METADATA_FORMAT_VERSION}')
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+        # Read by the workers to decide if a package is up to date
+        self.fingerprints = dict(self._connection.execute(
+            'SELECT name, fingerprint FROM packages'))
+
+    def is_up_to_date(self, name, fingerprint):
+        """Check if a package is recorded with the same fingerprint."""
+        return self.fingerprints.get(name) == fingerprint
+
+    def update_package(
+        self, pkg, fingerprint, dependencies, event, dependency_resolver
+    ):
+        """
+        Replace the records of a generated package.
+
+        :param pkg: The package descriptor
+        :param fingerprint: The fingerprint of the inputs of the recipe
+        :param dependencies: A dictionary of the dependency keys by category
+        :param event: The event of the generated package
+        :param dependency_resolver: The :class:`DependencyResolver` which
+          resolved the dependency keys
+        """
+        self.remove_package(pkg.name)
+        self._connection.execute(
+            'INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+                pkg.name, event['version'], str(pkg.path), pkg.type,
+                event['license'], event['recipe'], fingerprint,
+                dependency_resolver.rosdistro))
+        self._connection.executemany(
+            'INSERT INTO dependencies VALUES (?, ?, ?, ?)', [
+                (pkg.name, category, key, dependency_resolver.resolve(
+                    key, category in NATIVE_DEPENDENCY_CATEGORIES))
+                for category in DEPENDENCY_CATEGORIES
+                for key in sorted(set(dependencies.get(category, ())))])
+        git = event['git']
+        if git is not None:
+            self._connection.execute(
+                'INSERT INTO git VALUES (?, ?, ?, ?, ?, ?)', (
+                    pkg.name, git['src_uri'], git['branch'], git['srcrev'],
+                    git['tag'], git['path']))
+        self.fingerprints[pkg.name] = fingerprint
+
+    def remove_package(self, name):
+        """Remove the records of a package."""
+        self._connection.execute(
+            'DELETE FROM packages WHERE name = ?', (name, ))
+        self._connection.execute(
+            'DELETE FROM dependencies WHERE package = ?', (name, ))
+        self._connection.execute(
+            'DELETE FROM git WHERE package = ?', (name, ))
+        self.fingerprints.pop(name, None)
+
+    def update_resolutions(self, dependency_resolver):
+        """Record the dependency keys resolved by a resolver."""
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO resolutions VALUES (?, ?, ?, ?)', [
+                (dependency_resolver.rosdistro, key, recipe, int(
+                    key in dependency_resolver.unresolved_keys))
+                for key, recipe
+                in sorted(dependency_resolver.get_resolutions().items())])
+
+    def commit(self):
+        """Write the changes of the run and close the database."""
+        self._connection.commit()
+        self._connection.close()
+
+
+def open_metadata_store(path):
+    """
+    Open an existing database read-only for queries.
+
+    :raises: :exc:`sqlite3.Error` if the database cannot be opened
+    """
+    if not os.path.isfile(path):
+        raise sqlite3.OperationalError(f"No metadata database at '{path}'")
+    return sqlite3.connect(f'file:{os.path.abspath(path)}?mode=ro', uri=True)
@@ -0,0 +1,124 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import hashlib
+import os
+import shutil
+import threading
+
+
+def _file_digest(path):
+    try:
+        with open(path, 'rb') as h:
+            return hashlib.sha256(h.read()).digest()
+    except OSError:
+        return None
+
+
+class OutputManager:
+    """
+    Write generated files into the build base transactionally.
+
+    Files are rendered into a staging directory inside the build base
+    first.  On commit only files whose content changed replace the
+    existing ones, each with an atomic rename, so unchanged recipes keep
+    their modification time and a crash never leaves half-written recipes.
+    """
+
+    STAGING_DIR = '.mash_staging'
+
+    def __init__(self, build_base):
+        """
+        Start a new transaction on a build base.
+
+        Leftovers of an interrupted run are removed from the staging area.
+
+        :param build_base: The base directory of the generated recipes
+        """
+        self.build_base = build_base
+        self.staging_dir = os.path.join(build_base, self.STAGING_DIR)
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self._staged = []
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def add(self, relpath, content):
+        """
+        Stage a generated file.
+
+        :param relpath: The path of the file relative to the build base
+        :param content: The text content of the file
+        :returns: The path the file will have once committed
+        """
+        staged_path = os.path.join(self.staging_dir, relpath)
+        os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+        with open(staged_path, 'w') as h:
+            h.write(content)
+        with self._lock:
+            self._staged.append(relpath)
+        return os.path.join(self.build_base, relpath)
+
+    def flush(self, path):
+        """Staged files are written when they are added."""
+        pass
+
+    def keep(self, relpath):
+        """Record an existing file which is still up to date."""
+        with self._lock:
+            self.unchanged += 1
+
+    def remove(self, relpath):
+        """Mark a previously generated file as stale."""
+        with self._lock:
+            self._stale.add(relpath)
+
+    def commit(self):
+        """Move the changed files into place and remove stale files."""
+        staged = set(self._staged)
+        for relpath in sorted(staged):
+            staged_path = os.path.join(self.staging_dir, relpath)
+            path = os.path.join(self.build_base, relpath)
+            old_digest = _file_digest(path)
+            if old_digest == _file_digest(staged_path):
+                self.unchanged += 1
+                os.remove(staged_path)
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(staged_path, path)
+            if old_digest is None:
+                self.added += 1
+            else:
+                self.changed += 1
+
+        for relpath in sorted(self._stale - staged):
+            path = os.path.join(self.build_base, relpath)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self.removed += 1
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                # the directory is not empty
+                pass
+
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self._staged = []
+        self._stale = set()
+
+    def close(self):
+        """Remove the staged files if they were not committed."""
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self._staged = []
+        self._stale = set()
+
+    def get_summary(self):
+        """Return a one line summary of the committed changes."""
+        return (
+            f'Recipes: {self.added} added, {self.changed} changed, '
+            f'{self.unchanged} unchanged, {self.removed} removed')
@@ -12,22 +12,57 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from catkin_pkg.package import parse_package_string
+import copy
+import functools
 import hashlib
+import threading
+
+from mash.DependencyResolver import DEPENDENCY_CATEGORIES
+
+"""Serializes the condition parser, which is not thread-safe"""
+_condition_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def evaluate_condition(condition, context_items):
+    """
+    Evaluate the condition attribute of a manifest element.
+
+    Parsing a condition is slow while manifests only use a few different
+    ones, so the results are memoized.  The pyparsing grammar of catkin_pkg
+    sets up its parse actions on first use, which fails when several
+    threads do it at the same time, so only one condition is evaluated at
+    a time.
+
+    :param context_items: The sorted items of the condition context
+    """
+    from catkin_pkg.condition import evaluate_condition
+    with _condition_lock:
+        return evaluate_condition(condition, dict(context_items))
 
 
 class PackageMetadata:
+    # Only the fields needed to render a recipe are kept, the dependencies
+    # as plain names instead of catkin_pkg objects
+    __slots__ = (
+        'upstream_email', 'upstream_name', 'homepage', 'name', 'version',
+        'description', 'upstream_license', 'license_line', 'license_md5',
+        'longdescription', 'author_email', 'author_name',
+        'member_of_groups', 'build_type', 'build_depends',
+        'buildtool_depends', 'build_export_depends',
+        'buildtool_export_depends', 'exec_depends', 'run_depends',
+        'test_depends', 'doc_depends', 'dependency_conditions',
+    )
+
     def __init__(self, pkg_xml, evaluate_condition_context=None):
         # Set defaults
         self.upstream_email = None
         self.upstream_name = None
         self.homepage = 'https://wiki.ros.org'
 
+        from catkin_pkg.package import parse_package_string
         pkg = parse_package_string(pkg_xml)
 
-        if evaluate_condition_context:
-            pkg.evaluate_conditions(evaluate_condition_context)
-
         self.name = pkg.name
         self.version = pkg.version
         self.description = pkg.description
@@ -74,11 +109,39 @@ class PackageMetadata:
         ]
         self.build_type = pkg.get_build_type()
 
-        self.build_depends = pkg.build_depends
-        self.buildtool_depends = pkg.buildtool_depends
-        self.build_export_depends = pkg.build_export_depends
-        self.buildtool_export_depends = pkg.buildtool_export_depends
-        self.exec_depends = pkg.exec_depends
-        self.run_depends = pkg.run_depends
-        self.test_depends = pkg.test_depends
-        self.doc_depends = pkg.doc_depends
+        # The conditions are kept so that the same manifest can be evaluated
+        # for several distributions without parsing it again
+        self.dependency_conditions = {}
+        for attribute in DEPENDENCY_CATEGORIES:
+            dependencies = getattr(pkg, attribute)
+            setattr(self, attribute, _names(dependencies))
+            if any(dep.condition for dep in dependencies):
+                self.dependency_conditions[attribute] = tuple(
+                    dep.condition for dep in dependencies)
+
+        if evaluate_condition_context:
+            self.evaluate_conditions(evaluate_condition_context, inplace=True)
+
+    def evaluate_conditions(self, context, inplace=False):
+        """
+        Drop the dependencies whose condition is false in a context.
+
+        :param context: The condition context, e.g. ROS_VERSION and
+          ROS_DISTRO of a distribution
+        :param inplace: Change this instance instead of returning a copy
+        :returns: The metadata with only the applicable dependencies
+        """
+        metadata = self if inplace else copy.copy(self)
+        context_items = tuple(sorted(context.items()))
+        for attribute, conditions in self.dependency_conditions.items():
+            setattr(metadata, attribute, tuple(
+                name for name, condition
+                in zip(getattr(self, attribute), conditions)
+                if not condition or
+                evaluate_condition(condition, context_items)))
+        metadata.dependency_conditions = {}
+        return metadata
+
+
+def _names(dependencies):
+    return tuple(dep.name for dep in dependencies)
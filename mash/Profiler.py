@@ -0,0 +1,189 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import contextlib
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+
+
+class Timer:
+    """The wall and CPU time of a measured phase in seconds."""
+
+    __slots__ = ('wall', 'cpu')
+
+    def __init__(self):  # noqa: D107
+        self.wall = 0.0
+        self.cpu = 0.0
+
+
+class Profiler:
+    """
+    Accumulate the time spent in the phases of a run.
+
+    Phases are always measured so that callers can use the returned
+    :class:`Timer`, they are only recorded while the profiler is enabled.
+    The CPU time is the time of the calling thread.
+    """
+
+    def __init__(self):  # noqa: D107
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._cprofile = False
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded phases and :mod:`cProfile` statistics."""
+        with self._lock:
+            self._phases = {}
+            self._packages = {}
+            self._cprofiles = None
+
+    def enable(self, cprofile=False, tracemalloc_frames=0):
+        """
+        Start recording phases.
+
+        :param cprofile: Also run :mod:`cProfile` in this thread and every
+          thread calling :meth:`start_thread`
+        :param tracemalloc_frames: The number of frames stored by
+          :mod:`tracemalloc`, 0 to not trace memory allocations
+        """
+        self.enabled = True
+        if cprofile:
+            self._cprofiles = []
+            self._cprofile = True
+            self.start_thread()
+        if tracemalloc_frames:
+            tracemalloc.start(tracemalloc_frames)
+
+    def disable(self):
+        """Stop recording phases and :mod:`cProfile` in all threads."""
+        self.enabled = False
+        with self._lock:
+            self._cprofile = False
+            profiles = list(self._cprofiles or [])
+        for profile in profiles:
+            profile.disable()
+
+    def start_thread(self):
+        """Start :mod:`cProfile` in the calling thread if requested."""
+        with self._lock:
+            if not self._cprofile:
+                return
+            profile = cProfile.Profile()
+            self._cprofiles.append(profile)
+        profile.enable()
+
+    def dump_cprofile(self, path):
+        """Write the merged :mod:`cProfile` statistics of all threads."""
+        if not self._cprofiles:
+            return
+        pstats.Stats(*self._cprofiles).dump_stats(path)
+
+    def dump_tracemalloc(self, path):
+        """Write a :mod:`tracemalloc` snapshot and stop tracing."""
+        if not tracemalloc.is_tracing():
+            return
+        tracemalloc.take_snapshot().dump(path)
+        tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name, package=None):
+        """
+        Measure a phase of the run.
+
+        :param name: The name of the phase
+        :param package: The name of the package the phase belongs to
+        :returns: A context manager yielding the :class:`Timer`
+        """
+        timer = Timer()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield timer
+        finally:
+            timer.wall = time.perf_counter() - wall_start
+            timer.cpu = time.thread_time() - cpu_start
+            if self.enabled:
+                self.add(name, timer.wall, timer.cpu, package)
+
+    def add(self, name, wall, cpu, package=None):
+        """Record a measured phase."""
+        with self._lock:
+            stats = self._phases.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += wall
+            stats[2] += cpu
+            if package is not None:
+                phases = self._packages.setdefault(package, {})
+                phases[name] = phases.get(name, 0.0) + wall
+
+    def get_phases(self):
+        """
+        Get the statistics of all phases.
+
+        :returns: A dictionary mapping the phase names to dictionaries with
+          the number of ``calls`` and the total ``wall`` and ``cpu`` time
+        """
+        with self._lock:
+            return {
+                name: {'calls': calls, 'wall': wall, 'cpu': cpu}
+                for name, (calls, wall, cpu) in self._phases.items()}
+
+    def get_packages(self):
+        """
+        Get the wall time per phase of all packages.
+
+        :returns: A dictionary mapping the package names to dictionaries
+          mapping the phase names to the wall time
+        """
+        with self._lock:
+            return {
+                name: dict(phases) for name, phases in self._packages.items()}
+
+    def get_slowest_packages(self, count):
+        """Get the names and total wall time of the slowest packages."""
+        totals = [
+            (sum(phases.values()), name)
+            for name, phases in self.get_packages().items()]
+        totals.sort(key=lambda total: (-total[0], total[1]))
+        return [(name, wall) for wall, name in totals[:count]]
+
+    def format_report(self, slowest=10):
+        """
+        Format the recorded statistics as a table.
+
+        :param slowest: The number of slowest packages to list
+        :returns: The lines of the report
+        """
+        lines = [f"{'Phase':<30}\t{'Calls':>8}\t{'Wall':>10}\t{'CPU':>10}"]
+        phases = self.get_phases()
+        for name in sorted(phases, key=lambda name: -phases[name]['wall']):
+            stats = phases[name]
+            lines.append(
+                f"{name:<30}\t{stats['calls']:>8}\t"
+                f"{stats['wall']:>10.3f}\t{stats['cpu']:>10.3f}")
+
+        slowest_packages = self.get_slowest_packages(slowest)
+        if slowest_packages:
+            packages = self.get_packages()
+            lines.append('')
+            lines.append(f"{'Slowest package':<30}\t{'Wall':>10}\tPhases")
+            for name, wall in slowest_packages:
+                phases = ', '.join(
+                    f'{phase} {duration:.3f}'
+                    for phase, duration in sorted(
+                        packages[name].items(), key=lambda item: -item[1]))
+                lines.append(f'{name:<30}\t{wall:>10.3f}\t{phases}')
+        return lines
+
+
+"""The profiler shared by all parts of mash"""
+_profiler = Profiler()
+
+
+def get_profiler():
+    """Get the profiler shared by all parts of mash."""
+    return _profiler
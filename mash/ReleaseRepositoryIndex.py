@@ -0,0 +1,209 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import json
+import os
+from pathlib import Path
+import subprocess
+
+from colcon_core.location import get_config_path
+from mash.RepositoryIndex import format_src_uri
+from mash.RepositoryIndex import RepositoryInfo
+from mash.RepositoryIndex import RepositoryUnavailable
+
+"""Version of the on-disk release tag cache format"""
+RELEASE_TAGS_FORMAT_VERSION = 1
+
+"""Seconds to wait for a release repository to list its tags"""
+LS_REMOTE_TIMEOUT = 120
+
+
+class ReleaseTagUnavailable(RepositoryUnavailable):
+    """Raised when the commit of a release tag cannot be determined."""
+
+
+def get_release_tags_path():
+    """Return the path of the cache of resolved release tags in MASH_HOME."""
+    return Path(get_config_path()) / 'cache' / 'release_tags.json'
+
+
+def get_release_tag(repository, pkg_name):
+    """
+    Get the tag of a package in the release repository of a snapshot.
+
+    :param repository: The release data of a repository in the snapshot
+    :param pkg_name: The name of the package
+    :returns: The tag name or None if the package is not versioned
+    """
+    version = repository.get('version')
+    template = (repository.get('tags') or {}).get('release')
+    if not version or not template:
+        return None
+    return template.format(package=pkg_name, version=version)
+
+
+def ls_remote_tags(url, tags):
+    """
+    List the commits of tags in a remote repository.
+
+    Annotated tags are peeled to the commit they point to.
+
+    :param url: The URL of the repository
+    :param tags: The names of the tags
+    :returns: A dictionary mapping the found tags to their commit
+    :raises: :exc:`ReleaseTagUnavailable` if the repository cannot be read
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'ls-remote', '--tags', url,
+             *(f'refs/tags/{tag}' for tag in tags)],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+            timeout=LS_REMOTE_TIMEOUT,
+            env={**os.environ, 'GIT_TERMINAL_PROMPT': '0'})
+    except subprocess.CalledProcessError as e:
+        raise ReleaseTagUnavailable(
+            f"Could not list the tags of '{url}': "
+            f"{e.stderr.decode('utf-8', 'replace').strip()}")
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ReleaseTagUnavailable(
+            f"Could not list the tags of '{url}': {e}")
+
+    commits = {}
+    peeled = {}
+    for line in result.stdout.decode('utf-8').splitlines():
+        sha, _, ref = line.partition('\t')
+        if not ref.startswith('refs/tags/'):
+            continue
+        name = ref[len('refs/tags/'):]
+        if name.endswith('^{}'):
+            peeled[name[:-3]] = sha
+        else:
+            commits[name] = sha
+    commits.update(peeled)
+    return {tag: commits[tag] for tag in tags if tag in commits}
+
+
+class ReleaseRepositoryInfo(RepositoryInfo):
+    """The git metadata of a package in its release repository."""
+
+    def __init__(self, repo_name, pkg_name, release, srcrev):  # noqa: D107
+        super().__init__(repo_name)
+        self.src_uri = format_src_uri(release['url'])
+        self.tag_name = get_release_tag(release, pkg_name)
+        # bloom keeps the latest release of each package on this branch
+        self.branch = self.tag_name.rsplit('/', 1)[0]
+        self.srcrev = srcrev
+
+    def get_package_path(self, pkg_path):
+        """Return the path of the package, the root of its release tag."""
+        return ''
+
+
+class ReleaseRepositoryIndex:
+    """
+    Index of the release repositories of the packages of a distribution.
+
+    It has the interface of :class:`RepositoryIndex` with the package paths
+    of the descriptors created from the distribution cache.
+    The commits of the release tags are listed once per release repository
+    and cached in MASH_HOME since released tags do not change.
+    """
+
+    def __init__(self, snapshot, offline=False):
+        """
+        Create an index of the release repositories of a snapshot.
+
+        :param snapshot: The rosdistro snapshot
+        :param offline: Only use the cached release tags
+        """
+        self.snapshot = snapshot
+        self.offline = offline
+        self._errors = {}
+        self._tags = {}
+        try:
+            with open(get_release_tags_path(), 'r') as h:
+                data = json.load(h)
+        except (OSError, ValueError):
+            return
+        if data.get('format') == RELEASE_TAGS_FORMAT_VERSION:
+            self._tags = data.get('tags', {})
+
+    def _get_release(self, pkg_name):
+        repo_name = self.snapshot['package_repositories'].get(pkg_name)
+        if repo_name is None:
+            return None, None
+        repository = self.snapshot['repositories'][repo_name]
+        return repo_name, repository.get('release')
+
+    def scan(self, pkg_paths, executor=None):
+        """
+        Resolve the release tags of many packages up front.
+
+        :param pkg_paths: The paths of the package descriptors
+        :param executor: An optional :class:`concurrent.futures.Executor` to
+          query the release repositories concurrently
+        """
+        missing = {}
+        for pkg_path in pkg_paths:
+            pkg_name = Path(pkg_path).name
+            _, release = self._get_release(pkg_name)
+            if release is None:
+                continue
+            tag = get_release_tag(release, pkg_name)
+            if tag and tag not in self._tags.get(release['url'], {}):
+                missing.setdefault(release['url'], []).append(tag)
+        if not missing or self.offline:
+            return
+
+        def resolve(url):
+            try:
+                return ls_remote_tags(url, missing[url])
+            except ReleaseTagUnavailable as e:
+                return e
+
+        urls = sorted(missing)
+        results = (executor.map if executor else map)(resolve, urls)
+        for url, result in zip(urls, list(results)):
+            if isinstance(result, Exception):
+                self._errors[url] = result
+            else:
+                self._tags.setdefault(url, {}).update(result)
+        self.save()
+
+    def save(self):
+        """Write the cache of resolved release tags atomically."""
+        path = get_release_tags_path()
+        os.makedirs(path.parent, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as h:
+            json.dump({
+                'format': RELEASE_TAGS_FORMAT_VERSION,
+                'tags': self._tags,
+            }, h, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def get_repository(self, pkg_path):
+        """
+        Get the release repository metadata of a package.
+
+        :returns: The :class:`ReleaseRepositoryInfo` instance
+        :raises: :exc:`ReleaseTagUnavailable` if the package has no release
+          tag or its commit is unknown
+        """
+        pkg_name = Path(pkg_path).name
+        repo_name, release = self._get_release(pkg_name)
+        if release is None or not get_release_tag(release, pkg_name):
+            raise ReleaseTagUnavailable(
+                f"Package '{pkg_name}' has no release tag")
+        tag = get_release_tag(release, pkg_name)
+        srcrev = self._tags.get(release['url'], {}).get(tag)
+        if srcrev is None:
+            if release['url'] in self._errors:
+                raise self._errors[release['url']]
+            if self.offline:
+                raise ReleaseTagUnavailable(
+                    f"Release tag '{tag}' of '{release['url']}' is not "
+                    'cached and mash is offline')
+            raise ReleaseTagUnavailable(
+                f"Release tag '{tag}' not found in '{release['url']}'")
+        return ReleaseRepositoryInfo(repo_name, pkg_name, release, srcrev)
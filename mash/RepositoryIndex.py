@@ -0,0 +1,292 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import copy
+import os
+from pathlib import Path
+import re
+import threading
+from urllib.parse import urlparse
+
+from mash.GitRefReader import GitRefReader
+from mash.GitRefReader import UnsupportedRepository
+
+
+def is_scp_url_format(url: str) -> bool:
+    """
+    Determine if the Git remote URL is in SCP format.
+
+    https://www.rfc-editor.org/rfc/rfc3986
+
+    This is a simplified regex to check for the non-standard
+    user@host:/path format. It accepts with and without a username.
+
+    If a scheme (ie. protocol) is found then return false
+    """
+    if re.match(r'^[A-Za-z0-9]+://', url):
+        return False
+
+    return bool(re.match(r'^([^@/:]+@)?[^@/:]+:.*$', url))
+
+
+def format_src_uri(uri):
+    """Convert a Git remote URL into a BitBake SRC_URI."""
+    if uri.startswith('/') and not uri.startswith('//'):
+        uri = 'file://' + uri
+
+    if is_scp_url_format(uri):
+        user_host, path = uri.split(':', 1)
+        if not path.startswith('/'):
+            path = '/' + path
+        uri = f'ssh://{user_host}{path}'
+
+    p = urlparse(uri)
+    if p.username:
+        protocol = 'ssh'
+    else:
+        protocol = p.scheme
+    return f'git://{p.netloc}{p.path};${{ROS_BRANCH}};protocol={protocol}'
+
+
+class RepositoryUnavailable(Exception):
+    """Raised when the git metadata of a package cannot be determined."""
+
+
+class RepositoryInfo:
+    """The git metadata of a working tree shared by all of its packages."""
+
+    def __init__(self, path):  # noqa: D107
+        self.path = path
+        self.repo_name = os.path.split(path)[-1]
+        self.src_uri = None
+        self.branch = None
+        self.srcrev = None
+        self.tag_name = None
+        # The branches containing a detached HEAD to select the branch from
+        self.branches = None
+
+    def get_package_path(self, pkg_path):
+        """Return the path of a package relative to the working tree."""
+        git_relpath = os.path.relpath(
+            Path(pkg_path).resolve(), start=self.path)
+        if git_relpath == '.':
+            return ''
+        return '/' + git_relpath
+
+
+class RepositoryIndex:
+    """
+    Index of the git working trees containing the packages of a workspace.
+
+    Each working tree is only located and inspected once, packages are
+    mapped to their working tree by path prefix.
+    """
+
+    def __init__(self, rosdistro=None):
+        """
+        Create an empty index.
+
+        :param rosdistro: The name of the ROS distribution, used to select
+          the branch of a detached HEAD
+        """
+        self.rosdistro = rosdistro
+        self._roots = {}
+        self._repositories = {}
+        self._lock = threading.Lock()
+
+    def with_rosdistro(self, rosdistro):
+        """
+        Create an index for another rosdistro sharing the inspected trees.
+
+        Only the branch of a detached HEAD depends on the rosdistro, it is
+        selected again from the branches containing it.
+        """
+        index = RepositoryIndex(rosdistro)
+        with self._lock:
+            index._roots = dict(self._roots)
+            for root, info in self._repositories.items():
+                if isinstance(info, RepositoryInfo) and \
+                        info.branches is not None:
+                    info = copy.copy(info)
+                    info.branch = select_branch(info.branches, rosdistro)
+                index._repositories[root] = info
+        return index
+
+    def find_working_tree(self, path):
+        """
+        Find the root of the git working tree containing a path.
+
+        :returns: The resolved path of the working tree or None
+        """
+        path = Path(path).resolve()
+        visited = []
+        root = None
+        for candidate in [path, *path.parents]:
+            candidate = str(candidate)
+            if candidate in self._roots:
+                root = self._roots[candidate]
+                break
+            visited.append(candidate)
+            if os.path.exists(os.path.join(candidate, '.git')):
+                root = candidate
+                break
+        for candidate in visited:
+            self._roots[candidate] = root
+        return root
+
+    def get_repository(self, pkg_path):
+        """
+        Get the git metadata of the working tree containing a package.
+
+        :returns: The :class:`RepositoryInfo` instance
+        :raises: :exc:`RepositoryUnavailable` if the package is not part of
+          a git working tree or the repository cannot be read
+        """
+        with self._lock:
+            root = self.find_working_tree(pkg_path)
+            if root is None:
+                raise RepositoryUnavailable(
+                    f"'{pkg_path}' is not in a git working tree")
+            if root not in self._repositories:
+                self._repositories[root] = self._inspect_or_error(root)
+            info = self._repositories[root]
+        if isinstance(info, Exception):
+            raise info
+        return info
+
+    def scan(self, pkg_paths, executor=None):
+        """
+        Locate and inspect the working trees of many packages up front.
+
+        :param pkg_paths: The paths of the packages
+        :param executor: An optional :class:`concurrent.futures.Executor` to
+          inspect the working trees concurrently
+        """
+        roots = []
+        with self._lock:
+            for pkg_path in pkg_paths:
+                root = self.find_working_tree(pkg_path)
+                if root is not None and root not in self._repositories \
+                        and root not in roots:
+                    roots.append(root)
+        infos = (executor.map if executor else map)(
+            self._inspect_or_error, roots)
+        for root, info in zip(roots, list(infos)):
+            with self._lock:
+                self._repositories.setdefault(root, info)
+
+    def invalidate(self, root):
+        """Forget the git metadata of a working tree to inspect it again."""
+        with self._lock:
+            self._repositories.pop(root, None)
+
+    def _inspect_or_error(self, root):
+        try:
+            return self._inspect(root)
+        except RepositoryUnavailable as e:
+            return e
+
+    @property
+    def repositories(self):
+        """Return the successfully inspected repositories by path."""
+        return {
+            path: info for path, info in self._repositories.items()
+            if isinstance(info, RepositoryInfo)}
+
+    def _inspect(self, root):
+        try:
+            return self._inspect_refs(root)
+        except (OSError, ValueError, UnsupportedRepository):
+            pass
+        # GitPython is only imported for repositories GitRefReader cannot read
+        from git import GitError
+        try:
+            return self._inspect_repo(root)
+        except (GitError, OSError, ValueError) as e:
+            raise RepositoryUnavailable(str(e)) from e
+
+    def _inspect_refs(self, root):
+        # Read the repository in-process without spawning git
+        reader = GitRefReader(root)
+        info = RepositoryInfo(root)
+
+        urls = reader.get_remote_urls()
+        if 'origin' in urls:
+            info.src_uri = format_src_uri(urls['origin'])
+        elif urls:
+            info.src_uri = format_src_uri(next(iter(urls.values())))
+
+        info.srcrev, info.branch = reader.read_head()
+        if info.branch is None:
+            info.branches = reader.branches_containing(info.srcrev)
+            info.branch = select_branch(info.branches, self.rosdistro)
+
+        info.tag_name = reader.nearest_tag(info.srcrev)
+
+        return info
+
+    def _inspect_repo(self, root):
+        from git import GitCommandError
+        from git import Repo
+
+        repo = Repo(root)
+        info = RepositoryInfo(str(Path(repo.working_tree_dir).resolve()))
+
+        try:
+            # Use origin remote
+            info.src_uri = format_src_uri(repo.remotes.origin.url)
+        except Exception:  # noqa: B902
+            # Fallback to first remote
+            if repo.remotes:
+                info.src_uri = format_src_uri(repo.remotes[0].url)
+
+        try:
+            info.branch = repo.active_branch.name
+        except Exception:  # noqa: B902
+            info.branches = self._find_branches(repo)
+            info.branch = select_branch(info.branches, self.rosdistro)
+
+        # Get the current commit hash
+        info.srcrev = repo.head.commit.hexsha
+
+        try:
+            info.tag_name = repo.git.describe('--tags', '--abbrev=0')
+        except GitCommandError:
+            info.tag_name = None
+
+        return info
+
+    def _find_branches(self, repo):
+        branches = []
+        # Check local branches that contain the current commit
+        for head in repo.heads:
+            if repo.is_ancestor(repo.head.commit, head.commit):
+                branches.append(head.name)
+
+        # Check remote branches that contain the current commit
+        for remote in repo.remotes:
+            for ref in remote.refs:
+                # Skip symbolic refs like origin/HEAD
+                if ref.name.endswith('/HEAD'):
+                    continue
+                if repo.is_ancestor(repo.head.commit, ref.commit):
+                    branches.append(ref.name)
+
+        return branches
+
+
+def select_branch(branches, rosdistro):
+    """Select a branch based on the rosdistro or common defaults."""
+    # Remove duplicates
+    unique_branches = sorted(set(branches))
+
+    if len(unique_branches) > 0:
+        if f'origin/{rosdistro}' in unique_branches:
+            return rosdistro
+        elif 'main' in unique_branches:
+            return 'main'
+        elif 'master' in unique_branches:
+            return 'master'
+        else:
+            return unique_branches[0].removeprefix('origin/')
+    return None
@@ -1,37 +1,318 @@
+# Copyright 2025 Wind River Systems, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import re
+
+from mash.spdx_license_list import DEPRECATED_LICENSE_IDS
+from mash.spdx_license_list import EXCEPTION_IDS
+from mash.spdx_license_list import LICENSE_IDS
+
+"""License strings of ROS package manifests which are not SPDX identifiers"""
 license_map = {
     'Apache 2.0': 'Apache-2.0',
     'Apache-2.0': 'Apache-2.0',
     'Apache 2.0 License': 'Apache-2.0',
     'Apache License 2.0': 'Apache-2.0',
+    'Apache': 'Apache-2.0',
+    'ASL 2.0': 'Apache-2.0',
+    'BSD': 'BSD-3-Clause',
+    'BSD-3': 'BSD-3-Clause',
+    '3-Clause BSD': 'BSD-3-Clause',
+    'New BSD': 'BSD-3-Clause',
+    'Modified BSD': 'BSD-3-Clause',
     'BSD-3-Clause': 'BSD-3-Clause',
+    'BSD-2': 'BSD-2-Clause',
+    '2-Clause BSD': 'BSD-2-Clause',
+    'Simplified BSD': 'BSD-2-Clause',
+    'FreeBSD': 'BSD-2-Clause',
+    'Boost': 'BSL-1.0',
+    'Boost Software License': 'BSL-1.0',
+    'Boost Software License 1.0': 'BSL-1.0',
+    'CC0': 'CC0-1.0',
     'Eclipse Distribution License 1.0': 'EDL-1.0',
+    'Eclipse Public License 1.0': 'EPL-1.0',
     'Eclipse Public License 2.0': 'EPL-2.0',
     'GNU General Public License v2.0': 'GPL-2.0-only',
+    'GNU General Public License v3.0': 'GPL-3.0-only',
+    'GNU Lesser General Public License v2.1': 'LGPL-2.1-only',
+    'GNU Lesser General Public License v3.0': 'LGPL-3.0-only',
     'LGPL-2.1-or-later': 'LGPL-2.1-or-later',
-    'MIT': 'MIT'
+    'MIT': 'MIT',
+    'Mozilla Public License 2.0': 'MPL-2.0',
+    'Public Domain': 'PD',
+    'Python': 'PSF-2.0',
 }
 
+"""Aliases which name no version or variant, their identifier is a guess"""
+guessed_licenses = ('Apache', 'BSD')
+
+"""Separators ignored when comparing license strings"""
+_SEPARATORS = re.compile(r'[\s_,;:/()-]+')
+
+"""The operators, parentheses and list separators of license expressions"""
+_EXPRESSION_TOKENS = re.compile(
+    r'(\(|\)|,(?!\s*(?i:version)\b)'
+    r'|(?<!\S)(?i:and|or(?!\s+later\b)|with)(?!\S))')
+
+"""The BitBake operators of the SPDX operators"""
+_BITBAKE_OPERATORS = {'AND': ' & ', 'OR': ' | '}
+
+
+def _get_lookup_key(license_str):
+    # Ignore case, filler words, separators and trailing .0 of versions, so
+    # that e.g. "Apache License, Version 2.0" and "apache-2" or "GNU GPL v3"
+    # and "GPL-3.0" are the same
+    key = license_str.lower()
+    key = re.sub(r'\b(the|gnu|license|licence|version)\b', '', key)
+    key = re.sub(r'(\b|(?<=[a-z]))v(?=\d)', '', key)
+    key = re.sub(r'\.0(?!\d)', '', key)
+    return _SEPARATORS.sub('', key)
+
+
+def _get_current_id(deprecated_id):
+    # The GNU licenses without -only or -or-later are deprecated
+    match = re.match(r'^(A?L?GPL|GFDL)-(\d\.\d)(\+?)$', deprecated_id)
+    if match is None:
+        return deprecated_id
+    suffix = '-or-later' if match.group(3) else '-only'
+    return f'{match.group(1)}-{match.group(2)}{suffix}'
+
+
+def _create_lookup(ids, aliases):
+    # Exact identifiers ignoring case take precedence over the aliases and
+    # the lookup keys, keys matching several identifiers are left out
+    by_lower = {}
+    by_key = {}
+    ambiguous = set()
+    for name, spdx_id in [*aliases, *((spdx_id, spdx_id) for spdx_id in ids)]:
+        by_lower.setdefault(name.lower(), spdx_id)
+        key = _get_lookup_key(name)
+        if by_key.setdefault(key, spdx_id) != spdx_id:
+            ambiguous.add(key)
+    for key in ambiguous:
+        del by_key[key]
+    return by_lower, by_key
+
+
+@functools.lru_cache(maxsize=None)
+def _get_license_lookup():
+    # Created on first use only, it is not needed if all recipes are up to
+    # date
+    return _create_lookup(LICENSE_IDS, [
+        *license_map.items(),
+        *((spdx_id, _get_current_id(spdx_id))
+          for spdx_id in DEPRECATED_LICENSE_IDS)])
+
+
+@functools.lru_cache(maxsize=None)
+def _get_exception_lookup():
+    return _create_lookup(EXCEPTION_IDS, [])
+
+
+_SPDX_IDS = frozenset(LICENSE_IDS) | frozenset(license_map.values())
+
+
 def is_spdx_license(license_str):
-    """Check if a license string is a valid SPDX identifier.
+    """Check if a license string is a valid SPDX identifier."""
+    return license_str in _SPDX_IDS
+
+
+def map_license(license_str):
+    """
+    Map a license string to an SPDX identifier.
 
-    This is a very simple check that just checks if the license string
-    is in the license_map values or contains only valid characters.
+    :returns: The identifier or an empty string if it is not known
     """
-    is_spdx = False
+    return normalize_license(license_str) or ''
 
-    if license_str in license_map.values():
-        is_spdx = True
 
-    return is_spdx
+@functools.lru_cache(maxsize=None)
+def normalize_license(license_str):
+    """
+    Get the SPDX identifier of a single license.
+
+    Deprecated identifiers are replaced by their current ones, e.g.
+    ``GPL-2.0+`` by ``GPL-2.0-or-later``.
+
+    :returns: The identifier or None if the license is not known
+    """
+    by_lower, by_key = _get_license_lookup()
+    license_str = license_str.strip()
+    spdx_id = by_lower.get(license_str.lower())
+    if spdx_id is None:
+        spdx_id = by_key.get(_get_lookup_key(license_str))
+    return spdx_id
 
-def map_license(license_str):
-    """Map a license string to an SPDX identifier.
 
-    If the license string is not in the license_map, it is returned as-is.
+def normalize_exception(exception_str):
+    """Get the SPDX identifier of a license exception or None."""
+    by_lower, by_key = _get_exception_lookup()
+    exception_str = exception_str.strip()
+    exception_id = by_lower.get(exception_str.lower())
+    if exception_id is None:
+        exception_id = by_key.get(_get_lookup_key(exception_str))
+    return exception_id
+
+
+def _split_license_expression(expression):
+    # Manifests often join licenses with lowercase operators or commas, a
+    # comma is AND unless an operator follows it
+    tokens = []
+    for token in _EXPRESSION_TOKENS.split(expression):
+        token = token.strip()
+        if token.upper() in ('AND', 'OR', 'WITH'):
+            token = token.upper()
+            if tokens and tokens[-1] == ',':
+                tokens.pop()
+        if token:
+            tokens.append(token)
+    return ['AND' if token == ',' else token for token in tokens]
+
+
+def parse_license_expression(expression):
     """
-    license_found = ""
+    Parse an SPDX license expression.
+
+    Licenses and exceptions are normalized, unknown ones are kept as they
+    are.  WITH binds tighter than AND, which binds tighter than OR.  The
+    operators may be lowercase and a list of licenses separated by commas
+    is combined with AND.
+
+    :param expression: The expression, e.g. ``BSD OR Apache 2.0``
+    :returns: The license identifier, a ``('WITH', license, exception)``
+      tuple or an ``('AND', operand, ...)`` or ``('OR', operand, ...)``
+      tuple
+    :raises: :exc:`ValueError` if the expression is invalid
+    """
+    tokens = _split_license_expression(expression)
+    pos = 0
+
+    def parse_operation(operator, parse_operand):
+        nonlocal pos
+        operands = [parse_operand()]
+        while pos < len(tokens) and tokens[pos] == operator:
+            pos += 1
+            operands.append(parse_operand())
+        return operands[0] if len(operands) == 1 else (operator, *operands)
 
-    if license_str in license_map.keys():
-        license_found = license_map[license_str]
+    def parse_or():
+        return parse_operation('OR', parse_and)
+
+    def parse_and():
+        return parse_operation('AND', parse_with)
+
+    def parse_with():
+        nonlocal pos
+        operand = parse_primary()
+        if pos < len(tokens) and tokens[pos] == 'WITH':
+            if pos + 1 == len(tokens) or \
+                    tokens[pos + 1] in ('(', ')', 'AND', 'OR', 'WITH'):
+                raise ValueError(f"Missing exception in '{expression}'")
+            exception = tokens[pos + 1]
+            pos += 2
+            operand = (
+                'WITH', operand, normalize_exception(exception) or exception)
+        return operand
+
+    def parse_primary():
+        nonlocal pos
+        if pos == len(tokens):
+            raise ValueError(f"Unexpected end of '{expression}'")
+        token = tokens[pos]
+        pos += 1
+        if token == '(':
+            operand = parse_or()
+            if pos == len(tokens) or tokens[pos] != ')':
+                raise ValueError(f"Unbalanced parentheses in '{expression}'")
+            pos += 1
+            return operand
+        if token in (')', 'AND', 'OR', 'WITH'):
+            raise ValueError(f"Unexpected '{token}' in '{expression}'")
+        return normalize_license(token) or token
+
+    node = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"Unexpected '{tokens[pos]}' in '{expression}'")
+    return node
+
+
+def format_bitbake_license(node, parent=None):
+    """
+    Format a parsed license expression for the LICENSE of a recipe.
 
-    return license_found
\ No newline at end of file
+    BitBake has no exceptions, as in OpenEmbedded a license with an
+    exception is written as both of them.
+
+    :param node: The result of :func:`parse_license_expression`
+    :param parent: The operator of the enclosing expression
+    """
+    if isinstance(node, str):
+        return node
+    operator, *operands = node
+    if operator == 'WITH':
+        operator = 'AND'
+    text = _BITBAKE_OPERATORS[operator].join(
+        format_bitbake_license(operand, operator) for operand in operands)
+    if parent is not None and parent != operator:
+        text = f'({text})'
+    return text
+
+
+@functools.lru_cache(maxsize=None)
+def convert_license(license_str, nested=False):
+    """
+    Convert the license of a package manifest to a BitBake expression.
+
+    A single license is looked up as a whole first, so that names which
+    contain an operator word are not split.  Expressions which cannot be
+    parsed are kept as they are.
+
+    :param license_str: The content of a license tag
+    :param nested: The expression is combined with others using AND, so
+      put it in parentheses if needed
+    """
+    spdx_id = normalize_license(license_str)
+    if spdx_id is not None:
+        return spdx_id
+    try:
+        node = parse_license_expression(license_str)
+    except ValueError:
+        return license_str.strip()
+    return format_bitbake_license(node, 'AND' if nested else None)
+
+
+@functools.lru_cache(maxsize=None)
+def get_guessed_licenses(license_str):
+    """
+    Get the licenses of a manifest whose identifier was guessed.
+
+    Names like ``BSD`` have no version or variant, they are mapped to the
+    most common one, e.g. ``BSD-3-Clause``, which needs to be checked.
+
+    :param license_str: The content of a license tag
+    :returns: The list of ``(license, identifier)`` pairs
+    """
+    if normalize_license(license_str) is not None:
+        names = [license_str.strip()]
+    else:
+        try:
+            parse_license_expression(license_str)
+        except ValueError:
+            return []
+        names = _split_license_expression(license_str)
+    guessed_keys = {_get_lookup_key(name) for name in guessed_licenses}
+    return [
+        (name, normalize_license(name)) for name in names
+        if _get_lookup_key(name) in guessed_keys]
@@ -0,0 +1,64 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+
+
+def parse_shard(value):
+    """
+    Parse the argument of --shard.
+
+    :param value: The 1-based index and the number of shards, e.g. ``2/4``
+    :returns: A tuple of the index and the number of shards
+    :raises: :exc:`argparse.ArgumentTypeError` if the value is invalid
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is not of the form INDEX/COUNT")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"'{value}' is not a shard index between 1 and the number of "
+            'shards')
+    return index, count
+
+
+def format_shard(shard):
+    """Format a shard tuple as INDEX/COUNT."""
+    return f'{shard[0]}/{shard[1]}'
+
+
+def assign_shards(packages, count, get_group):
+    """
+    Split packages into shards keeping the packages of a group together.
+
+    The groups are assigned from the largest to the smallest to the shard
+    with the fewest packages so far, ties are broken by the group key and
+    the shard index.  The same packages are therefore always split the
+    same way, independent of the host or the order of discovery.
+
+    :param packages: The topologically ordered package descriptors
+    :param count: The number of shards
+    :param get_group: A function returning the group key of a package,
+      e.g. its git repository
+    :returns: A list of the packages of every shard in topological order
+    """
+    groups = {}
+    for pkg in packages:
+        groups.setdefault(str(get_group(pkg)), []).append(pkg.name)
+
+    sizes = [0] * count
+    shard_of_package = {}
+    for key, names in sorted(
+        groups.items(), key=lambda item: (-len(item[1]), item[0])
+    ):
+        index = min(range(count), key=lambda i: (sizes[i], i))
+        sizes[index] += len(names)
+        for name in names:
+            shard_of_package[name] = index
+
+    shards = [[] for _ in range(count)]
+    for pkg in packages:
+        shards[shard_of_package[pkg.name]].append(pkg)
+    return shards
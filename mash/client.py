@@ -0,0 +1,77 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import json
+import os
+import socket
+import sys
+
+# Only the standard library is imported so that the client starts fast
+
+"""Environment variable to set the socket of the generation server"""
+SERVER_SOCKET_ENVIRONMENT_VARIABLE = 'MASH_SERVER_SOCKET'
+
+"""Environment variables forwarded to the generation server"""
+FORWARDED_ENVIRONMENT_VARIABLES = ('ROSDISTRO', )
+
+
+def get_default_socket_path():
+    """Return the socket of the generation server in MASH_HOME."""
+    if SERVER_SOCKET_ENVIRONMENT_VARIABLE in os.environ:
+        return os.environ[SERVER_SOCKET_ENVIRONMENT_VARIABLE]
+    home = os.environ.get('MASH_HOME') or os.path.expanduser('~/.mash')
+    return os.path.join(home, 'server.sock')
+
+
+def send_request(socket_path, cwd, argv, env, stdout=sys.stdout):
+    """
+    Submit a generation request to a server and print its output.
+
+    :param socket_path: The path of the Unix socket of the server
+    :param cwd: The directory of the workspace
+    :param argv: The arguments of the bitbake verb
+    :param env: The environment variables of the client
+    :param stdout: The stream the output of the server is written to
+    :returns: The return code, a string for errors
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(socket_path)
+        request = {
+            'cwd': cwd,
+            'argv': argv,
+            'env': {
+                name: env[name] for name in FORWARDED_ENVIRONMENT_VARIABLES
+                if name in env},
+        }
+        s.sendall(json.dumps(request).encode('utf-8') + b'\n')
+
+        with s.makefile('r', encoding='utf-8') as h:
+            for line in h:
+                message = json.loads(line)
+                if 'stdout' in message:
+                    stdout.write(message['stdout'])
+                    stdout.flush()
+                elif 'rc' in message:
+                    return message['rc']
+    return 'Error: The server closed the connection'
+
+
+def main(argv=None):
+    """Generate recipes using a running 'mash serve' process."""
+    argv = sys.argv[1:] if argv is None else argv
+    socket_path = get_default_socket_path()
+    if argv[:1] == ['--socket']:
+        if len(argv) < 2:
+            return 'Error: --socket requires a path'
+        socket_path = argv[1]
+        argv = argv[2:]
+
+    try:
+        rc = send_request(socket_path, os.getcwd(), argv, os.environ)
+    except OSError as e:
+        return f"Error: Could not connect to '{socket_path}': {e}"
+    return rc or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,6 +10,8 @@ from colcon_core.command \
     as COLCON_LOG_LEVEL_ENVIRONMENT_VARIABLE
 from colcon_core.command import main as colcon_main
 from colcon_core.environment_variable import EnvironmentVariable
+from colcon_core.extension_point \
+    import EXTENSION_BLOCKLIST_ENVIRONMENT_VARIABLE
 
 from mash.verb.bitbake import BitbakeVerb
 
@@ -23,10 +25,23 @@ HOME_ENVIRONMENT_VARIABLE = EnvironmentVariable(
     'MASH_HOME',
     'Set the configuration directory (default: ~/.mash)')
 
+"""Colcon extensions mash does not need, unless a blocklist is set"""
+DEFAULT_EXTENSION_BLOCKLIST = (
+    # They only provide the setup.py information needed to build Python
+    # packages and importing them pulls in setuptools
+    'colcon_core.package_identification.python_setup_py',
+    'colcon_core.package_augmentation.python_setup_py',
+    'colcon_core.package_augmentation.ros_ament_python',
+)
+
 
 def main(*args: str, **kwargs: str) -> Any:
     """Execute the main logic of the command."""
 
+    os.environ.setdefault(
+        EXTENSION_BLOCKLIST_ENVIRONMENT_VARIABLE.name,
+        os.pathsep.join(DEFAULT_EXTENSION_BLOCKLIST))
+
     colcon_kwargs = {
         'command_name': 'mash',
         'verb_group_name': 'mash.verb',
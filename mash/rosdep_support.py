@@ -30,13 +30,33 @@
 # ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
-from rosdep2 import create_default_installer_context
-from rosdep2.catkin_support import get_catkin_view
-from rosdep2.lookup import ResolutionError
-from rosdep2.rosdistrohelper import get_index
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+import pickle
+import threading
+
+from colcon_core.location import get_config_path
+from mash.Profiler import get_profiler
+
+# rosdep2 is imported on first use since importing it takes longer than
+# everything else mash needs to start
 
 DEFAULT_ROS_DISTRO = 'indigo'
 view_cache = {}
+# One lock per view so that the views of several distros load concurrently
+_view_locks = {}
+
+# Bump when the layout of the persistent cache files changes
+CACHE_FORMAT_VERSION = 1
+
+# Persistent resolutions per cache key, loaded on first use
+resolution_cache = {}
+_dirty_cache_keys = set()
+_sources_hash = None
+_cache_lock = threading.RLock()
 
 # Copy of superflore exception for unresolved dependencies
 class UnresolvedDependency(Exception):
@@ -44,18 +64,200 @@ class UnresolvedDependency(Exception):
         self.message = message
 
 def get_cached_index():
+    from rosdep2.rosdistrohelper import get_index
     return get_index()
 
 
+def get_cache_dir():
+    """Return the directory of the persistent rosdep cache in MASH_HOME."""
+    try:
+        config_path = get_config_path()
+    except AssertionError:
+        # not invoked through the mash command, no persistent cache
+        return None
+    return Path(config_path) / 'cache' / 'rosdep'
+
+
+def _compute_sources_hash():
+    from rosdep2.sources_list import get_sources_cache_dir
+    from rosdep2.sources_list import get_sources_list_dir
+    from rosdep2.sources_list import get_sources_list_dirs
+
+    h = hashlib.sha256()
+    dirs = get_sources_list_dirs(get_sources_list_dir()) + \
+        [get_sources_cache_dir()]
+    for d in dirs:
+        if not os.path.isdir(d):
+            continue
+        for name in sorted(os.listdir(d)):
+            path = os.path.join(d, name)
+            if not os.path.isfile(path):
+                continue
+            h.update(path.encode('utf-8') + b'\0')
+            with open(path, 'rb') as f:
+                h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+def get_sources_hash():
+    """
+    Compute a hash over the rosdep sources lists and the sources cache.
+
+    Any change of the rosdep database, e.g. by running `rosdep update`,
+    results in a different hash and therefore a different cache key.
+    The hash is computed once, long running processes call
+    :func:`refresh_sources_hash` to notice later changes.
+    """
+    global _sources_hash
+    if _sources_hash is None:
+        sources_hash = _compute_sources_hash()
+        with _cache_lock:
+            if _sources_hash is None:
+                _sources_hash = sources_hash
+    return _sources_hash
+
+
+def refresh_sources_hash():
+    """
+    Compute the hash of the rosdep sources again.
+
+    If the rosdep database changed the views in memory are dropped, the
+    resolutions are looked up with the new cache key anyway.
+
+    :returns: True if the hash changed
+    """
+    global _sources_hash
+    sources_hash = _compute_sources_hash()
+    with _cache_lock:
+        if sources_hash == _sources_hash:
+            return False
+        changed = _sources_hash is not None
+        _sources_hash = sources_hash
+        view_cache.clear()
+        for cache_key in list(resolution_cache):
+            if cache_key not in _dirty_cache_keys:
+                del resolution_cache[cache_key]
+        return changed
+
+
+def get_cache_key(os_name, os_version, ros_distro):
+    """
+    Return the key of the persistent cache for a platform and distro.
+
+    The pickled views contain rosdep2 classes, so the cache of another
+    rosdep2 version is not used either.
+    """
+    from rosdep2 import __version__ as rosdep_version
+
+    data = '\0'.join([
+        str(CACHE_FORMAT_VERSION), rosdep_version, get_sources_hash(),
+        os_name, os_version, ros_distro])
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:32]
+
+
+def _write_atomic(path, data):
+    os.makedirs(path.parent, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _load_view(cache_dir, cache_key):
+    try:
+        with open(cache_dir / f'{cache_key}.view.pickle', 'rb') as f:
+            return pickle.load(f)
+    except Exception:  # noqa: B902
+        return None
+
+
 def get_view(os_name, os_version, ros_distro):
     key = os_name + os_version + ros_distro
-    if key not in view_cache:
-        value = get_catkin_view(ros_distro, os_name, os_version, False)
-        view_cache[key] = value
-    return view_cache[key]
+    with _cache_lock:
+        if key in view_cache:
+            return view_cache[key]
+        view_lock = _view_locks.setdefault(key, threading.Lock())
+    with view_lock:
+        with _cache_lock:
+            if key in view_cache:
+                return view_cache[key]
+        value = None
+        cache_dir = get_cache_dir()
+        if cache_dir is not None:
+            cache_key = get_cache_key(os_name, os_version, ros_distro)
+            value = _load_view(cache_dir, cache_key)
+        if value is None:
+            from rosdep2.catkin_support import get_catkin_view
+            with get_profiler().phase('rosdep view'):
+                value = get_catkin_view(
+                    ros_distro, os_name, os_version, False)
+            if cache_dir is not None:
+                _write_atomic(
+                    cache_dir / f'{cache_key}.view.pickle',
+                    pickle.dumps(value))
+        with _cache_lock:
+            view_cache[key] = value
+        return value
 
 
-_installer_ctx = create_default_installer_context()
+def preload_view(os_name, os_version, ros_distro):
+    """
+    Load the rosdep view of a distro in advance if it will be needed.
+
+    The view is only needed to resolve keys which are not in the persistent
+    resolution cache, so it is only loaded if there are no cached
+    resolutions for the distro yet.
+    """
+    _, resolutions = get_resolutions(os_name, os_version, ros_distro)
+    if not resolutions:
+        get_view(os_name, os_version, ros_distro)
+
+
+def get_resolutions(os_name, os_version, ros_distro):
+    """
+    Get the persistent rosdep resolutions for a platform and distro.
+
+    :returns: The cache key and a dictionary mapping rosdep keys to either
+      the resolved values or the error message of a failed resolution
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        cache_key = os_name + os_version + ros_distro
+        return cache_key, resolution_cache.setdefault(cache_key, {})
+
+    cache_key = get_cache_key(os_name, os_version, ros_distro)
+    with _cache_lock:
+        if cache_key not in resolution_cache:
+            resolutions = {}
+            try:
+                with open(cache_dir / f'{cache_key}.json', 'r') as f:
+                    resolutions = json.load(f)
+            except (OSError, ValueError):
+                pass
+            resolution_cache[cache_key] = resolutions
+    return cache_key, resolution_cache[cache_key]
+
+
+def save_resolution_cache():
+    """Write the resolutions added during this run to MASH_HOME."""
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return
+    with _cache_lock:
+        for cache_key in sorted(_dirty_cache_keys):
+            _write_atomic(
+                cache_dir / f'{cache_key}.json',
+                json.dumps(
+                    resolution_cache[cache_key], sort_keys=True
+                ).encode('utf-8'))
+        _dirty_cache_keys.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_installer_context():
+    """Return the rosdep installer context, created on first use."""
+    from rosdep2 import create_default_installer_context
+    return create_default_installer_context()
 
 
 def resolve_more_for_os(rosdep_key, view, installer, os_name, os_version):
@@ -68,9 +270,10 @@ def resolve_more_for_os(rosdep_key, view, installer, os_name, os_version):
 
     :raises: :exc:`rosdep2.ResolutionError`
     """
+    installer_ctx = get_installer_context()
     d = view.lookup(rosdep_key)
-    os_installers = _installer_ctx.get_os_installer_keys(os_name)
-    default_os_installer = _installer_ctx.get_default_os_installer_key(os_name)
+    os_installers = installer_ctx.get_os_installer_keys(os_name)
+    default_os_installer = installer_ctx.get_default_os_installer_key(os_name)
     inst_key, rule = d.get_rule_for_platform(os_name, os_version,
                                              os_installers,
                                              default_os_installer)
@@ -86,15 +289,36 @@ def resolve_rosdep_key(
     ignored=None
 ):
     ignored = ignored or []
+    ros_distro = ros_distro or DEFAULT_ROS_DISTRO
+    cache_key, resolutions = get_resolutions(os_name, os_version, ros_distro)
+    resolution = resolutions.get(key)
+    if resolution is None:
+        try:
+            resolution = list(_resolve_rosdep_key(
+                key, os_name, os_version, ros_distro))
+        except UnresolvedDependency as e:
+            resolution = e.message
+        with _cache_lock:
+            resolutions[key] = resolution
+            _dirty_cache_keys.add(cache_key)
+
+    if isinstance(resolution, str):
+        raise UnresolvedDependency(resolution)
+    return tuple(resolution)
+
+
+def _resolve_rosdep_key(key, os_name, os_version, ros_distro):
+    from rosdep2.lookup import ResolutionError
+
+    installer_ctx = get_installer_context()
     try:
-        installer_key = _installer_ctx.get_default_os_installer_key(os_name)
+        installer_key = installer_ctx.get_default_os_installer_key(os_name)
     except KeyError:
         raise UnresolvedDependency(
             "could not resolve package {} for os {}."
             .format(key, os_name)
         )
-    installer = _installer_ctx.get_installer(installer_key)
-    ros_distro = ros_distro or DEFAULT_ROS_DISTRO
+    installer = installer_ctx.get_installer(installer_key)
     view = get_view(os_name, os_version, ros_distro)
     try:
         return resolve_more_for_os(key, view, installer, os_name, os_version)
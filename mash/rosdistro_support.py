@@ -0,0 +1,275 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import hashlib
+import json
+import os
+from pathlib import Path
+import time
+
+from colcon_core.location import get_config_path
+
+"""Version of the on-disk snapshot format"""
+SNAPSHOT_FORMAT_VERSION = 1
+
+"""Default number of seconds before a snapshot is fetched again"""
+DEFAULT_SNAPSHOT_TTL = 24 * 60 * 60
+
+
+class SnapshotUnavailable(Exception):
+    """Raised when no usable rosdistro snapshot exists in offline mode."""
+
+    def __init__(self, message):  # noqa: D107
+        super().__init__(message)
+        self.message = message
+
+
+def get_snapshot_dir():
+    """Return the directory holding the rosdistro snapshots in MASH_HOME."""
+    return Path(get_config_path()) / 'cache' / 'rosdistro'
+
+
+def get_snapshot_path(distro_name):
+    """Return the path of the snapshot file for a distribution."""
+    return get_snapshot_dir() / f'{distro_name}.json'
+
+
+def create_snapshot(distro_name):
+    """
+    Fetch the rosdistro index and distribution cache and summarize them.
+
+    Only the data mash needs is kept: the released and unreleased package
+    names, the repository metadata and the package to repository mapping.
+    The manifests of the released packages are returned separately since
+    only generating recipes for the whole distribution needs them.
+
+    :param distro_name: The name of the ROS distribution, e.g. 'rolling'
+    :returns: The snapshot as a dictionary of JSON serializable values and
+      the release package manifests by package name
+    :raises: :exc:`ValueError` if the distribution cannot be found
+    """
+    from rosdistro import get_cached_distribution
+    from rosdistro import get_distribution_cache
+    from rosdistro import get_index
+    from rosdistro import get_index_url
+    from rosdistro import get_package_condition_context
+
+    index_url = get_index_url()
+    index = get_index(index_url)
+    cache = get_distribution_cache(index, distro_name)
+    distro = get_cached_distribution(index, distro_name, cache=cache)
+
+    if not distro:
+        raise ValueError(f"Distro '{distro_name}' not found")
+
+    versioned_packages = []
+    unversioned_packages = []
+    package_repositories = {}
+    for pkg_name, pkg in distro.release_packages.items():
+        repo = distro.repositories[pkg.repository_name]
+        release_repo = repo.release_repository
+
+        if release_repo is None:
+            continue
+        elif release_repo.version:
+            versioned_packages.append(pkg_name)
+        else:
+            unversioned_packages.append(pkg_name)
+        package_repositories[pkg_name] = pkg.repository_name
+
+    repositories = {}
+    for repo_name, repo in distro.repositories.items():
+        data = {}
+        release_repo = repo.release_repository
+        if release_repo is not None:
+            data['release'] = {
+                'url': release_repo.url,
+                'version': release_repo.version,
+                'tags': release_repo.tags,
+                'packages': release_repo.package_names,
+            }
+        source_repo = repo.source_repository
+        if source_repo is not None:
+            data['source'] = {
+                'type': source_repo.type,
+                'url': source_repo.url,
+                'version': source_repo.version,
+            }
+        repositories[repo_name] = data
+
+    package_xmls = {
+        pkg_name: cache.release_package_xmls[pkg_name]
+        for pkg_name in sorted(package_repositories)
+        if pkg_name in cache.release_package_xmls}
+
+    snapshot = {
+        'format': SNAPSHOT_FORMAT_VERSION,
+        'distro': distro_name,
+        'index_url': index_url,
+        'created': time.time(),
+        'condition_context': get_package_condition_context(
+            index, distro_name),
+        'released_packages': sorted(versioned_packages),
+        'unversioned_packages': sorted(unversioned_packages),
+        'package_repositories': package_repositories,
+        'repositories': repositories,
+        'release_package_xmls_id': get_package_xmls_id(package_xmls),
+    }
+    snapshot['id'] = get_snapshot_id(snapshot)
+    return snapshot, package_xmls
+
+
+def _get_index_url():
+    # The environment variable has precedence in rosdistro.get_index_url(),
+    # checking it first avoids importing rosdistro for a fresh snapshot
+    if 'ROSDISTRO_INDEX_URL' in os.environ:
+        return os.environ['ROSDISTRO_INDEX_URL']
+    from rosdistro import get_index_url
+    return get_index_url()
+
+
+def get_snapshot_id(snapshot):
+    """
+    Compute a content hash identifying the data of a snapshot.
+
+    The creation time and the id itself are not part of the hash so that
+    refreshing an unchanged distribution keeps the same id.
+    """
+    data = {
+        k: v for k, v in snapshot.items() if k not in ('created', 'id')}
+    content = json.dumps(data, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def get_package_xmls_path(distro_name):
+    """Return the path of the release package manifests of a distribution."""
+    return get_snapshot_dir() / f'{distro_name}-package-xmls.json'
+
+
+def get_package_xmls_id(package_xmls):
+    """Compute a content hash of the release package manifests."""
+    content = json.dumps(package_xmls, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def load_snapshot(distro_name):
+    """
+    Load the snapshot of a distribution from MASH_HOME.
+
+    :returns: The snapshot dictionary or None if no valid snapshot exists
+    """
+    path = get_snapshot_path(distro_name)
+    try:
+        with open(path, 'r') as h:
+            snapshot = json.load(h)
+    except (OSError, ValueError):
+        return None
+
+    if snapshot.get('format') != SNAPSHOT_FORMAT_VERSION:
+        return None
+    if snapshot.get('distro') != distro_name:
+        return None
+    return snapshot
+
+
+def load_package_xmls(snapshot):
+    """
+    Load the release package manifests belonging to a snapshot.
+
+    :returns: The manifests by package name or None if they are missing or
+      belong to a different snapshot
+    """
+    path = get_package_xmls_path(snapshot['distro'])
+    try:
+        with open(path, 'r') as h:
+            data = json.load(h)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('id') != snapshot.get('release_package_xmls_id'):
+        return None
+    return data.get('package_xmls')
+
+
+def _write_json(path, data):
+    os.makedirs(path.parent, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as h:
+        json.dump(data, h, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def save_snapshot(snapshot, package_xmls=None):
+    """
+    Write a snapshot atomically into MASH_HOME.
+
+    :param package_xmls: The release package manifests of the snapshot,
+      they are written before the snapshot referencing them
+    """
+    if package_xmls is not None:
+        _write_json(get_package_xmls_path(snapshot['distro']), {
+            'id': snapshot['release_package_xmls_id'],
+            'package_xmls': package_xmls,
+        })
+    _write_json(get_snapshot_path(snapshot['distro']), snapshot)
+
+
+def is_snapshot_fresh(snapshot, ttl):
+    """Check if a snapshot is younger than the TTL in seconds."""
+    if ttl is None:
+        return True
+    if ttl <= 0:
+        return False
+    return time.time() - snapshot.get('created', 0) < ttl
+
+
+def refresh_snapshot(distro_name):
+    """Fetch a new snapshot of a distribution and store it in MASH_HOME."""
+    snapshot, package_xmls = create_snapshot(distro_name)
+    save_snapshot(snapshot, package_xmls)
+    return snapshot
+
+
+def get_distro_snapshot(
+    distro_name, ttl=DEFAULT_SNAPSHOT_TTL, offline=False, refresh=False
+):
+    """
+    Get the snapshot of a distribution, fetching it only when necessary.
+
+    A cached snapshot is used while it is younger than the TTL and was
+    created from the currently configured index URL.
+    If fetching a new snapshot fails an outdated one is used instead.
+
+    :param distro_name: The name of the ROS distribution
+    :param ttl: The maximum age of a cached snapshot in seconds, None to
+      never expire the snapshot and 0 to always fetch a new one
+    :param offline: Never access the network, fail if no snapshot exists
+    :param refresh: Always fetch a new snapshot
+    :returns: The snapshot dictionary
+    :raises: :exc:`SnapshotUnavailable` if offline and no snapshot exists
+    """
+    snapshot = None if refresh else load_snapshot(distro_name)
+
+    if offline:
+        if snapshot is None:
+            raise SnapshotUnavailable(
+                f"No rosdistro snapshot for '{distro_name}' in "
+                f"'{get_snapshot_dir()}', run 'mash refresh --rosdistro "
+                f"{distro_name}' while online")
+        return snapshot
+
+    if snapshot is not None and is_snapshot_fresh(snapshot, ttl) and \
+            snapshot.get('index_url') == _get_index_url():
+        return snapshot
+
+    try:
+        return refresh_snapshot(distro_name)
+    except ValueError:
+        raise
+    except Exception as e:  # noqa: B902
+        if snapshot is None:
+            raise
+        print(
+            f'Warning: Could not refresh rosdistro snapshot for '
+            f"'{distro_name}', using the cached one: {e}")
+        return snapshot
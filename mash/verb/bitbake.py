@@ -14,8 +14,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import argparse
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import hashlib
+import itertools
 import logging
-import re
 
 from colcon_core.logging import colcon_logger
 from colcon_core.logging import get_effective_console_level
@@ -25,26 +30,142 @@ from colcon_core.package_selection import add_arguments as add_packages_argument
 from colcon_core.plugin_system import satisfies_version
 from colcon_core.topological_order import topological_order_packages
 from colcon_core.verb import VerbExtensionPoint
-from git import Repo, GitCommandError
-from pathlib import Path
-from rosdistro import get_index, get_index_url, get_cached_distribution
+import mash
+from mash.ArchiveOutput import ArchiveOutput
+from mash.ArchiveOutput import get_archive_format
 from mash.BitbakeRecipe import BitbakeRecipe
+from mash.ChangeSelection import ChangesUnavailable
+from mash.ChangeSelection import list_changed_paths
+from mash.ChangeSelection import map_changed_paths
+from mash.DependencyResolver import DEPENDENCY_CATEGORIES
+from mash.DependencyResolver import DependencyResolver
+from mash.DiscoveryCache import DiscoveryCache
+from mash.DiscoveryCache import uses_recursive_crawl
+from mash.EventWriter import EventWriter
+from mash.FileWatcher import create_watcher
+from mash.GenerationState import compute_fingerprint
+from mash.GenerationState import GenerationState
+from mash.GitRefReader import GitRefReader
+from mash.GitRefReader import UnsupportedRepository
+from mash.LicenseFileIndex import LicenseFileIndex
+from mash.MetadataStore import MetadataStore
+from mash.OutputManager import OutputManager
 from mash.PackageMetadata import PackageMetadata
-from urllib.parse import urlparse
+from mash.Profiler import get_profiler
+from mash.RepositoryIndex import format_src_uri
+from mash.RepositoryIndex import is_scp_url_format
+from mash.RepositoryIndex import RepositoryIndex
+from mash.RepositoryIndex import RepositoryUnavailable
+from mash.rosdep_support import get_cache_key
+from mash.rosdep_support import preload_view
+from mash.rosdep_support import save_resolution_cache
+from mash.rosdistro_support import DEFAULT_SNAPSHOT_TTL
+from mash.rosdistro_support import get_distro_snapshot
+from mash.rosdistro_support import SnapshotUnavailable
+from mash.Sharding import assign_shards
+from mash.Sharding import format_shard
+from mash.Sharding import parse_shard
+from mash.SPDXLicense import get_guessed_licenses
 
 import os
+import sys
+import threading
+import time
+
+"""Number of packages in flight in the generation pipeline per worker"""
+PIPELINE_DEPTH_PER_WORKER = 4
+
+
+class PackageRecord:
+    """The state of a package while it passes through the pipeline."""
+
+    __slots__ = (
+        'pkg', 'fingerprint', 'parsed', 'metadata', 'parse_duration',
+        'dependencies')
+
+    def __init__(self, pkg):  # noqa: D107
+        self.pkg = pkg
+        self.fingerprint = None
+        self.parsed = False
+        self.metadata = None
+        self.parse_duration = None
+        self.dependencies = None
+
+
+class ManifestCache:
+    """
+    The parsed package manifests shared by the generation of rosdistros.
+
+    The manifests are looked up by their content, the conditions of the
+    dependencies are evaluated for each rosdistro afterwards.
+    """
+
+    def __init__(self):  # noqa: D107
+        self._metadata = {}
+        self._lock = threading.Lock()
+
+    def get(self, package_manifest):
+        """Get the metadata of a manifest parsed before or None."""
+        if package_manifest is None:
+            return None
+        key = hashlib.sha256(package_manifest).digest()
+        with self._lock:
+            return self._metadata.get(key)
+
+    def add(self, package_manifest, pkg_metadata):
+        """Store the metadata of a parsed manifest."""
+        if package_manifest is None or pkg_metadata is None:
+            return
+        key = hashlib.sha256(package_manifest).digest()
+        with self._lock:
+            self._metadata[key] = pkg_metadata
+
 
 class BitbakeVerb(VerbExtensionPoint):
     """Generate Bitbake recipes for ROS 2 packages"""
     ros_package_manifest = 'package.xml'
+    # The discovered packages are the same for all rosdistros
+    rosdistro_specific_packages = False
+    # A recipe is generated without the git metadata of a package as well
+    requires_repository = False
 
     def __init__(self):  # noqa: D107
         super().__init__()
         satisfies_version(VerbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
         log_level = get_effective_console_level(colcon_logger)
         logging.getLogger('git').setLevel(log_level)
+        self._startup_times = None
 
     def add_arguments(self, *, parser):  # noqa: D102
+        self.add_recipe_arguments(parser)
+
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Keep running and regenerate the recipes whose package.xml '
+                 'or git HEAD and refs changed'
+        )
+
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument(
+            '--changed-since',
+            metavar='REV',
+            help='Only generate the recipes of the selected packages which '
+                 'are affected by changes since a git revision: all '
+                 'packages of repositories whose HEAD is not the revision '
+                 'and the packages containing uncommitted or untracked files'
+        )
+        group.add_argument(
+            '--changed-paths-from-stdin',
+            action='store_true',
+            help='Only generate the recipes of the selected packages which '
+                 'contain the changed paths read from stdin, one per line'
+        )
+
+        add_packages_arguments(parser)
+
+    def add_recipe_arguments(self, parser):
+        """Add the arguments shared by all verbs generating recipes."""
         parser.add_argument(
             '--build-base',
             default='build_mash',
@@ -54,195 +175,1044 @@ class BitbakeVerb(VerbExtensionPoint):
 
         parser.add_argument(
             '--rosdistro',
-            default=os.environ.get('ROSDISTRO'),
-            help='Name of rosdistro'
+            nargs='+',
+            default=[os.environ.get('ROSDISTRO')],
+            help='Names of the rosdistros, the recipes of several rosdistros '
+                 'are generated in one pass into a subdirectory of the build '
+                 'base for each and --archive and --metadata-db must '
+                 'contain {rosdistro}'
         )
 
-        add_packages_arguments(parser)
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='Only use the cached rosdistro snapshot and never access '
+                 'the network'
+        )
 
+        parser.add_argument(
+            '--rosdistro-cache-ttl',
+            type=int,
+            default=DEFAULT_SNAPSHOT_TTL,
+            metavar='SECONDS',
+            help='Maximum age of the cached rosdistro snapshot before it is '
+                 'fetched again, 0 to always fetch it '
+                 f'(default: {DEFAULT_SNAPSHOT_TTL})'
+        )
 
-    def is_scp_url_format(self, url: str) -> bool:
-       """
-       Determine if the Git remote URL is in SCP format
-       https://www.rfc-editor.org/rfc/rfc3986
+        parser.add_argument(
+            '--parallel-workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            metavar='NUMBER',
+            help='Maximum number of packages to process in parallel '
+                 f'(default: {os.cpu_count() or 1})'
+        )
 
-       This is a simplified regex to check for the non-standard
-       user@host:/path format. It accepts with and without a username.
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate all recipes even if their inputs did not change'
+        )
 
-       If a scheme (ie. protocol) is found then return false
-       """
-       if re.match(r'^[A-Za-z0-9]+://', url):
-           return False
+        parser.add_argument(
+            '--archive',
+            metavar='PATH',
+            help='Write the recipes and a conf/layer.conf into a single '
+                 'archive instead of the build base, the extension selects '
+                 'the format: .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz or .zip'
+        )
 
-       return bool(re.match(r'^([^@/:]+@)?[^@/:]+:.*$', url))
+        parser.add_argument(
+            '--layer-name',
+            metavar='NAME',
+            help='The collection name of the layer in the archive '
+                 '(default: mash-<rosdistro>)'
+        )
 
-    def format_src_uri(self, uri):  # noqa: D102
-        if uri.startswith('/') and not uri.startswith('//'):
-            uri = 'file://' + url
+        parser.add_argument(
+            '--shard',
+            type=parse_shard,
+            metavar='INDEX/COUNT',
+            help='Only generate the recipes of one of COUNT shards of the '
+                 'selected packages, the packages of a repository are in the '
+                 "same shard, see 'mash merge'"
+        )
 
+        parser.add_argument(
+            '--metadata-db',
+            metavar='PATH',
+            help='Record the packages, recipes, dependencies, rosdep '
+                 'resolutions and git metadata in an SQLite database, see '
+                 "'mash query'"
+        )
 
-        if self.is_scp_url_format(uri):
-            user_host, path = uri.split(":", 1)
-            if not path.startswith('/'):
-                path = '/' + path
-            uri = f"ssh://{user_host}{path}"
+        parser.add_argument(
+            '--events-json',
+            metavar='PATH',
+            help='Write one JSON object per line for every package as soon '
+                 'as it is processed, use - for stdout in which case the '
+                 'report is printed to stderr'
+        )
 
-        p = urlparse(uri)
-        if p.username:
-            protocol = "ssh"
-        else:
-            protocol = p.scheme
-        return f"git://{p.netloc}{p.path};${{ROS_BRANCH}};protocol={protocol}"
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Report the wall and CPU time spent in each phase and the '
+                 'slowest packages'
+        )
 
-    def list_packages(self, distro_name):
-        index_url = get_index_url()
-        index = get_index(index_url)
-        distro = get_cached_distribution(index, distro_name)
+        parser.add_argument(
+            '--profile-slowest',
+            type=int,
+            default=10,
+            metavar='NUMBER',
+            help='Number of slowest packages to report (default: 10)'
+        )
+
+        parser.add_argument(
+            '--profile-cprofile',
+            metavar='PATH',
+            help='Write the cProfile statistics of all threads to a file, '
+                 'implies --profile'
+        )
 
-        if not distro:
-            raise ValueError(f"Distro '{distro_name}' not found")
+        parser.add_argument(
+            '--profile-tracemalloc',
+            metavar='PATH',
+            help='Write a tracemalloc snapshot to a file, implies --profile'
+        )
 
-        versioned_packages = []
-        unversioned_packages = []
-        for pkg_name, pkg in distro.release_packages.items():
-            repo = distro.repositories[pkg.repository_name]
-            release_repo = repo.release_repository
 
-            if release_repo is None:
-                continue
-            elif release_repo.version:
-                versioned_packages.append(pkg_name)
-            else:
-                unversioned_packages.append(pkg_name)
+    def is_scp_url_format(self, url: str) -> bool:
+        return is_scp_url_format(url)
 
-        return versioned_packages, unversioned_packages
+    def format_src_uri(self, uri):  # noqa: D102
+        return format_src_uri(uri)
 
     def main(self, *, context):  # noqa: D102
         args = context.args
 
-        (released_packages, _) = self.list_packages(args.rosdistro)
+        rc = self.check_arguments(args)
+        if rc:
+            return rc
+        if getattr(args, 'changed_paths_from_stdin', False):
+            args.changed_paths = [
+                line.strip() for line in sys.stdin if line.strip()]
 
-        descriptors = get_package_descriptors(args)
+        events = None
+        if args.events_json:
+            try:
+                events = EventWriter(args.events_json)
+            except OSError as e:
+                return f'Error: Could not open {args.events_json}: {e}'
 
-        # always perform topological order for the select package extensions
-        decorators = topological_order_packages(
-            descriptors, recursive_categories=('run', ))
+        profiler = get_profiler()
+        profile = args.profile or args.profile_cprofile or \
+            args.profile_tracemalloc
+        if profile:
+            profiler.reset()
+            profiler.enable(
+                cprofile=bool(args.profile_cprofile),
+                tracemalloc_frames=25 if args.profile_tracemalloc else 0)
 
-        select_package_decorators(args, decorators)
+        try:
+            with contextlib.ExitStack() as stack:
+                if events is not None and events.is_stdout:
+                    # Keep stdout for the events and print the report to stderr
+                    stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+                with profiler.phase('total'):
+                    if getattr(args, 'watch', False):
+                        rc = self.watch(
+                            self.get_rosdistro_arguments(
+                                args, args.rosdistro[0]),
+                            events)
+                    else:
+                        rc = self.generate_rosdistros(args, events)
+                if profile:
+                    self.report_profile(args, profiler)
+                return rc
+        finally:
+            if events is not None:
+                events.close()
+            if profile:
+                profiler.disable()
 
-        lines = []
-        for decorator in decorators:
-            if not decorator.selected:
-                continue
-            pkg = decorator.descriptor
+    def check_arguments(self, args):
+        """
+        Check the combination of the arguments of a generation.
 
-            lines.append(f"{pkg.name:<30}\t{str(pkg.path):<30}\t({pkg.type})")
+        :returns: An error message or None
+        """
+        if args.parallel_workers < 1:
+            return 'Error: --parallel-workers must be at least 1'
+        if args.archive and get_archive_format(args.archive) is None:
+            return f"Error: Unsupported archive format of '{args.archive}'"
+        if args.archive and getattr(args, 'watch', False):
+            return 'Error: --archive cannot be combined with --watch'
+        if args.shard and args.archive:
+            return 'Error: --shard cannot be combined with --archive, use ' \
+                "'mash merge --archive' instead"
+        if args.shard and getattr(args, 'watch', False):
+            return 'Error: --shard cannot be combined with --watch'
+        if getattr(args, 'watch', False) and (
+            getattr(args, 'changed_since', None) or
+            getattr(args, 'changed_paths_from_stdin', False)
+        ):
+            return 'Error: --watch cannot be combined with a selection of ' \
+                'changed packages'
+        return self.check_rosdistro_arguments(args)
 
-            recipe_name = pkg.name.lower().replace('_', '-')
+    def check_rosdistro_arguments(self, args):
+        """
+        Check that the arguments can be used for all requested rosdistros.
 
-            recipe_dir = os.path.abspath(os.path.join(
-                os.getcwd(), args.build_base, recipe_name))
+        :returns: An error message or None
+        """
+        if None in args.rosdistro:
+            return 'Error: No rosdistro provided'
+        if len(args.rosdistro) == 1:
+            return None
+        if len(set(args.rosdistro)) != len(args.rosdistro):
+            return 'Error: --rosdistro contains duplicates'
+        if getattr(args, 'watch', False):
+            return 'Error: --watch supports only a single rosdistro'
+        for name in ('archive', 'metadata_db'):
+            value = getattr(args, name)
+            if value and '{rosdistro}' not in value:
+                option = '--' + name.replace('_', '-')
+                return f'Error: {option} must contain {{rosdistro}} to ' \
+                    'generate several rosdistros'
+        return None
 
-            package_manifest_path = os.path.join(pkg.path, self.ros_package_manifest)
-            if os.path.exists(package_manifest_path):
-                lines.append(f"\t- ROS package manifest: {package_manifest_path}")
-                with open(package_manifest_path, 'r') as h:
-                    package_manifest = h.read()
-                    pkg_metadata = PackageMetadata(package_manifest, None)
+    def get_rosdistro_arguments(self, args, rosdistro):
+        """
+        Get the arguments to generate the recipes of a single rosdistro.
 
-                bitbake_recipe = BitbakeRecipe()
-                bitbake_recipe.set_rosdistro(args.rosdistro)
-                bitbake_recipe.set_internal_packages(released_packages)
-                bitbake_recipe.importPackage(pkg_metadata)
+        With several rosdistros the recipes of each one are written to a
+        subdirectory of the build base named after it.
+        """
+        rosdistro_args = argparse.Namespace(**vars(args))
+        rosdistro_args.rosdistro = rosdistro
+        if len(args.rosdistro) > 1:
+            rosdistro_args.build_base = os.path.join(
+                args.build_base, rosdistro)
+        for name in ('archive', 'metadata_db'):
+            value = getattr(args, name)
+            if value:
+                setattr(
+                    rosdistro_args, name, value.replace(
+                        '{rosdistro}', rosdistro))
+        return rosdistro_args
 
-                repo = None
-                # Get source URI and revision
-                try:
-                    repo = Repo(str(pkg.path), search_parent_directories=True)
-                except Exception as e:
-                    repo = None
-                    print(f"\t- Warning: Could not open git repository for package {pkg.name}: {e}")
-
-                src_uri = None
-                branch = None
-                src_rev = None
-                tag_name = None
-                repo_path = None
-
-                if repo is not None:
-                    try:
-                        # Use origin remote
-                        src_uri = self.format_src_uri(repo.remotes.origin.url)
-                    except Exception as e:
-                        # Fallback to first remote
-                        if repo.remotes:
-                            src_uri = self.format_src_uri(repo.remotes[0].url)
+    def generate_rosdistros(self, args, events):
+        """
+        Generate the recipes of all requested rosdistros in one pass.
 
-                    try:
-                        branch = repo.active_branch.name
-                    except Exception as e:
-                        branches = []
-                        # Check local branches that contain the current commit
-                        for head in repo.heads:
-                            if repo.is_ancestor(repo.head.commit, head.commit):
-                                branches.append(head.name)
-
-                        # Check remote branches that contain the current commit
-                        for remote in repo.remotes:
-                            for ref in remote.refs:
-                                if repo.is_ancestor(repo.head.commit, ref.commit):
-                                    branches.append(ref.name)
-
-                        # Remove duplicates
-                        unique_branches = list(set(branches))
-
-                        # Select branch based on rosdistro or common defaults
-                        if len(unique_branches) > 0:
-                            if f"origin/{args.rosdistro}" in unique_branches:
-                                branch = args.rosdistro
-                            elif "main" in unique_branches:
-                                branch = "main"
-                            elif "master" in unique_branches:
-                                branch = "master"
-                            else:
-                                branch = unique_branches[0].removeprefix("origin/")
-
-                        # print(f"\t- Found branches for package {pkg.name}: {unique_branches}, selected branch: {branch}")
-
-                    # Get the current commit hash
-                    src_rev = repo.head.commit.hexsha
-
-                    # get the path to the working copy
-                    repo_path = Path(repo.working_tree_dir).resolve()
-                    git_relpath = os.path.relpath(pkg.path, start=repo_path)
-
-                    if git_relpath == ".":
-                        git_relpath = ""
-                    else:
-                        git_relpath = "/" + git_relpath
+        The discovered packages, the inspected git repositories and the
+        parsed package manifests are shared, only the rosdep resolution
+        and the evaluation of the conditions of the manifests are done for
+        each rosdistro.
+        """
+        try:
+            snapshots, packages = self.start_up(args)
+        except SnapshotUnavailable as e:
+            return f'Error: {e.message}'
 
-                    bitbake_recipe.set_pkg_path(str(git_relpath))
-                    lines.append(f"\t- Package repo path: {git_relpath}")
+        repository_index = None
+        manifest_cache = ManifestCache() if len(args.rosdistro) > 1 else None
+        for rosdistro in args.rosdistro:
+            rosdistro_args = self.get_rosdistro_arguments(args, rosdistro)
+            snapshot = snapshots[rosdistro]
+            descriptors, decorators = packages[rosdistro]
+            if len(args.rosdistro) > 1:
+                print(f'ROS distribution {rosdistro}:')
+            if repository_index is None or self.rosdistro_specific_packages:
+                repository_index = self.create_repository_index(
+                    rosdistro_args, snapshot)
+            else:
+                repository_index = repository_index.with_rosdistro(rosdistro)
+            rc = self.generate(
+                rosdistro_args, events, snapshot=snapshot,
+                descriptors=descriptors, decorators=decorators,
+                repository_index=repository_index,
+                manifest_cache=manifest_cache)
+            if rc:
+                return rc
 
-                    repo_name = os.path.split(repo.working_tree_dir)[-1]
+    def start_up(self, args):
+        """
+        Load the snapshots, rosdep views and packages of all rosdistros.
 
-                    try:
-                        tag_name = repo.git.describe('--tags', '--abbrev=0')
-                    except GitCommandError:
-                        tag_name = None
+        The steps do not depend on each other, so they run concurrently and
+        the generation only waits for the slowest one.  The packages are
+        discovered and ordered once, unless they are specific to a rosdistro
+        in which case the discovery waits for its snapshot.  The wall time
+        of the start up and the time saved by the overlap are recorded for
+        the profile report.  If a rosdep view cannot be preloaded a warning
+        is printed, the view is loaded again by the first resolution.
 
-                    bitbake_recipe.set_git_metadata(src_uri, branch, src_rev, repo_name, tag_name)
+        :returns: A dictionary mapping the rosdistros to their snapshots and
+          a dictionary mapping them to their discovered packages and the
+          topologically ordered package decorators
+        :raises: :exc:`SnapshotUnavailable` if a snapshot is not available
+        """
+        profiler = get_profiler()
+        durations = []
 
-                ros_bitbake_recipe = os.path.join(recipe_dir, bitbake_recipe.bitbake_recipe_filename())
-                lines.append(f"\t- Bitbake recipe: {ros_bitbake_recipe}")
+        def run_step(name, function, *arguments):
+            with profiler.phase(name) as timer:
+                result = function(*arguments)
+            durations.append(timer.wall)
+            return result
 
-                os.makedirs(recipe_dir, exist_ok=True)
+        def discover(rosdistro_args, snapshot_future):
+            snapshot = None
+            if snapshot_future is not None:
+                snapshot = snapshot_future.result()
+            descriptors = run_step(
+                'discovery', self.discover_packages, rosdistro_args, snapshot)
+            decorators = run_step(
+                'topological order', self.order_packages, descriptors)
+            return descriptors, decorators
 
-                with open(ros_bitbake_recipe, 'w') as h:
-                    h.write(bitbake_recipe.get_recipe_text())
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=3 * len(args.rosdistro),
+            initializer=profiler.start_thread
+        ) as executor:
+            snapshot_futures = {
+                rosdistro: executor.submit(
+                    run_step, 'rosdistro snapshot', get_distro_snapshot,
+                    rosdistro, args.rosdistro_cache_ttl, args.offline)
+                for rosdistro in args.rosdistro}
+            # Building the view on the first resolution would delay the
+            # first recipe
+            preload_futures = {
+                rosdistro: executor.submit(
+                    run_step, 'rosdep preload', preload_view,
+                    BitbakeRecipe.ROS_PLATFORM_NAME, '', rosdistro)
+                for rosdistro in args.rosdistro}
+            if self.rosdistro_specific_packages:
+                package_futures = {
+                    rosdistro: executor.submit(
+                        discover,
+                        self.get_rosdistro_arguments(args, rosdistro),
+                        snapshot_futures[rosdistro])
+                    for rosdistro in args.rosdistro}
             else:
-                lines.append(f"\t- No ROS package manifest found for {pkg.name}")
+                future = executor.submit(
+                    discover,
+                    self.get_rosdistro_arguments(args, args.rosdistro[0]),
+                    None)
+                package_futures = dict.fromkeys(args.rosdistro, future)
+
+            snapshots = {
+                rosdistro: future.result()
+                for rosdistro, future in snapshot_futures.items()}
+            packages = {
+                rosdistro: future.result()
+                for rosdistro, future in package_futures.items()}
+            for rosdistro, future in preload_futures.items():
+                try:
+                    future.result()
+                except Exception as e:  # noqa: B902
+                    print(
+                        'Warning: Could not preload the rosdep view of '
+                        f"'{rosdistro}': {e}")
+        wall = time.perf_counter() - start_time
+        self._startup_times = (wall, sum(durations))
+        return snapshots, packages
+
+    def report_profile(self, args, profiler):
+        """Print the profile of the run and write the requested dumps."""
+        profiler.disable()
+        print()
+        for line in profiler.format_report(args.profile_slowest):
+            print(line)
+        if self._startup_times is not None:
+            wall, sequential = self._startup_times
+            print()
+            print(
+                f'Start up: {wall:.3f} seconds, {sequential - wall:.3f} '
+                'seconds saved by running the steps concurrently')
+        if args.profile_cprofile:
+            profiler.dump_cprofile(args.profile_cprofile)
+            print(f'cProfile statistics: {args.profile_cprofile}')
+        if args.profile_tracemalloc:
+            profiler.dump_tracemalloc(args.profile_tracemalloc)
+            print(f'tracemalloc snapshot: {args.profile_tracemalloc}')
+
+    def watch(self, args, events):
+        """Generate the recipes again whenever their inputs change."""
+        try:
+            snapshot = get_distro_snapshot(
+                args.rosdistro, ttl=args.rosdistro_cache_ttl,
+                offline=args.offline)
+        except SnapshotUnavailable as e:
+            return f'Error: {e.message}'
+        descriptors = self.discover_packages(args, snapshot)
+        repository_index = self.create_repository_index(args, snapshot)
+
+        rc = self.generate(
+            args, events, snapshot=snapshot, descriptors=descriptors,
+            repository_index=repository_index)
+        if rc:
+            return rc
+
+        watcher, git_dirs = self.create_watcher(descriptors, repository_index)
+        print(
+            f'Watching {len(descriptors)} packages for changes, '
+            'press Ctrl-C to stop')
+        try:
+            while True:
+                changed = watcher.wait()
+                start_time = time.perf_counter()
+
+                # Inspect the repositories whose HEAD or refs changed again
+                for git_dir, root in git_dirs.items():
+                    if any(
+                        path.startswith(git_dir + os.sep) for path in changed
+                    ):
+                        repository_index.invalidate(root)
+
+                # Discover the packages again if a manifest was removed
+                if any(
+                    os.path.basename(path) == self.ros_package_manifest and
+                    not os.path.exists(path) for path in changed
+                ):
+                    descriptors = self.discover_packages(args, snapshot)
+                    watcher.close()
+                    watcher, git_dirs = self.create_watcher(
+                        descriptors, repository_index)
+
+                rc = self.generate(
+                    args, events, snapshot=snapshot, descriptors=descriptors,
+                    repository_index=repository_index,
+                    report_up_to_date=False)
+                if rc:
+                    print(rc)
+                print(
+                    f'Updated in {time.perf_counter() - start_time:.3f} '
+                    'seconds')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+
+    def create_watcher(self, descriptors, repository_index):
+        """
+        Watch the inputs of the recipes of the packages.
+
+        These are the package manifests, the license files and the git HEAD
+        and refs of the packages.
+
+        :returns: The watcher and a dictionary mapping the watched git
+          directories to their working tree
+        """
+        watcher = create_watcher()
+        git_dirs = {}
+        license_index = LicenseFileIndex()
+        for pkg in descriptors:
+            watcher.add_file(
+                os.path.join(pkg.path, self.ros_package_manifest))
+            for path, _ in self.get_license_files(
+                pkg, repository_index, license_index
+            ):
+                watcher.add_file(os.path.join(pkg.path, path))
+            root = repository_index.find_working_tree(pkg.path)
+            if root is None or root in git_dirs.values():
                 continue
+            try:
+                reader = GitRefReader(root)
+            except (OSError, UnsupportedRepository):
+                git_dir = common_dir = os.path.join(root, '.git')
+            else:
+                git_dir, common_dir = reader.git_dir, reader.common_dir
+            git_dirs[git_dir] = root
+            git_dirs[common_dir] = root
+            watcher.add_file(os.path.join(git_dir, 'HEAD'))
+            watcher.add_file(os.path.join(common_dir, 'packed-refs'))
+            watcher.add_tree(os.path.join(common_dir, 'refs'))
+        return watcher, git_dirs
+
+    def generate(
+        self, args, events, snapshot=None, descriptors=None,
+        repository_index=None, report_up_to_date=True, manifest_cache=None,
+        decorators=None
+    ):
+        """
+        Generate the recipes of the selected packages.
+
+        :param args: The arguments of a single rosdistro
+        :param snapshot: The rosdistro snapshot, loaded if not provided
+        :param descriptors: The discovered packages, discovered if not
+          provided
+        :param repository_index: The :class:`RepositoryIndex` to reuse
+        :param report_up_to_date: Also report packages which are up to date
+        :param manifest_cache: The :class:`ManifestCache` to share the parsed
+          manifests with the generation of other rosdistros
+        :param decorators: The topologically ordered decorators of the
+          descriptors, ordered if not provided
+        """
+        profiler = get_profiler()
+        if snapshot is None:
+            try:
+                with profiler.phase('rosdistro snapshot'):
+                    snapshot = get_distro_snapshot(
+                        args.rosdistro, ttl=args.rosdistro_cache_ttl,
+                        offline=args.offline)
+            except SnapshotUnavailable as e:
+                return f'Error: {e.message}'
+        released_packages = snapshot['released_packages']
+
+        if descriptors is None:
+            try:
+                with profiler.phase('discovery'):
+                    descriptors = self.discover_packages(args, snapshot)
+            except SnapshotUnavailable as e:
+                return f'Error: {e.message}'
+
+        if decorators is None:
+            with profiler.phase('topological order'):
+                # always perform topological order for the select package
+                # extensions
+                decorators = self.order_packages(descriptors)
+
+        select_package_decorators(args, decorators)
+
+        packages = [
+            decorator.descriptor for decorator in decorators
+            if decorator.selected]
+
+        if repository_index is None:
+            repository_index = self.create_repository_index(args, snapshot)
+
+        package_names = {descriptor.name for descriptor in descriptors}
+        if args.shard:
+            index, count = args.shard
+            packages = assign_shards(
+                packages, count, lambda pkg: self.get_repository_key(
+                    pkg, repository_index))[index - 1]
+            # The build base of a shard only contains the recipes of its
+            # packages, so that the shards can be merged
+            package_names = {pkg.name for pkg in packages}
+
+        if getattr(args, 'changed_since', None) or \
+                getattr(args, 'changed_paths', None) is not None:
+            packages = self.select_changed_packages(
+                args, packages, repository_index)
+
+        if args.archive:
+            # Every archive is complete, so there is no state to update
+            state = None
+            output = ArchiveOutput(
+                args.archive, args.layer_name or f'mash-{args.rosdistro}')
+        else:
+            build_base = os.path.abspath(
+                os.path.join(os.getcwd(), args.build_base))
+            state = GenerationState(build_base)
+            state.shard = None
+            if args.shard:
+                state.shard = {
+                    'index': args.shard[0],
+                    'count': args.shard[1],
+                    'rosdistro': args.rosdistro,
+                }
+            output = OutputManager(build_base)
+
+            # Remove the recipes of packages which are gone from the
+            # workspace
+            for name in sorted(set(state.packages) - package_names):
+                output.remove(state.get_package(name)['recipe'])
+                state.remove_package(name)
+
+        rosdep_cache_id = get_cache_key(
+            BitbakeRecipe.ROS_PLATFORM_NAME, '', args.rosdistro)
+        dependency_resolver = DependencyResolver(
+            args.rosdistro, released_packages, BitbakeRecipe.ROS_PLATFORM_NAME)
+        license_index = LicenseFileIndex()
+
+        try:
+            store = None
+            if args.metadata_db:
+                store = MetadataStore(args.metadata_db)
+                for name in sorted(set(store.fingerprints) - package_names):
+                    store.remove_package(name)
+
+            self.generate_packages(
+                args, events, packages, state, store, output, repository_index,
+                dependency_resolver, license_index, snapshot, rosdep_cache_id,
+                manifest_cache, report_up_to_date)
+
+            save_resolution_cache()
+            license_index.save()
+            if store is not None:
+                store.update_resolutions(dependency_resolver)
+
+            with profiler.phase('commit'):
+                output.commit()
+                if state is not None:
+                    state.save()
+                if store is not None:
+                    store.commit()
+        finally:
+            # Discard the files of a failed generation
+            output.close()
+
+        if events is not None:
+            events.write_event({
+                'event': 'summary',
+                'rosdistro': args.rosdistro,
+                'shard': format_shard(args.shard) if args.shard else None,
+                'added': output.added,
+                'changed': output.changed,
+                'unchanged': output.unchanged,
+                'removed': output.removed,
+                'unresolved_keys': sorted(dependency_resolver.unresolved_keys),
+            })
+
+        print(output.get_summary())
+
+    def generate_packages(
+        self, args, events, packages, state, store, output, repository_index,
+        dependency_resolver, license_index, snapshot, rosdep_cache_id,
+        manifest_cache, report_up_to_date
+    ):
+        """Generate the recipes of the packages in the pipeline."""
+        profiler = get_profiler()
+        with ThreadPoolExecutor(
+            max_workers=args.parallel_workers,
+            initializer=profiler.start_thread
+        ) as executor:
+            # Inspect each git repository once
+            with profiler.phase('git scan'):
+                repository_index.scan([pkg.path for pkg in packages], executor)
+
+            # The packages stream through the stages: reading, fingerprinting
+            # and parsing the manifest in the workers, resolving the
+            # dependencies in this thread in topological order, rendering and
+            # writing the recipe in the workers.  Only a bounded number of
+            # packages is in flight so that memory does not grow with the
+            # number of packages.  Results are reported in topological order
+            # so that the output does not depend on the number of workers.
+            depth = PIPELINE_DEPTH_PER_WORKER * args.parallel_workers
+            pending = iter(packages)
+            prepared = collections.deque()
+            generated = collections.deque()
+            while True:
+                for pkg in itertools.islice(
+                    pending, depth - len(prepared) - len(generated)
+                ):
+                    prepared.append(executor.submit(
+                        self.prepare_package, args, pkg, state, store,
+                        repository_index, license_index, snapshot,
+                        rosdep_cache_id, manifest_cache))
+
+                if prepared:
+                    record = prepared.popleft().result()
+                    generated.append(self.submit_package(
+                        args, record, dependency_resolver, repository_index,
+                        license_index, state, output, executor))
+                if not generated:
+                    break
+                if prepared and not generated[0][2].done():
+                    continue
+
+                record, messages, future = generated.popleft()
+                warnings, lines, recipe, event = future.result()
+                if record.parsed:
+                    event['durations']['parse'] = record.parse_duration
+                if recipe is not None:
+                    output.flush(recipe)
+                if report_up_to_date or record.parsed:
+                    self.report_package(
+                        messages + warnings, lines, event, events)
+                if recipe is not None and record.fingerprint is not None \
+                        and state is not None:
+                    self.update_state(
+                        record.pkg, record.fingerprint, recipe, state, output)
+                if recipe is not None and record.parsed and \
+                        store is not None:
+                    store.update_package(
+                        record.pkg, record.fingerprint, record.dependencies,
+                        event, dependency_resolver)
+
+    def prepare_package(
+        self, args, pkg, state, store, repository_index, license_index,
+        snapshot, rosdep_cache_id, manifest_cache=None
+    ):
+        """
+        Read the manifest of a package and parse it if the recipe is outdated.
+
+        :returns: The :class:`PackageRecord` of the package
+        """
+        record = PackageRecord(pkg)
+        package_manifest = self.read_package_manifest(pkg)
+        if package_manifest is not None:
+            with get_profiler().phase('fingerprint', pkg.name):
+                record.fingerprint = self.get_fingerprint(
+                    args, pkg, package_manifest, repository_index,
+                    license_index, snapshot['id'], rosdep_cache_id)
+            if not args.force and state is not None and state.is_up_to_date(
+                pkg.name, record.fingerprint
+            ) and (store is None or store.is_up_to_date(
+                pkg.name, record.fingerprint
+            )):
+                return record
+
+        record.metadata, record.parse_duration = self.parse_package(
+            pkg, package_manifest, snapshot.get('condition_context'),
+            manifest_cache)
+        record.parsed = True
+        return record
+
+    def submit_package(
+        self, args, record, dependency_resolver, repository_index,
+        license_index, state, output, executor
+    ):
+        """
+        Resolve the dependencies of a package and submit its recipe.
+
+        The dependencies are resolved in the calling thread so that each
+        new key is reported with the first package needing it.
+
+        :returns: The record, the report lines of the resolved dependencies
+          and the future of the recipe
+        """
+        if not record.parsed:
+            return record, [], executor.submit(
+                self.skip_package, record.pkg, state, output)
+
+        messages = []
+        if record.metadata is not None:
+            record.dependencies = {
+                category: getattr(record.metadata, category)
+                for category in DEPENDENCY_CATEGORIES}
+            with get_profiler().phase('resolve dependencies'):
+                messages = dependency_resolver.resolve_all(
+                    DependencyResolver.collect_keys(record.metadata))
+        future = executor.submit(
+            self.generate_package, args, record.pkg, record.metadata,
+            dependency_resolver, repository_index, license_index, output)
+        # The recipe holds all it needs from the metadata
+        record.metadata = None
+        return record, messages, future
+
+    def update_state(self, pkg, fingerprint, recipe, state, output):
+        """Record the recipe of a package and drop its previous version."""
+        previous = state.get_package(pkg.name)
+        if previous is not None and previous['recipe'] != \
+                os.path.relpath(recipe, state.build_base):
+            output.remove(previous['recipe'])
+        state.update_package(pkg.name, fingerprint, recipe)
+
+    def discover_packages(self, args, snapshot):
+        """
+        Discover the packages in the workspace using colcon.
+
+        If colcon would crawl the base paths the packages of unchanged
+        directories are taken from the :class:`DiscoveryCache`.
+        """
+        if not uses_recursive_crawl(args):
+            return get_package_descriptors(args)
+        discovery_cache = DiscoveryCache(args, read=not args.force)
+        descriptors = discovery_cache.discover()
+        discovery_cache.save()
+        return descriptors
+
+    def order_packages(self, descriptors):
+        """Order the packages topologically and decorate them."""
+        return topological_order_packages(
+            descriptors, recursive_categories=('run', ))
+
+    def create_repository_index(self, args, snapshot):
+        """Create the index providing the git metadata of the packages."""
+        return RepositoryIndex(args.rosdistro)
 
+    def select_changed_packages(self, args, packages, repository_index):
+        """
+        Select the packages whose recipes are affected by changes.
+
+        A recipe only contains the names of the dependencies, which are
+        resolved independently of the dependency packages, so the
+        dependents of a changed package are not affected.  Packages outside
+        of a git repository are always selected with --changed-since.
+
+        :returns: The affected packages in topological order
+        """
+        if getattr(args, 'changed_paths', None) is not None:
+            paths = [os.path.abspath(path) for path in args.changed_paths]
+            names = map_changed_paths(paths, packages, repository_index)
+        else:
+            packages_by_root = {}
+            for pkg in packages:
+                packages_by_root.setdefault(
+                    repository_index.find_working_tree(pkg.path), []
+                ).append(pkg)
+            names = set()
+            paths = []
+            for root, root_packages in sorted(
+                packages_by_root.items(), key=lambda item: str(item[0])
+            ):
+                changed_paths = None
+                if root is not None:
+                    try:
+                        changed_paths = list_changed_paths(
+                            root, args.changed_since)
+                    except ChangesUnavailable as e:
+                        print(
+                            f'\t- Warning: {e.message}, selecting all '
+                            'packages of the repository')
+                if changed_paths is None:
+                    names.update(pkg.name for pkg in root_packages)
+                else:
+                    paths += changed_paths
+            names |= map_changed_paths(paths, packages, repository_index)
+
+        changed_packages = [pkg for pkg in packages if pkg.name in names]
+        print(
+            f'{len(changed_packages)} of {len(packages)} packages are '
+            'affected by the changes')
+        return changed_packages
+
+    def get_repository_key(self, pkg, repository_index):
+        """Return the key of the repository of a package for sharding."""
+        return repository_index.find_working_tree(pkg.path) or pkg.path
+
+    def get_license_files(self, pkg, repository_index, license_index):
+        """
+        Get the license files of a package and the root of its repository.
+
+        :returns: A list of the paths relative to the package and the md5
+          checksums of the license files
+        """
+        return license_index.get_license_files(
+            pkg.path, repository_index.find_working_tree(pkg.path))
+
+    def get_package_manifest_path(self, pkg):
+        """Return the location of the manifest of a package."""
+        return os.path.join(pkg.path, self.ros_package_manifest)
+
+    def report_package(self, warnings, lines, event, events):
+        """Print the report of a package and write its event."""
+        if events is not None:
+            events.write_event(event)
+
+        for warning in warnings:
+            print(warning)
         for line in lines:
             print(line)
+        sys.stdout.flush()
+
+    def read_package_manifest(self, pkg):
+        """Read the raw manifest of a package or None if it has none."""
+        package_manifest_path = self.get_package_manifest_path(pkg)
+        if not os.path.exists(package_manifest_path):
+            return None
+        with open(package_manifest_path, 'rb') as h:
+            return h.read()
+
+    def parse_package_manifest(self, package_manifest):
+        """Parse a raw manifest of :meth:`read_package_manifest`."""
+        if package_manifest is None:
+            return None
+        return PackageMetadata(package_manifest.decode('utf-8'), None)
+
+    def parse_package(
+        self, pkg, package_manifest, condition_context=None,
+        manifest_cache=None
+    ):
+        """
+        Parse the manifest of a package and measure the duration.
+
+        :param condition_context: The context to evaluate the conditions of
+          the dependencies in
+        :param manifest_cache: The :class:`ManifestCache` to look up and
+          store the parsed manifest in
+        :returns: The package metadata and the wall time in seconds
+        """
+        with get_profiler().phase('parse', pkg.name) as timer:
+            pkg_metadata = None
+            if manifest_cache is not None:
+                pkg_metadata = manifest_cache.get(package_manifest)
+            if pkg_metadata is None:
+                pkg_metadata = self.parse_package_manifest(package_manifest)
+                if manifest_cache is not None:
+                    manifest_cache.add(package_manifest, pkg_metadata)
+            if pkg_metadata is not None and condition_context:
+                pkg_metadata = pkg_metadata.evaluate_conditions(
+                    condition_context)
+        return pkg_metadata, timer.wall
+
+    def get_fingerprint(
+        self, args, pkg, package_manifest, repository_index, license_index,
+        snapshot_id, rosdep_cache_id
+    ):
+        """Compute the fingerprint of all inputs of the recipe of a package."""
+        git_metadata = None
+        try:
+            repo_info = repository_index.get_repository(pkg.path)
+        except RepositoryUnavailable:
+            # The recipe is generated without the git metadata
+            pass
+        else:
+            git_metadata = [
+                repo_info.src_uri, repo_info.branch, repo_info.srcrev,
+                repo_info.repo_name, repo_info.tag_name,
+                repo_info.get_package_path(pkg.path)]
+
+        return compute_fingerprint(
+            package_manifest=package_manifest,
+            git=git_metadata,
+            license_files=self.get_license_files(
+                pkg, repository_index, license_index),
+            rosdistro=args.rosdistro,
+            rosdistro_snapshot=snapshot_id,
+            rosdep_cache=rosdep_cache_id,
+            mash_version=mash.__version__)
+
+    def skip_package(self, pkg, state, output):
+        """Report a package whose recipe is up to date."""
+        recipe_relpath = state.get_package(pkg.name)['recipe']
+        output.keep(recipe_relpath)
+        recipe = os.path.join(state.build_base, recipe_relpath)
+        lines = [
+            f'{pkg.name:<30}\t{str(pkg.path):<30}\t({pkg.type})',
+            f'\t- Bitbake recipe: {recipe} (up to date)',
+        ]
+        event = self.create_event(pkg, 'up-to-date')
+        event['recipe'] = recipe
+        return [], lines, recipe, event
+
+    def create_event(self, pkg, status):
+        """Create the event describing the result of a package."""
+        return {
+            'event': 'package',
+            'name': pkg.name,
+            'path': str(pkg.path),
+            'type': pkg.type,
+            'status': status,
+            'version': None,
+            'license': None,
+            'recipe': None,
+            'dependencies': None,
+            'unresolved_keys': None,
+            'git': None,
+            'warnings': [],
+            'durations': {},
+        }
+
+    def generate_package(
+        self, args, pkg, pkg_metadata, dependency_resolver, repository_index,
+        license_index, output
+    ):
+        """
+        Generate the recipe of a single package.
+
+        :returns: The warnings, the report lines, the recipe file and the
+          event of the package
+        """
+        warnings = []
+        lines = []
+        event = self.create_event(pkg, 'generated')
+        durations = event['durations']
+        profiler = get_profiler()
+
+        lines.append(f'{pkg.name:<30}\t{str(pkg.path):<30}\t({pkg.type})')
+
+        recipe_name = pkg.name.lower().replace('_', '-')
+
+        package_manifest_path = self.get_package_manifest_path(pkg)
+        if pkg_metadata is None:
+            lines.append(f'\t- No ROS package manifest found for {pkg.name}')
+            event['status'] = 'no-manifest'
+            return warnings, lines, None, event
+
+        lines.append(f'\t- ROS package manifest: {package_manifest_path}')
+
+        bitbake_recipe = BitbakeRecipe()
+        bitbake_recipe.set_rosdistro(args.rosdistro)
+        bitbake_recipe.set_dependency_resolver(dependency_resolver)
+        with profiler.phase('import', pkg.name) as timer:
+            bitbake_recipe.importPackage(pkg_metadata)
+        durations['import'] = timer.wall
+        event['version'] = bitbake_recipe.version
+        event['license'] = ' & '.join(bitbake_recipe.license)
+        for license_str in pkg_metadata.upstream_license:
+            for name, spdx_id in get_guessed_licenses(license_str):
+                warnings.append(
+                    f"\t- Warning: The license '{name}' of {pkg.name} is "
+                    f'assumed to be {spdx_id}')
+
+        dependency_keys = DependencyResolver.collect_keys(pkg_metadata)
+        event['dependencies'] = {
+            key: dependency_resolver.resolve(key)
+            for key in sorted(dependency_keys)}
+        event['unresolved_keys'] = sorted(
+            dependency_keys & dependency_resolver.unresolved_keys)
+
+        # Get source URI and revision
+        with profiler.phase('git', pkg.name) as timer:
+            try:
+                repo_info = repository_index.get_repository(pkg.path)
+            except RepositoryUnavailable as e:
+                repo_info = None
+                warnings.append(
+                    '\t- Warning: Could not open git repository for package '
+                    f'{pkg.name}: {e}')
+        durations['git'] = timer.wall
+
+        if repo_info is None and self.requires_repository:
+            # A recipe without SRC_URI and SRCREV cannot be built
+            lines.append(f'\t- Skipped, the source of {pkg.name} is unknown')
+            event['status'] = 'no-source'
+            event['warnings'] = [warning.strip() for warning in warnings]
+            return warnings, lines, None, event
+
+        if repo_info is not None:
+            git_relpath = repo_info.get_package_path(pkg.path)
+
+            bitbake_recipe.set_pkg_path(str(git_relpath))
+            lines.append(f'\t- Package repo path: {git_relpath}')
+
+            bitbake_recipe.set_git_metadata(
+                repo_info.src_uri, repo_info.branch, repo_info.srcrev,
+                repo_info.repo_name, repo_info.tag_name)
+            event['git'] = {
+                'src_uri': repo_info.src_uri,
+                'branch': repo_info.branch,
+                'srcrev': repo_info.srcrev,
+                'tag': repo_info.tag_name,
+                'path': git_relpath,
+            }
+
+        with profiler.phase('license files', pkg.name) as timer:
+            bitbake_recipe.set_license_files(self.get_license_files(
+                pkg, repository_index, license_index))
+        durations['license files'] = timer.wall
+
+        recipe_relpath = os.path.join(
+            recipe_name, bitbake_recipe.bitbake_recipe_filename())
+        with profiler.phase('render', pkg.name) as timer:
+            recipe_text = bitbake_recipe.get_recipe_text()
+        durations['render'] = timer.wall
+        with profiler.phase('write', pkg.name) as timer:
+            ros_bitbake_recipe = output.add(recipe_relpath, recipe_text)
+        durations['write'] = timer.wall
+        lines.append(f'\t- Bitbake recipe: {ros_bitbake_recipe}')
+        event['recipe'] = ros_bitbake_recipe
+        event['warnings'] = [warning.strip() for warning in warnings]
+
+        # Remove recipes of other versions of the package
+        if output.build_base is None:
+            recipe_dir = None
+        else:
+            recipe_dir = os.path.join(output.build_base, recipe_name)
+        if recipe_dir is not None and os.path.isdir(recipe_dir):
+            for filename in sorted(os.listdir(recipe_dir)):
+                if filename.endswith('.bb') and \
+                        filename != os.path.basename(recipe_relpath):
+                    output.remove(os.path.join(recipe_name, filename))
+
+        return warnings, lines, ros_bitbake_recipe, event
@@ -0,0 +1,276 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from pathlib import Path
+from xml.etree import ElementTree
+
+from colcon_core.package_decorator import PackageDecorator
+from colcon_core.package_descriptor import PackageDescriptor
+from colcon_core.package_selection import get_package_selection_extensions
+from mash.PackageMetadata import evaluate_condition
+from mash.ReleaseRepositoryIndex import ReleaseRepositoryIndex
+from mash.rosdistro_support import load_package_xmls
+from mash.rosdistro_support import refresh_snapshot
+from mash.rosdistro_support import SnapshotUnavailable
+from mash.verb.bitbake import BitbakeVerb
+
+"""The colcon dependency categories of the dependency tags of a manifest"""
+DEPENDENCY_TAG_CATEGORIES = {
+    'depend': ('build', 'run'),
+    'build_depend': ('build', ),
+    'buildtool_depend': ('build', ),
+    'build_export_depend': ('run', ),
+    'buildtool_export_depend': ('run', ),
+    'exec_depend': ('run', ),
+    'run_depend': ('run', ),
+}
+
+
+def get_manifest_dependencies(package_xml, condition_context):
+    """
+    Get the build type and dependencies of a package manifest.
+
+    Only the few elements needed to order the packages are read, which is
+    much faster than parsing the whole manifest with catkin_pkg.
+    Test dependencies are ignored since they may be circular across a whole
+    distribution.
+
+    :param package_xml: The content of the manifest
+    :param condition_context: The variables to evaluate conditions with
+    :returns: The build type and a dictionary of the dependency names by
+      colcon category
+    """
+    root = ElementTree.fromstring(package_xml)
+    dependencies = {'build': set(), 'run': set()}
+    for element in root:
+        categories = DEPENDENCY_TAG_CATEGORIES.get(element.tag)
+        if categories is None or not element.text:
+            continue
+        condition = element.get('condition')
+        if condition and not evaluate_condition(
+            condition, tuple(sorted(condition_context.items()))
+        ):
+            continue
+        for category in categories:
+            dependencies[category].add(element.text.strip())
+
+    build_type = root.findtext('export/build_type', 'catkin').strip()
+    return build_type, dependencies
+
+
+class _PackageGraph:
+    """The dependencies between the packages of a distribution."""
+
+    def __init__(self, descriptors):  # noqa: D107
+        self.names = {descriptor.name for descriptor in descriptors}
+        self.dependencies = {}
+        self.run_dependencies = {}
+        for descriptor in descriptors:
+            self.dependencies[descriptor.name] = {
+                dep for dep in descriptor.get_dependencies()
+                if dep in self.names and dep != descriptor.name}
+            self.run_dependencies[descriptor.name] = {
+                dep for dep in descriptor.get_dependencies(
+                    categories=('run', ))
+                if dep in self.names and dep != descriptor.name}
+        self.order = []
+        self.cycles = []
+        self._positions = {}
+        self._run_closures = None
+
+    def sort(self):
+        """
+        Order the packages topologically.
+
+        Like colcon, all packages whose dependencies are ordered are added
+        in alphabetical order before the next ones.  Packages in or depending
+        on a dependency cycle are appended in alphabetical order.
+        """
+        dependents = {name: [] for name in self.names}
+        remaining = {}
+        for name, deps in self.dependencies.items():
+            remaining[name] = len(deps)
+            for dep in deps:
+                dependents[dep].append(name)
+
+        layer = sorted(name for name, count in remaining.items() if not count)
+        while layer:
+            self.order.extend(layer)
+            next_layer = []
+            for name in layer:
+                del remaining[name]
+                for dependent in dependents[name]:
+                    remaining[dependent] -= 1
+                    if not remaining[dependent]:
+                        next_layer.append(dependent)
+            layer = sorted(next_layer)
+
+        self.cycles = sorted(remaining)
+        self.order.extend(self.cycles)
+        self._positions = {name: i for i, name in enumerate(self.order)}
+
+    def get_recursive_dependencies(self, name):
+        """
+        Get the recursive dependencies of a package in topological order.
+
+        As for colcon the direct dependencies of all categories and their
+        recursive run dependencies are considered.
+        """
+        if self._run_closures is None:
+            # Computed on first use only, most runs select no packages
+            self._run_closures = {}
+            for pkg_name in self.order:
+                closure = set()
+                for dep in self.run_dependencies[pkg_name]:
+                    closure.add(dep)
+                    closure |= self._run_closures.get(dep, set())
+                self._run_closures[pkg_name] = closure
+        dependencies = set()
+        for dep in self.dependencies[name]:
+            dependencies.add(dep)
+            dependencies |= self._run_closures[dep]
+        dependencies.discard(name)
+        return sorted(dependencies, key=self._positions.__getitem__)
+
+
+class _PackageDecorator(PackageDecorator):
+    """A package decorator computing its recursive dependencies on demand."""
+
+    def __init__(self, descriptor, graph):  # noqa: D107
+        self._graph = graph
+        super().__init__(descriptor)
+
+    @property
+    def recursive_dependencies(self):  # noqa: D102
+        if self._recursive_dependencies is None:
+            self._recursive_dependencies = \
+                self._graph.get_recursive_dependencies(self.descriptor.name)
+        return self._recursive_dependencies
+
+    @recursive_dependencies.setter
+    def recursive_dependencies(self, value):
+        self._recursive_dependencies = value
+
+
+class DistroVerb(BitbakeVerb):
+    """Generate Bitbake recipes for the packages released in a distribution."""
+
+    rosdistro_specific_packages = True
+    # The release repository is the only source of a package
+    requires_repository = True
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        self._package_xmls = {}
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        self.add_recipe_arguments(parser)
+
+        # Packages are not discovered in a workspace, so only the package
+        # selection arguments apply
+        group = parser.add_argument_group(title='Package selection arguments')
+        for extension in get_package_selection_extensions().values():
+            extension.add_arguments(parser=group)
+
+    def discover_packages(self, args, snapshot):
+        """
+        Create the descriptors of the released packages of the snapshot.
+
+        :raises: :exc:`SnapshotUnavailable` if the release package manifests
+          are not cached and mash is offline
+        """
+        package_xmls = load_package_xmls(snapshot)
+        if package_xmls is None:
+            if args.offline:
+                raise SnapshotUnavailable(
+                    'No release package manifests for '
+                    f"'{args.rosdistro}' in the cache, run 'mash refresh "
+                    f"--rosdistro {args.rosdistro}' while online")
+            # Snapshots of previous versions do not include the manifests
+            snapshot.update(refresh_snapshot(args.rosdistro))
+            package_xmls = load_package_xmls(snapshot)
+        self._package_xmls = package_xmls
+
+        condition_context = snapshot['condition_context']
+        descriptors = set()
+        for pkg_name in snapshot['released_packages']:
+            repo_name = snapshot['package_repositories'][pkg_name]
+            descriptor = PackageDescriptor(Path(repo_name, pkg_name))
+            descriptor.name = pkg_name
+            descriptor.type = 'ros.catkin'
+            package_xml = package_xmls.get(pkg_name)
+            if package_xml is not None:
+                try:
+                    build_type, dependencies = get_manifest_dependencies(
+                        package_xml, condition_context)
+                except (ElementTree.ParseError, ValueError) as e:
+                    print(
+                        '\t- Warning: Could not read the manifest of '
+                        f'{pkg_name}: {e}')
+                else:
+                    descriptor.type = f'ros.{build_type}'
+                    descriptor.dependencies.update(dependencies)
+            descriptors.add(descriptor)
+
+        pkg_names = {descriptor.name for descriptor in descriptors}
+        for extension in get_package_selection_extensions().values():
+            extension.check_parameters(args=args, pkg_names=pkg_names)
+        return descriptors
+
+    def order_packages(self, descriptors):
+        """
+        Order the released packages topologically.
+
+        colcon computes the recursive dependencies of every package up front,
+        which does not scale to a whole distribution.
+        """
+        graph = _PackageGraph(descriptors)
+        graph.sort()
+        if graph.cycles:
+            print(
+                '\t- Warning: Packages in or depending on a dependency cycle: '
+                f"{', '.join(graph.cycles)}")
+        by_name = {descriptor.name: descriptor for descriptor in descriptors}
+        return [
+            _PackageDecorator(by_name[name], graph)
+            for name in graph.order]
+
+    def create_repository_index(self, args, snapshot):
+        """Create the index of the release repositories of the packages."""
+        return ReleaseRepositoryIndex(snapshot, offline=args.offline)
+
+    def get_repository_key(self, pkg, repository_index):
+        """Return the name of the repository of a package in the snapshot."""
+        return repository_index.snapshot['package_repositories'].get(
+            pkg.name, pkg.name)
+
+    def get_license_files(self, pkg, repository_index, license_index):
+        """Return no license files, the release repositories are not cloned."""
+        return []
+
+    def get_package_manifest_path(self, pkg):
+        """Return the location of the manifest in the distribution cache."""
+        return f'{pkg.path}/{self.ros_package_manifest}'
+
+    def parse_package(
+        self, pkg, package_manifest, condition_context=None,
+        manifest_cache=None
+    ):
+        """Parse a release manifest, reporting invalid ones as missing."""
+        from catkin_pkg.package import InvalidPackage
+
+        try:
+            return super().parse_package(
+                pkg, package_manifest, condition_context, manifest_cache)
+        except InvalidPackage as e:
+            print(
+                '\t- Warning: Invalid release package manifest of '
+                f'{pkg.name}: {e}')
+            return None, 0.0
+
+    def read_package_manifest(self, pkg):
+        """Read the manifest of a package from the distribution cache."""
+        package_xml = self._package_xmls.get(pkg.name)
+        if package_xml is None:
+            return None
+        return package_xml.encode('utf-8')
@@ -0,0 +1,214 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import json
+import os
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_core.verb import VerbExtensionPoint
+from mash.ArchiveOutput import ArchiveOutput
+from mash.ArchiveOutput import get_archive_format
+from mash.EventWriter import EventWriter
+from mash.GenerationState import GenerationState
+from mash.OutputManager import OutputManager
+
+
+class MergeVerb(VerbExtensionPoint):
+    """Merge the recipes generated by the shards of a workspace."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(VerbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.add_argument(
+            'shards',
+            nargs='+',
+            metavar='SHARD',
+            help='The build bases of all shards generated with --shard'
+        )
+        parser.add_argument(
+            '--build-base',
+            default='build_mash',
+            help='The base directory of the merged recipes '
+                 '(default: build_mash)'
+        )
+        parser.add_argument(
+            '--archive',
+            metavar='PATH',
+            help='Write the merged recipes and a conf/layer.conf into a '
+                 'single archive instead of the build base'
+        )
+        parser.add_argument(
+            '--layer-name',
+            metavar='NAME',
+            help='The collection name of the layer in the archive '
+                 '(default: mash-<rosdistro>)'
+        )
+        parser.add_argument(
+            '--reports',
+            nargs='+',
+            default=[],
+            metavar='PATH',
+            help='The files written with --events-json by the shards'
+        )
+        parser.add_argument(
+            '--events-json',
+            metavar='PATH',
+            help='Write the package events of the reports followed by a '
+                 'summary of the merge'
+        )
+
+    def main(self, *, context):  # noqa: D102
+        args = context.args
+        if args.archive and get_archive_format(args.archive) is None:
+            return f"Error: Unsupported archive format of '{args.archive}'"
+        if args.events_json and not args.reports:
+            return 'Error: --events-json requires the --reports of the shards'
+
+        build_base = os.path.abspath(args.build_base)
+        shards = []
+        for shard_path in args.shards:
+            shard_path = os.path.abspath(shard_path)
+            if not args.archive and shard_path == build_base:
+                return f"Error: The shard '{shard_path}' is the build base"
+            state = GenerationState(shard_path)
+            if not state.shard:
+                return f"Error: '{shard_path}' is not the build base of a " \
+                    'shard'
+            shards.append(state)
+
+        rc = self.check_shards(shards)
+        if rc:
+            return rc
+        recipes = {}
+        owners = {}
+        for state in shards:
+            for name, entry in state.packages.items():
+                if name in recipes:
+                    return f"Error: Package '{name}' is in several shards"
+                relpath = entry['recipe']
+                if relpath in owners:
+                    return f"Error: Recipe '{relpath}' of package '{name}' " \
+                        f"conflicts with package '{owners[relpath]}'"
+                path = os.path.join(state.build_base, relpath)
+                if not os.path.isfile(path):
+                    return f"Error: Recipe '{path}' of package '{name}' is " \
+                        'missing'
+                recipes[name] = (state, entry)
+                owners[relpath] = name
+
+        package_events = {}
+        unresolved_keys = set()
+        for report in args.reports:
+            try:
+                events = self.read_report(report)
+            except (OSError, ValueError) as e:
+                return f"Error: Could not read report '{report}': {e}"
+            for event in events:
+                if event.get('event') == 'summary':
+                    unresolved_keys.update(event.get('unresolved_keys', []))
+                    continue
+                name = event.get('name')
+                if name in package_events:
+                    return f"Error: Package '{name}' is in several reports"
+                package_events[name] = event
+
+        rosdistro = shards[0].shard['rosdistro']
+        if args.archive:
+            state = None
+            output = ArchiveOutput(
+                args.archive, args.layer_name or f'mash-{rosdistro}')
+        else:
+            state = GenerationState(build_base)
+            output = OutputManager(build_base)
+            for name in sorted(set(state.packages) - set(recipes)):
+                output.remove(state.get_package(name)['recipe'])
+                state.remove_package(name)
+
+        locations = {}
+        try:
+            for name in sorted(recipes):
+                shard_state, entry = recipes[name]
+                with open(
+                    os.path.join(shard_state.build_base, entry['recipe']), 'r'
+                ) as h:
+                    content = h.read()
+                location = output.add(entry['recipe'], content)
+                output.flush(location)
+                locations[name] = location
+                if state is not None:
+                    previous = state.get_package(name)
+                    if previous is not None and \
+                            previous['recipe'] != entry['recipe']:
+                        output.remove(previous['recipe'])
+                    state.update_package(name, entry['fingerprint'], location)
+            output.commit()
+        finally:
+            # Discard the files of a failed merge
+            output.close()
+        if state is not None:
+            state.save()
+
+        if args.events_json:
+            self.write_events(
+                args.events_json, rosdistro, package_events, locations,
+                unresolved_keys, output)
+        print(f'Merged {len(shards)} shards')
+        print(output.get_summary())
+
+    def check_shards(self, shards):
+        """
+        Check that the shards are exactly the shards of one run.
+
+        :returns: An error message or None
+        """
+        count = shards[0].shard['count']
+        rosdistro = shards[0].shard['rosdistro']
+        indexes = set()
+        for state in shards:
+            shard = state.shard
+            if shard['count'] != count:
+                return f"Error: '{state.build_base}' is shard " \
+                    f"{shard['index']} of {shard['count']}, not of {count}"
+            if shard['rosdistro'] != rosdistro:
+                return f"Error: '{state.build_base}' was generated for " \
+                    f"{shard['rosdistro']}, not {rosdistro}"
+            if shard['index'] in indexes:
+                return f"Error: Shard {shard['index']} is given twice"
+            indexes.add(shard['index'])
+        missing = sorted(set(range(1, count + 1)) - indexes)
+        if missing:
+            return 'Error: Missing shards ' + ', '.join(
+                str(index) for index in missing)
+        return None
+
+    def read_report(self, path):
+        """Read the events of a report written with --events-json."""
+        with open(path, 'r') as h:
+            return [json.loads(line) for line in h if line.strip()]
+
+    def write_events(
+        self, path, rosdistro, package_events, locations, unresolved_keys,
+        output
+    ):
+        """Write the package events with their merged recipes and a summary."""
+        events = EventWriter(path)
+        try:
+            for name in sorted(package_events):
+                event = package_events[name]
+                if event.get('recipe') is not None:
+                    event['recipe'] = locations.get(name, event['recipe'])
+                events.write_event(event)
+            events.write_event({
+                'event': 'summary',
+                'rosdistro': rosdistro,
+                'shard': None,
+                'added': output.added,
+                'changed': output.changed,
+                'unchanged': output.unchanged,
+                'removed': output.removed,
+                'unresolved_keys': sorted(unresolved_keys),
+            })
+        finally:
+            events.close()
@@ -0,0 +1,119 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import sqlite3
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_core.verb import VerbExtensionPoint
+from mash.MetadataStore import open_metadata_store
+
+"""The SQL statements of the predefined queries"""
+QUERIES = {
+    'depends_on': (
+        'SELECT package, category, key, recipe FROM dependencies '
+        'WHERE key = ? OR recipe = ? ORDER BY package, category'),
+    'resolution': (
+        'SELECT rosdistro, key, recipe, fallback FROM resolutions '
+        'WHERE key = ? OR recipe = ? ORDER BY rosdistro, key'),
+    'fallbacks': (
+        'SELECT rosdistro, key, recipe FROM resolutions '
+        'WHERE fallback ORDER BY rosdistro, key'),
+}
+
+
+class QueryVerb(VerbExtensionPoint):
+    """Query the metadata database of generated recipes."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(VerbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.add_argument(
+            '--metadata-db',
+            required=True,
+            metavar='PATH',
+            help='The database written with --metadata-db'
+        )
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument(
+            '--depends-on',
+            metavar='NAME',
+            help='List the packages depending on a ROS dependency key or '
+                 'recipe name'
+        )
+        group.add_argument(
+            '--resolution',
+            metavar='NAME',
+            help='Show what a ROS dependency key was mapped to, or which '
+                 'keys were mapped to a recipe name'
+        )
+        group.add_argument(
+            '--fallbacks',
+            action='store_true',
+            help='List the dependency keys which rosdep could not resolve '
+                 'and were mapped by naming convention'
+        )
+        group.add_argument(
+            '--info',
+            metavar='NAME',
+            help='Show the recipe, git metadata and dependencies of a package'
+        )
+        group.add_argument(
+            '--sql',
+            metavar='STATEMENT',
+            help='Run an SQL statement on the read-only database'
+        )
+
+    def main(self, *, context):  # noqa: D102
+        args = context.args
+        try:
+            connection = open_metadata_store(args.metadata_db)
+        except sqlite3.Error as e:
+            return f'Error: {e}'
+        try:
+            if args.info:
+                return self.show_package(connection, args.info)
+            if args.depends_on:
+                cursor = connection.execute(
+                    QUERIES['depends_on'], (args.depends_on, ) * 2)
+            elif args.resolution:
+                cursor = connection.execute(
+                    QUERIES['resolution'], (args.resolution, ) * 2)
+            elif args.fallbacks:
+                cursor = connection.execute(QUERIES['fallbacks'])
+            else:
+                cursor = connection.execute(args.sql)
+            for row in cursor:
+                print('\t'.join(str(value) for value in row))
+        except sqlite3.Error as e:
+            return f'Error: {e}'
+        finally:
+            connection.close()
+
+    def show_package(self, connection, name):
+        """Print the records of a package."""
+        connection.row_factory = sqlite3.Row
+        row = connection.execute(
+            'SELECT * FROM packages WHERE name = ?', (name, )).fetchone()
+        if row is None:
+            return f"Error: Package '{name}' is not in the database"
+        for key in row.keys():
+            print(f'{key}: {row[key]}')
+
+        git = connection.execute(
+            'SELECT * FROM git WHERE package = ?', (name, )).fetchone()
+        if git is not None:
+            for key in git.keys():
+                if key != 'package':
+                    print(f'git.{key}: {git[key]}')
+
+        category = None
+        for dep in connection.execute(
+            'SELECT category, key, recipe FROM dependencies '
+            'WHERE package = ? ORDER BY rowid', (name, )
+        ):
+            if dep['category'] != category:
+                category = dep['category']
+                print(f'{category}:')
+            print(f"\t- {dep['key']}: {dep['recipe']}")
@@ -0,0 +1,35 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_core.verb import VerbExtensionPoint
+from mash.rosdistro_support import get_snapshot_path
+from mash.rosdistro_support import refresh_snapshot
+
+
+class RefreshVerb(VerbExtensionPoint):
+    """Refresh the cached rosdistro snapshot."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(VerbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.add_argument(
+            '--rosdistro',
+            nargs='+',
+            default=[os.environ.get('ROSDISTRO')],
+            help='Names of the rosdistros to refresh'
+        )
+
+    def main(self, *, context):  # noqa: D102
+        for distro_name in context.args.rosdistro:
+            if not distro_name:
+                return 'Error: No rosdistro provided'
+            snapshot = refresh_snapshot(distro_name)
+            print(
+                f"{distro_name:<30}\t{len(snapshot['released_packages'])} "
+                f"released packages\t({snapshot['id'][:12]})")
+            print(f'\t- Snapshot: {get_snapshot_path(distro_name)}')
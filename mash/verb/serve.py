@@ -0,0 +1,29 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from colcon_core.plugin_system import satisfies_version
+from colcon_core.verb import VerbExtensionPoint
+from mash.client import get_default_socket_path
+from mash.GenerationServer import GenerationServer
+from mash.verb.bitbake import BitbakeVerb
+
+
+class ServeVerb(VerbExtensionPoint):
+    """Serve recipe generation requests of mash-client with warm caches."""
+
+    def __init__(self):  # noqa: D107
+        super().__init__()
+        satisfies_version(VerbExtensionPoint.EXTENSION_POINT_VERSION, '^1.0')
+
+    def add_arguments(self, *, parser):  # noqa: D102
+        parser.add_argument(
+            '--socket',
+            default=get_default_socket_path(),
+            metavar='PATH',
+            help='The Unix socket to listen on '
+                 '(default: $MASH_SERVER_SOCKET or $MASH_HOME/server.sock)'
+        )
+
+    def main(self, *, context):  # noqa: D102
+        server = GenerationServer(BitbakeVerb(), context.args.socket)
+        return server.serve_forever()
@@ -0,0 +1,173 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tarfile
+import time
+import zipfile
+
+from mash.ArchiveOutput import ArchiveOutput
+from mash.ArchiveOutput import format_layer_conf
+from mash.ArchiveOutput import get_archive_format
+from mash.ArchiveOutput import ZIP_EPOCH
+import pytest
+
+BENCHMARK_PATH = Path(__file__).parents[1] / 'benchmark'
+
+"""The archive formats with an extension of each"""
+EXTENSIONS = ['.tar', '.tar.gz', '.tar.bz2', '.tar.xz', '.zip']
+
+
+def _read_archive(path):
+    """Return the names, contents, timestamps and modes of the entries."""
+    entries = []
+    if str(path).endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                entries.append((
+                    info.filename, archive.read(info).decode(),
+                    info.date_time, info.external_attr >> 16))
+    else:
+        with tarfile.open(path) as archive:
+            for info in archive.getmembers():
+                entries.append((
+                    info.name, archive.extractfile(info).read().decode(),
+                    info.mtime, info.mode))
+    return entries
+
+
+def _write_archive(path, layer_name='mash-humble'):
+    output = ArchiveOutput(str(path), layer_name)
+    location = output.add('pkg_b/pkg_b_1.0.bb', 'recipe b\n')
+    assert location == str(path / 'pkg_b' / 'pkg_b_1.0.bb')
+    output.flush(location)
+    output.add('pkg_c/pkg_c_1.0.bb', 'recipe c\n')
+    output.add('pkg_a/pkg_a_1.0.bb', 'recipe a\n')
+    output.remove('pkg_d/pkg_d_1.0.bb')
+    assert not path.exists()
+    output.commit()
+    return output
+
+
+@pytest.mark.parametrize('path, archive_format', [
+    ('layer.tar', 'tar'),
+    ('layer.tar.gz', 'tar.gz'),
+    ('layer.tgz', 'tar.gz'),
+    ('layer.tar.bz2', 'tar.bz2'),
+    ('layer.tar.xz', 'tar.xz'),
+    ('layer.zip', 'zip'),
+    ('layer.gz', None),
+    ('layer', None),
+])
+def test_get_archive_format(path, archive_format):
+    assert get_archive_format(path) == archive_format
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        ArchiveOutput(str(tmp_path / 'layer.rar'), 'mash-humble')
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize('extension', EXTENSIONS)
+def test_commit(tmp_path, monkeypatch, extension):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    path = tmp_path / 'out' / f'layer{extension}'
+    output = _write_archive(path)
+    assert os.listdir(tmp_path / 'out') == [path.name]
+    assert output.get_summary() == f'Recipes: 3 written to {path}'
+
+    entries = _read_archive(path)
+    # Flushed files first, the remaining ones are sorted on commit
+    assert [(name, content) for name, content, _, _ in entries] == [
+        ('conf/layer.conf', format_layer_conf('mash-humble')),
+        ('pkg_b/pkg_b_1.0.bb', 'recipe b\n'),
+        ('pkg_a/pkg_a_1.0.bb', 'recipe a\n'),
+        ('pkg_c/pkg_c_1.0.bb', 'recipe c\n'),
+    ]
+    mtime = 1700000000
+    if extension == '.zip':
+        mtime = time.gmtime(mtime)[:6]
+    assert {(timestamp, mode) for _, _, timestamp, mode in entries} == {
+        (mtime, 0o100644 if extension == '.zip' else 0o644)}
+
+
+@pytest.mark.parametrize('extension', EXTENSIONS)
+def test_reproducible(tmp_path, monkeypatch, extension):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    _write_archive(tmp_path / f'first{extension}')
+    _write_archive(tmp_path / f'second{extension}')
+    assert (tmp_path / f'first{extension}').read_bytes() == \
+        (tmp_path / f'second{extension}').read_bytes()
+
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1800000000')
+    _write_archive(tmp_path / f'third{extension}')
+    assert (tmp_path / f'first{extension}').read_bytes() != \
+        (tmp_path / f'third{extension}').read_bytes()
+
+
+def test_zip_epoch(tmp_path, monkeypatch):
+    monkeypatch.delenv('SOURCE_DATE_EPOCH', raising=False)
+    _write_archive(tmp_path / 'layer.zip')
+    assert {
+        timestamp for _, _, timestamp, _
+        in _read_archive(tmp_path / 'layer.zip')
+    } == {time.gmtime(ZIP_EPOCH)[:6]}
+
+
+def test_layer_conf():
+    conf = format_layer_conf('mash-jazzy')
+    assert 'BBFILE_COLLECTIONS += "mash-jazzy"\n' in conf
+    assert 'BBFILE_PATTERN_mash-jazzy = "^${LAYERDIR}/"\n' in conf
+    assert 'LAYERSERIES_COMPAT_mash-jazzy = "${LAYERSERIES_COMPAT_core}"\n' \
+        in conf
+
+
+@pytest.mark.parametrize('extension', EXTENSIONS)
+def test_close_without_commit(tmp_path, extension):
+    path = tmp_path / f'layer{extension}'
+    path.write_bytes(b'previous archive')
+    output = ArchiveOutput(str(path), 'mash-humble')
+    output.flush(output.add('pkg_a/pkg_a_1.0.bb', 'recipe a\n'))
+    output.close()
+    output.close()
+    assert os.listdir(tmp_path) == [path.name]
+    assert path.read_bytes() == b'previous archive'
+
+
+@pytest.fixture(scope='module')
+def synthetic_workspace(tmp_path_factory):
+    pytest.importorskip('rosdep2')
+    sys.path.insert(0, str(BENCHMARK_PATH))
+    try:
+        from synthetic_workspace import generate
+    finally:
+        sys.path.remove(str(BENCHMARK_PATH))
+    root = tmp_path_factory.mktemp('synthetic')
+    env = generate(
+        str(root), packages=12, repositories=3, released=4, system_keys=4)
+    return root, env
+
+
+def test_generate_archive(synthetic_workspace):
+    root, env = synthetic_workspace
+    for args in (
+        ['--build-base', 'recipes'],
+        ['--archive', 'layer.tar.gz', '--layer-name', 'synthetic'],
+    ):
+        subprocess.run(
+            [sys.executable, '-m', 'mash', *args], cwd=root / 'ws',
+            env={**os.environ, **env}, check=True, stdout=subprocess.DEVNULL)
+
+    recipes = {
+        str(path.relative_to(root / 'ws' / 'recipes')): path.read_text()
+        for path in (root / 'ws' / 'recipes').glob('*/*.bb')}
+    entries = {
+        name: content for name, content, _, _
+        in _read_archive(root / 'ws' / 'layer.tar.gz')}
+    assert len(recipes) == 12
+    assert entries.pop('conf/layer.conf') == format_layer_conf('synthetic')
+    assert entries == recipes
@@ -0,0 +1,109 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import subprocess
+from types import SimpleNamespace
+
+from mash.ChangeSelection import ChangesUnavailable
+from mash.ChangeSelection import list_changed_paths
+from mash.ChangeSelection import map_changed_paths
+from mash.RepositoryIndex import RepositoryIndex
+import pytest
+
+
+def _git(root, *args):
+    subprocess.run(
+        ['git', '-C', str(root), '-c', 'user.name=Test', '-c',
+         'user.email=test@example.com', '-c', 'commit.gpgsign=false', *args],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    root = tmp_path / 'repo'
+    for name in ('pkg_a', 'pkg_b'):
+        (root / name / 'src').mkdir(parents=True)
+        (root / name / 'package.xml').write_text(f'<name>{name}</name>\n')
+        (root / name / 'src' / 'main.cpp').write_text('int main() {}\n')
+    (root / 'LICENSE').write_text('License\n')
+    (root / 'README.md').write_text('Readme\n')
+    (root / '.gitignore').write_text('*.log\n')
+    _git(root, 'init', '-q')
+    _git(root, 'add', '.')
+    _git(root, 'commit', '-q', '-m', 'first')
+    return root.resolve()
+
+
+def _packages(root):
+    return [
+        SimpleNamespace(name=name, path=str(root / name))
+        for name in ('pkg_a', 'pkg_b')]
+
+
+def test_list_changed_paths(repository):
+    assert list_changed_paths(str(repository), 'HEAD') == []
+
+    (repository / 'pkg_a' / 'src' / 'main.cpp').write_text('int x;\n')
+    (repository / 'pkg_b' / 'new.cpp').write_text('int y;\n')
+    (repository / 'pkg_b' / 'build.log').write_text('ignored\n')
+    (repository / 'README.md').unlink()
+    assert sorted(list_changed_paths(str(repository), 'HEAD')) == [
+        str(repository / 'README.md'),
+        str(repository / 'pkg_a' / 'src' / 'main.cpp'),
+        str(repository / 'pkg_b' / 'new.cpp'),
+    ]
+
+
+def test_list_changed_paths_of_staged_files(repository):
+    (repository / 'pkg_a' / 'added.cpp').write_text('int z;\n')
+    _git(repository, 'add', 'pkg_a/added.cpp')
+    assert list_changed_paths(str(repository), 'HEAD') == [
+        str(repository / 'pkg_a' / 'added.cpp')]
+
+
+def test_list_changed_paths_after_commit(repository):
+    first = subprocess.run(
+        ['git', '-C', str(repository), 'rev-parse', 'HEAD'],
+        stdout=subprocess.PIPE, check=True).stdout.decode().strip()
+    _git(repository, 'tag', 'first')
+    (repository / 'pkg_a' / 'src' / 'main.cpp').write_text('int x;\n')
+    _git(repository, 'commit', '-q', '-a', '-m', 'second')
+    # The commit in every recipe changed
+    assert list_changed_paths(str(repository), first) is None
+    assert list_changed_paths(str(repository), 'first') is None
+    assert list_changed_paths(str(repository), 'HEAD') == []
+
+
+def test_list_changed_paths_unavailable(repository, tmp_path):
+    with pytest.raises(ChangesUnavailable) as e:
+        list_changed_paths(str(repository), 'unknown-revision')
+    assert 'unknown-revision' in e.value.message
+
+    (tmp_path / 'plain').mkdir()
+    with pytest.raises(ChangesUnavailable):
+        list_changed_paths(str(tmp_path / 'plain'), 'HEAD')
+
+
+@pytest.mark.parametrize('paths, names', [
+    ([], set()),
+    (['pkg_a/src/main.cpp'], {'pkg_a'}),
+    (['pkg_a'], {'pkg_a'}),
+    (['pkg_a/package.xml', 'pkg_b/src/new.cpp'], {'pkg_a', 'pkg_b'}),
+    # A license in the root of the repository is in every recipe
+    (['LICENSE'], {'pkg_a', 'pkg_b'}),
+    (['README.md'], set()),
+    (['docs/LICENSE'], set()),
+    (['pkg_b/LICENSE'], {'pkg_b'}),
+])
+def test_map_changed_paths(repository, paths, names):
+    paths = [str(repository / path) for path in paths]
+    assert map_changed_paths(
+        paths, _packages(repository), RepositoryIndex()) == names
+
+
+def test_map_changed_paths_outside_repository(repository, tmp_path):
+    (tmp_path / 'other').mkdir()
+    (tmp_path / 'other' / 'LICENSE').write_text('License\n')
+    assert map_changed_paths(
+        [str(tmp_path / 'other' / 'LICENSE')], _packages(repository),
+        RepositoryIndex()) == set()
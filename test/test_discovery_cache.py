@@ -0,0 +1,169 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import mash.DiscoveryCache
+from mash.DiscoveryCache import DiscoveryCache
+import pytest
+
+BENCHMARK_PATH = Path(__file__).parents[1] / 'benchmark'
+
+MANIFEST = """<?xml version="1.0"?>
+<package format="3">
+  <name>{name}</name>
+  <version>{version}</version>
+  <description>Package {name}</description>
+  <maintainer email="maintainer@example.com">Maintainer</maintainer>
+  <license>Apache-2.0</license>
+  <buildtool_depend>ament_cmake</buildtool_depend>
+  <export>
+    <build_type>ament_cmake</build_type>
+  </export>
+</package>
+"""
+
+
+def _write_package(path, name, version='1.0.0'):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / 'package.xml').write_text(
+        MANIFEST.format(name=name, version=version))
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        mash.DiscoveryCache, 'get_config_path', lambda: tmp_path / 'home')
+    src = tmp_path / 'ws' / 'src'
+    _write_package(src / 'repo_a' / 'pkg_a', 'pkg_a')
+    _write_package(src / 'repo_a' / 'pkg_b', 'pkg_b')
+    _write_package(src / 'repo_c', 'pkg_c')
+    (src / 'ignored').mkdir()
+    (src / 'ignored' / 'COLCON_IGNORE').touch()
+    _write_package(src / 'ignored' / 'pkg_d', 'pkg_d')
+    return src
+
+
+def _discover(src, read=True):
+    args = argparse.Namespace(
+        base_paths=[str(src)], paths=None, metas=[], packages_ignore=None,
+        packages_ignore_regex=None)
+    cache = DiscoveryCache(args, read=read)
+    descriptors = cache.discover()
+    cache.save()
+    return {desc.name: desc for desc in descriptors}
+
+
+def _count_identifications(monkeypatch):
+    calls = []
+    identify = mash.DiscoveryCache.identify
+
+    def counting_identify(extensions, path):
+        calls.append(path)
+        return identify(extensions, path)
+
+    monkeypatch.setattr(mash.DiscoveryCache, 'identify', counting_identify)
+    return calls
+
+
+def test_discover_from_cache(workspace, monkeypatch):
+    first = _discover(workspace)
+    assert sorted(first) == ['pkg_a', 'pkg_b', 'pkg_c']
+
+    calls = _count_identifications(monkeypatch)
+    second = _discover(workspace)
+    assert calls == []
+    assert sorted(second) == ['pkg_a', 'pkg_b', 'pkg_c']
+    for name, desc in first.items():
+        assert second[name].path == desc.path
+        assert second[name].type == desc.type
+        assert second[name].dependencies == desc.dependencies
+        assert second[name].metadata['version'] == desc.metadata['version']
+
+
+def test_discover_changed_package(workspace, monkeypatch):
+    _discover(workspace)
+    manifest = workspace / 'repo_a' / 'pkg_b' / 'package.xml'
+    manifest.write_text(MANIFEST.format(name='pkg_b', version='2.0.0'))
+    stat = manifest.stat()
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    calls = _count_identifications(monkeypatch)
+    descriptors = _discover(workspace)
+    assert calls == [str(workspace / 'repo_a' / 'pkg_b')]
+    assert descriptors['pkg_b'].metadata['version'] == '2.0.0'
+
+
+def test_discover_new_package(workspace, monkeypatch):
+    _discover(workspace)
+    _write_package(workspace / 'repo_e', 'pkg_e')
+    # The directory listing of the base path changed
+    stat = workspace.stat()
+    os.utime(workspace, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    calls = _count_identifications(monkeypatch)
+    descriptors = _discover(workspace)
+    assert str(workspace / 'repo_e') in calls
+    assert str(workspace / 'repo_a' / 'pkg_a') not in calls
+    assert sorted(descriptors) == ['pkg_a', 'pkg_b', 'pkg_c', 'pkg_e']
+
+
+def test_discover_without_reading(workspace, monkeypatch):
+    _discover(workspace)
+    calls = _count_identifications(monkeypatch)
+    assert sorted(_discover(workspace, read=False)) == [
+        'pkg_a', 'pkg_b', 'pkg_c']
+    assert str(workspace / 'repo_c') in calls
+
+
+def test_discover_other_environment(workspace, monkeypatch):
+    _discover(workspace)
+    monkeypatch.setenv('ROS_DISTRO', 'other')
+    calls = _count_identifications(monkeypatch)
+    _discover(workspace)
+    assert str(workspace / 'repo_c') in calls
+
+
+@pytest.fixture(scope='module')
+def synthetic_workspace(tmp_path_factory):
+    pytest.importorskip('rosdep2')
+    sys.path.insert(0, str(BENCHMARK_PATH))
+    try:
+        from synthetic_workspace import generate
+    finally:
+        sys.path.remove(str(BENCHMARK_PATH))
+    root = tmp_path_factory.mktemp('synthetic')
+    env = generate(
+        str(root), packages=12, repositories=3, released=4, system_keys=4)
+    # Conditions are evaluated by the pool workers of the generation
+    for manifest in (root / 'ws' / 'src').glob('*/*/package.xml'):
+        manifest.write_text(manifest.read_text().replace(
+            '  <test_depend>',
+            '  <depend condition="$ROS_VERSION == 2">rclcpp</depend>\n'
+            '  <depend condition="$ROS_VERSION == 1">roscpp</depend>\n'
+            '  <test_depend>', 1))
+    return root, env
+
+
+def test_generate_with_warm_cache(synthetic_workspace):
+    root, env = synthetic_workspace
+    recipes = []
+    for build_base in ('cold', 'warm'):
+        # A new process evaluates its first condition on the pool workers
+        # when the packages are not identified again
+        subprocess.run(
+            [sys.executable, '-m', 'mash', '--build-base', build_base,
+             '--parallel-workers', '4'],
+            cwd=root / 'ws', env={**os.environ, **env}, check=True,
+            stdout=subprocess.DEVNULL)
+        recipes.append({
+            path.relative_to(root / 'ws' / build_base): path.read_text()
+            for path in (root / 'ws' / build_base).glob('*/*.bb')})
+    assert len(recipes[0]) == 12
+    assert recipes[0] == recipes[1]
+    assert all('rclcpp' in text for text in recipes[1].values())
+    assert not any('roscpp' in text for text in recipes[1].values())
@@ -0,0 +1,278 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+import shutil
+import subprocess
+
+from mash.GitRefReader import CommitGraph
+from mash.GitRefReader import GitRefReader
+from mash.GitRefReader import read_git_index
+import pytest
+
+"""Committer date of the first commit, each commit is a minute later"""
+START_DATE = 1700000000
+
+
+class Repository:
+    """A throwaway git repository with increasing commit dates."""
+
+    def __init__(self, path):  # noqa: D107
+        self.path = path
+        self.date = START_DATE
+
+    def git(self, *args):
+        self.date += 60
+        date = f'@{self.date} +0000'
+        result = subprocess.run(
+            ['git', '-C', str(self.path), '-c', 'user.name=Test', '-c',
+             'user.email=test@example.com', '-c', 'commit.gpgsign=false',
+             '-c', 'tag.gpgsign=false', *args],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+            env={
+                **os.environ, 'GIT_AUTHOR_DATE': date,
+                'GIT_COMMITTER_DATE': date})
+        return result.stdout.decode().strip()
+
+    def commit(self, message):
+        # Similar files are stored as deltas in pack files
+        (self.path / f'{message}.txt').write_text(
+            'shared content\n' * 50 + f'{message}\n')
+        self.git('add', f'{message}.txt')
+        self.git('commit', '-q', '-m', message)
+        return self.git('rev-parse', 'HEAD')
+
+
+def _create_history(path):
+    path.mkdir()
+    repo = Repository(path)
+    repo.git('init', '-q', '-b', 'main')
+    repo.commit('c1')
+    repo.git('tag', '-a', '-m', 'first release', 'v0.1')
+    repo.git('branch', 'untagged')
+    c2 = repo.commit('c2')
+    repo.commit('c3')
+    repo.git('tag', 'light-1')
+
+    repo.git('checkout', '-q', '-b', 'feature', c2)
+    repo.commit('f1')
+    repo.git('tag', '-a', '-m', 'feature', 'f-1.0')
+    repo.commit('f2')
+
+    repo.git('checkout', '-q', 'main')
+    c4 = repo.commit('c4')
+    repo.git('merge', '-q', '--no-ff', '-m', 'merge feature', 'feature')
+    repo.commit('c5')
+    # An annotated tag is preferred over a lightweight one and the newer
+    # of two annotated tags wins
+    repo.git('tag', 'v1.0-light')
+    repo.git('tag', '-a', '-m', 'release', 'v1.0')
+    repo.git('tag', '-a', '-m', 'retagged', 'v1.0-again')
+    repo.commit('c6')
+
+    repo.git('checkout', '-q', '-b', 'hotfix', c4)
+    repo.commit('h1')
+    repo.git('tag', '-a', '-m', 'hotfix', 'v0.9.1')
+    repo.commit('h2')
+    repo.git('checkout', '-q', 'main')
+
+    repo.git('checkout', '-q', 'untagged')
+    repo.commit('u1')
+    repo.git('checkout', '-q', 'main')
+    return repo
+
+
+@pytest.fixture(scope='module')
+def history(tmp_path_factory):
+    return _create_history(tmp_path_factory.mktemp('history') / 'origin')
+
+
+def _loose(repo, path):
+    shutil.copytree(repo.path, path)
+    return Repository(path)
+
+
+def _clone(repo, path):
+    subprocess.run(
+        ['git', 'clone', '-q', str(repo.path), str(path)], check=True)
+    clone = Repository(path)
+    clone.date = repo.date
+    clone.git('checkout', '-q', '-b', 'local')
+    clone.commit('l1')
+    return clone
+
+
+def _packed(repo, path):
+    clone = _clone(repo, path)
+    clone.git('pack-refs', '--all')
+    clone.git('repack', '-q', '-a', '-d', '-f', '--depth=50', '--window=50')
+    pack_index, = (path / '.git' / 'objects' / 'pack').glob('*.idx')
+    # The objects stored as deltas have a depth and base in the listing
+    assert any(
+        len(line.split()) == 7
+        for line in clone.git('verify-pack', '-v', str(pack_index))
+        .splitlines())
+    return clone
+
+
+def _gc(repo, path):
+    clone = _clone(repo, path)
+    clone.git('gc', '-q')
+    clone.git('commit-graph', 'write', '--reachable')
+    return clone
+
+
+def _commit_graph_chain(repo, path):
+    clone = _gc(repo, path)
+    clone.git('commit-graph', 'write', '--reachable', '--split')
+    clone.commit('l2')
+    clone.git('tag', '-a', '-m', 'on the chain', 'v2.0')
+    clone.commit('l3')
+    clone.git(
+        'commit-graph', 'write', '--reachable', '--split=no-merge')
+    assert (path / '.git' / 'objects' / 'info' / 'commit-graphs').is_dir()
+    return clone
+
+
+@pytest.fixture(params=[
+    _loose, _clone, _packed, _gc, _commit_graph_chain],
+    ids=['loose', 'clone', 'packed', 'gc', 'commit-graph-chain'])
+def repository(request, history, tmp_path):
+    return request.param(history, tmp_path / 'repo')
+
+
+def _all_commits(repo):
+    return repo.git('rev-list', '--all').split()
+
+
+def _describe(repo, sha):
+    try:
+        return repo.git('describe', '--tags', '--abbrev=0', sha)
+    except subprocess.CalledProcessError:
+        return None
+
+
+def _branches_containing(repo, sha):
+    branches = []
+    for line in repo.git(
+        'branch', '-a', '--contains', sha,
+        '--format=%(refname) %(symref)'
+    ).splitlines():
+        ref, _, symref = line.partition(' ')
+        if symref:
+            continue
+        if ref.startswith('refs/heads/'):
+            branches.append(ref[len('refs/heads/'):])
+        elif ref.startswith('refs/remotes/'):
+            branches.append(ref[len('refs/remotes/'):])
+    return sorted(branches)
+
+
+def test_nearest_tag(repository):
+    reader = GitRefReader(str(repository.path))
+    for sha in _all_commits(repository):
+        assert reader.nearest_tag(sha) == _describe(repository, sha), sha
+
+
+def test_branches_containing(repository):
+    reader = GitRefReader(str(repository.path))
+    for sha in _all_commits(repository):
+        assert reader.branches_containing(sha) == \
+            _branches_containing(repository, sha), sha
+
+
+def test_refs(repository):
+    reader = GitRefReader(str(repository.path))
+    refs = {}
+    for line in repository.git(
+        'for-each-ref', '--format=%(objectname) %(refname) %(symref)'
+    ).splitlines():
+        sha, ref, *symref = line.split(' ')
+        if not any(symref):
+            refs[ref] = sha
+    assert reader.get_refs() == refs
+
+
+def test_objects(repository):
+    reader = GitRefReader(str(repository.path))
+    for line in repository.git('rev-list', '--all', '--objects').splitlines():
+        sha = line.split(' ', 1)[0]
+        obj_type = repository.git('cat-file', '-t', sha)
+        assert reader.read_object(sha) == (obj_type, subprocess.run(
+            ['git', '-C', str(repository.path), 'cat-file', obj_type, sha],
+            stdout=subprocess.PIPE, check=True).stdout), sha
+
+
+def test_commits(repository):
+    reader = GitRefReader(str(repository.path))
+    for sha in _all_commits(repository):
+        assert list(reader.get_parents(sha)) == \
+            repository.git('rev-parse', f'{sha}^@').split()
+        assert reader.get_commit_date(sha) == \
+            int(repository.git('show', '-s', '--format=%ct', sha))
+
+
+@pytest.mark.parametrize(
+    'create', [_gc, _commit_graph_chain], ids=['gc', 'commit-graph-chain'])
+def test_commit_graph(history, tmp_path, create):
+    repo = create(history, tmp_path / 'repo')
+    graph = CommitGraph(str(repo.path / '.git' / 'objects' / 'info'))
+    levels = {}
+    for sha in reversed(repo.git('rev-list', '--all', '--topo-order').split()):
+        parents = repo.git('rev-parse', f'{sha}^@').split()
+        assert list(graph.get_parents(sha)) == parents
+        assert graph.get_commit_date(sha) == \
+            int(repo.git('show', '-s', '--format=%ct', sha))
+        # The topological level is one more than the highest of the parents
+        levels[sha] = 1 + max(
+            (levels[parent] for parent in parents), default=0)
+        assert graph.get_level(sha) == levels[sha]
+    assert graph.get_parents('0' * 40) is None
+
+
+def test_read_head(repository):
+    reader = GitRefReader(str(repository.path))
+    head = repository.git('rev-parse', 'HEAD')
+    branch = repository.git('symbolic-ref', '--short', 'HEAD')
+    assert reader.read_head() == (head, branch)
+
+    repository.git('checkout', '-q', '--detach')
+    assert GitRefReader(str(repository.path)).read_head() == (head, None)
+
+
+def test_worktree(history, tmp_path):
+    repo = _clone(history, tmp_path / 'repo')
+    repo.git('worktree', 'add', '-q', str(tmp_path / 'worktree'), 'main')
+    reader = GitRefReader(str(tmp_path / 'worktree'))
+    assert reader.read_head() == (
+        repo.git('rev-parse', 'main'), 'main')
+    assert reader.nearest_tag(reader.read_head()[0]) == \
+        _describe(repo, 'main')
+
+
+@pytest.mark.parametrize('version', [2, 4])
+def test_read_git_index(history, tmp_path, version):
+    repo = _loose(history, tmp_path / 'repo')
+    for index in range(3):
+        directory = repo.path / f'dir_{index}'
+        directory.mkdir()
+        (directory / 'LICENSE').write_text(f'License {index}\n')
+        (directory / 'README').write_text(f'Readme {index}\n')
+    repo.git('add', '.')
+    repo.git('update-index', '--index-version', str(version))
+
+    index_path = repo.path / '.git' / 'index'
+    assert int.from_bytes(index_path.read_bytes()[4:8], 'big') == version
+    entries = read_git_index(str(index_path))
+    expected = {}
+    for line in repo.git('ls-files', '-s').splitlines():
+        info, path = line.split('\t')
+        _, sha, _ = info.split(' ')
+        expected[path] = (os.stat(repo.path / path).st_size, sha)
+    assert {
+        path: (size, sha) for path, (_, size, sha) in entries.items()
+    } == expected
+
+    licenses = read_git_index(
+        str(index_path), select=lambda path: path.endswith('LICENSE'))
+    assert sorted(licenses) == [f'dir_{index}/LICENSE' for index in range(3)]
@@ -0,0 +1,166 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import sqlite3
+from types import SimpleNamespace
+
+from mash.MetadataStore import METADATA_FORMAT_VERSION
+from mash.MetadataStore import MetadataStore
+from mash.MetadataStore import open_metadata_store
+import pytest
+
+
+class Resolver:
+    """Resolves keys by naming convention, native keys get a suffix."""
+
+    rosdistro = 'humble'
+
+    def __init__(self, unresolved_keys=()):  # noqa: D107
+        self.unresolved_keys = set(unresolved_keys)
+        self.resolutions = {}
+
+    def resolve(self, key, isNative=False):  # noqa: N803
+        recipe = key.replace('_', '-') + ('-native' if isNative else '')
+        self.resolutions[key] = recipe
+        return recipe
+
+    def get_resolutions(self):
+        return dict(self.resolutions)
+
+
+def _package(name):
+    return SimpleNamespace(name=name, path=f'/ws/src/{name}', type='ros.ament')
+
+
+def _event(name, version='1.0.0', git=True):
+    return {
+        'version': version,
+        'license': 'Apache-2.0',
+        'recipe': f'{name}/{name}_{version}.bb',
+        'git': {
+            'src_uri': f'git://example.com/{name}.git;protocol=https',
+            'branch': 'main',
+            'srcrev': 'a' * 40,
+            'tag': f'v{version}',
+            'path': name,
+        } if git else None,
+    }
+
+
+DEPENDENCIES = {
+    'buildtool_depends': ['ament_cmake'],
+    'build_depends': ['rclcpp', 'std_msgs', 'rclcpp'],
+    'exec_depends': ['rclcpp'],
+}
+
+
+def _query(path, statement, *parameters):
+    connection = open_metadata_store(str(path))
+    try:
+        return connection.execute(statement, parameters).fetchall()
+    finally:
+        connection.close()
+
+
+def test_update_package(tmp_path):
+    path = tmp_path / 'conf' / 'metadata.db'
+    store = MetadataStore(str(path))
+    assert store.fingerprints == {}
+    store.update_package(
+        _package('pkg_a'), 'fp_a', DEPENDENCIES, _event('pkg_a'), Resolver())
+    store.update_package(
+        _package('pkg_b'), 'fp_b', {}, _event('pkg_b', git=False),
+        Resolver())
+    assert store.is_up_to_date('pkg_a', 'fp_a')
+    assert not store.is_up_to_date('pkg_a', 'fp_b')
+    store.commit()
+
+    assert _query(path, 'SELECT * FROM packages ORDER BY name') == [
+        ('pkg_a', '1.0.0', '/ws/src/pkg_a', 'ros.ament', 'Apache-2.0',
+         'pkg_a/pkg_a_1.0.0.bb', 'fp_a', 'humble'),
+        ('pkg_b', '1.0.0', '/ws/src/pkg_b', 'ros.ament', 'Apache-2.0',
+         'pkg_b/pkg_b_1.0.0.bb', 'fp_b', 'humble'),
+    ]
+    # The keys of a category are unique and the build tools are native
+    assert _query(
+        path, 'SELECT category, key, recipe FROM dependencies '
+        'WHERE package = ? ORDER BY category, key', 'pkg_a') == [
+        ('build_depends', 'rclcpp', 'rclcpp'),
+        ('build_depends', 'std_msgs', 'std-msgs'),
+        ('buildtool_depends', 'ament_cmake', 'ament-cmake-native'),
+        ('exec_depends', 'rclcpp', 'rclcpp'),
+    ]
+    assert _query(path, 'SELECT package, branch, tag FROM git') == [
+        ('pkg_a', 'main', 'v1.0.0')]
+
+
+def test_update_incrementally(tmp_path):
+    path = tmp_path / 'metadata.db'
+    store = MetadataStore(str(path))
+    for name in ('pkg_a', 'pkg_b'):
+        store.update_package(
+            _package(name), f'fp_{name}', DEPENDENCIES, _event(name),
+            Resolver())
+    store.commit()
+
+    store = MetadataStore(str(path))
+    assert store.fingerprints == {'pkg_a': 'fp_pkg_a', 'pkg_b': 'fp_pkg_b'}
+    store.update_package(
+        _package('pkg_a'), 'fp_new', {'exec_depends': ['rclpy']},
+        _event('pkg_a', '2.0.0', git=False), Resolver())
+    store.remove_package('pkg_b')
+    assert store.fingerprints == {'pkg_a': 'fp_new'}
+    store.commit()
+
+    assert _query(path, 'SELECT name, version FROM packages') == [
+        ('pkg_a', '2.0.0')]
+    assert _query(path, 'SELECT package, key FROM dependencies') == [
+        ('pkg_a', 'rclpy')]
+    assert _query(path, 'SELECT * FROM git') == []
+
+
+def test_update_resolutions(tmp_path):
+    path = tmp_path / 'metadata.db'
+    store = MetadataStore(str(path))
+    resolver = Resolver(unresolved_keys={'unknown_key'})
+    resolver.resolve('unknown_key')
+    resolver.resolve('ament_cmake', True)
+    store.update_resolutions(resolver)
+    # A key resolved again replaces the previous resolution
+    resolver.resolve('ament_cmake')
+    store.update_resolutions(resolver)
+    store.commit()
+
+    assert _query(path, 'SELECT * FROM resolutions ORDER BY key') == [
+        ('humble', 'ament_cmake', 'ament-cmake', 0),
+        ('humble', 'unknown_key', 'unknown-key', 1),
+    ]
+
+
+def test_recreate_other_version(tmp_path):
+    path = tmp_path / 'metadata.db'
+    connection = sqlite3.connect(str(path))
+    connection.execute('CREATE TABLE packages (name TEXT, obsolete TEXT)')
+    connection.execute("INSERT INTO packages VALUES ('pkg_a', 'value')")
+    connection.execute(
+        f'PRAGMA user_version = {METADATA_FORMAT_VERSION + 1}')
+    connection.commit()
+    connection.close()
+
+    store = MetadataStore(str(path))
+    assert store.fingerprints == {}
+    store.commit()
+    assert _query(path, 'PRAGMA user_version') == [
+        (METADATA_FORMAT_VERSION, )]
+    assert _query(path, 'SELECT * FROM packages') == []
+
+
+def test_open_metadata_store(tmp_path):
+    with pytest.raises(sqlite3.OperationalError):
+        open_metadata_store(str(tmp_path / 'missing.db'))
+
+    MetadataStore(str(tmp_path / 'metadata.db')).commit()
+    connection = open_metadata_store(str(tmp_path / 'metadata.db'))
+    with pytest.raises(sqlite3.OperationalError):
+        connection.execute("DELETE FROM packages WHERE name = 'pkg_a'")
+    connection.close()
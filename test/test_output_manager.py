@@ -0,0 +1,124 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import os
+
+from mash.OutputManager import OutputManager
+
+
+def _files(path):
+    return {
+        str(file.relative_to(path)): file.read_text()
+        for file in path.rglob('*') if file.is_file()}
+
+
+def _set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+def test_commit(tmp_path):
+    output = OutputManager(str(tmp_path))
+    assert output.add('pkg_a/pkg_a_1.0.bb', 'recipe a\n') == \
+        str(tmp_path / 'pkg_a' / 'pkg_a_1.0.bb')
+    output.add('pkg_b/pkg_b_1.0.bb', 'recipe b\n')
+    # Nothing is visible in the build base before the commit
+    assert not (tmp_path / 'pkg_a').exists()
+    output.commit()
+
+    assert _files(tmp_path) == {
+        'pkg_a/pkg_a_1.0.bb': 'recipe a\n',
+        'pkg_b/pkg_b_1.0.bb': 'recipe b\n',
+    }
+    assert not (tmp_path / OutputManager.STAGING_DIR).exists()
+    assert output.get_summary() == \
+        'Recipes: 2 added, 0 changed, 0 unchanged, 0 removed'
+
+
+def test_commit_changes(tmp_path):
+    output = OutputManager(str(tmp_path))
+    for name in ('pkg_a', 'pkg_b', 'pkg_c', 'pkg_d'):
+        output.add(f'{name}/{name}_1.0.bb', f'recipe {name}\n')
+    output.add('pkg_d/extra.inc', 'include\n')
+    output.commit()
+    for path in tmp_path.rglob('*.bb'):
+        _set_mtime(path, 1000000000)
+
+    output = OutputManager(str(tmp_path))
+    output.add('pkg_a/pkg_a_1.0.bb', 'recipe pkg_a\n')
+    output.add('pkg_b/pkg_b_1.0.bb', 'changed recipe\n')
+    output.keep('pkg_c/pkg_c_1.0.bb')
+    output.remove('pkg_d/pkg_d_1.0.bb')
+    output.remove('pkg_e/pkg_e_1.0.bb')
+    output.add('pkg_f/pkg_f_1.0.bb', 'recipe pkg_f\n')
+    output.commit()
+
+    assert _files(tmp_path) == {
+        'pkg_a/pkg_a_1.0.bb': 'recipe pkg_a\n',
+        'pkg_b/pkg_b_1.0.bb': 'changed recipe\n',
+        'pkg_c/pkg_c_1.0.bb': 'recipe pkg_c\n',
+        'pkg_d/extra.inc': 'include\n',
+        'pkg_f/pkg_f_1.0.bb': 'recipe pkg_f\n',
+    }
+    # An unchanged recipe keeps its modification time
+    assert (tmp_path / 'pkg_a' / 'pkg_a_1.0.bb').stat().st_mtime == \
+        1000000000
+    assert (tmp_path / 'pkg_b' / 'pkg_b_1.0.bb').stat().st_mtime != \
+        1000000000
+    assert output.get_summary() == \
+        'Recipes: 1 added, 1 changed, 2 unchanged, 1 removed'
+
+
+def test_remove_empty_directory(tmp_path):
+    output = OutputManager(str(tmp_path))
+    output.add('pkg_a/pkg_a_1.0.bb', 'recipe a\n')
+    output.commit()
+
+    output = OutputManager(str(tmp_path))
+    output.remove('pkg_a/pkg_a_1.0.bb')
+    output.add('pkg_a/pkg_a_2.0.bb', 'recipe a\n')
+    output.remove('pkg_b/pkg_b_1.0.bb')
+    output.commit()
+    assert _files(tmp_path) == {'pkg_a/pkg_a_2.0.bb': 'recipe a\n'}
+
+    output = OutputManager(str(tmp_path))
+    output.remove('pkg_a/pkg_a_2.0.bb')
+    output.commit()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stale_file_staged_again_is_kept(tmp_path):
+    output = OutputManager(str(tmp_path))
+    output.add('pkg_a/pkg_a_1.0.bb', 'recipe a\n')
+    output.commit()
+
+    output = OutputManager(str(tmp_path))
+    output.remove('pkg_a/pkg_a_1.0.bb')
+    output.add('pkg_a/pkg_a_1.0.bb', 'recipe a\n')
+    output.commit()
+    assert _files(tmp_path) == {'pkg_a/pkg_a_1.0.bb': 'recipe a\n'}
+    assert output.removed == 0
+
+
+def test_close_without_commit(tmp_path):
+    output = OutputManager(str(tmp_path))
+    output.add('pkg_a/pkg_a_1.0.bb', 'recipe a\n')
+    output.commit()
+
+    output = OutputManager(str(tmp_path))
+    output.add('pkg_a/pkg_a_1.0.bb', 'changed recipe\n')
+    output.add('pkg_b/pkg_b_1.0.bb', 'recipe b\n')
+    output.remove('pkg_a/pkg_a_1.0.bb')
+    output.close()
+    assert _files(tmp_path) == {'pkg_a/pkg_a_1.0.bb': 'recipe a\n'}
+
+
+def test_remove_leftovers_of_interrupted_run(tmp_path):
+    staged = tmp_path / OutputManager.STAGING_DIR / 'pkg_a' / 'pkg_a_1.0.bb'
+    staged.parent.mkdir(parents=True)
+    staged.write_text('half written')
+
+    output = OutputManager(str(tmp_path))
+    assert not staged.exists()
+    output.add('pkg_b/pkg_b_1.0.bb', 'recipe b\n')
+    output.commit()
+    assert _files(tmp_path) == {'pkg_b/pkg_b_1.0.bb': 'recipe b\n'}
@@ -0,0 +1,63 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from concurrent.futures import ThreadPoolExecutor
+
+from mash.PackageMetadata import evaluate_condition
+from mash.PackageMetadata import PackageMetadata
+
+MANIFEST = """<?xml version="1.0"?>
+<package format="3">
+  <name>pkg_{index}</name>
+  <version>1.0.{index}</version>
+  <description>Package {index}</description>
+  <maintainer email="maintainer@example.com">Maintainer</maintainer>
+  <license>Apache-2.0</license>
+  <buildtool_depend>ament_cmake</buildtool_depend>
+  <depend condition="$ROS_VERSION == 2">rclcpp</depend>
+  <depend condition="$ROS_VERSION == 1">roscpp</depend>
+  <exec_depend condition="$ROS_DISTRO == humble">dep_{index}</exec_depend>
+  <export>
+    <build_type>ament_cmake</build_type>
+  </export>
+</package>
+"""
+
+CONTEXT = {'ROS_DISTRO': 'humble', 'ROS_VERSION': '2'}
+
+
+def _reset_condition_parser(monkeypatch):
+    # The race is in the first use of the grammar, so start without one
+    import catkin_pkg.condition
+    monkeypatch.setattr(catkin_pkg.condition, '_condition_expression', None)
+    evaluate_condition.cache_clear()
+
+
+def test_evaluate_conditions():
+    metadata = PackageMetadata(MANIFEST.format(index=0))
+    assert metadata.build_depends == ('rclcpp', 'roscpp')
+    assert metadata.exec_depends == ('dep_0', 'rclcpp', 'roscpp')
+
+    humble = metadata.evaluate_conditions(CONTEXT)
+    assert humble.build_depends == ('rclcpp',)
+    assert humble.exec_depends == ('dep_0', 'rclcpp')
+    # The original keeps the conditions for other distributions
+    assert metadata.build_depends == ('rclcpp', 'roscpp')
+
+    jazzy = metadata.evaluate_conditions(
+        {'ROS_DISTRO': 'jazzy', 'ROS_VERSION': '2'})
+    assert jazzy.exec_depends == ('rclcpp',)
+
+
+def test_parse_manifests_in_parallel(monkeypatch):
+    for _ in range(5):
+        _reset_condition_parser(monkeypatch)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda index: PackageMetadata(
+                    MANIFEST.format(index=index), CONTEXT),
+                range(32)))
+        for index, metadata in enumerate(results):
+            assert metadata.name == f'pkg_{index}'
+            assert metadata.build_depends == ('rclcpp',)
+            assert metadata.exec_depends == (f'dep_{index}', 'rclcpp')
@@ -0,0 +1,23 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import mash.rosdep_support
+from mash.rosdep_support import get_cache_key
+import pytest
+
+
+def test_get_cache_key(monkeypatch):
+    rosdep2 = pytest.importorskip('rosdep2')
+    monkeypatch.setattr(mash.rosdep_support, '_sources_hash', 'sources')
+    key = get_cache_key('openembedded', '', 'humble')
+    assert key == get_cache_key('openembedded', '', 'humble')
+    assert key != get_cache_key('openembedded', '', 'jazzy')
+
+    # The pickled views of another rosdep2 version are not loaded
+    monkeypatch.setattr(rosdep2, '__version__', '0.0.0')
+    assert key != get_cache_key('openembedded', '', 'humble')
+
+    monkeypatch.undo()
+    # The rosdep database was updated
+    monkeypatch.setattr(mash.rosdep_support, '_sources_hash', 'updated')
+    assert key != get_cache_key('openembedded', '', 'humble')
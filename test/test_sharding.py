@@ -0,0 +1,116 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+import argparse
+import os
+from pathlib import Path
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from mash.Sharding import assign_shards
+from mash.Sharding import format_shard
+from mash.Sharding import parse_shard
+import pytest
+
+BENCHMARK_PATH = Path(__file__).parents[1] / 'benchmark'
+
+"""The repository of every package, in topological order"""
+PACKAGES = [
+    ('a1', 'repo_a'), ('b1', 'repo_b'), ('a2', 'repo_a'), ('c1', 'repo_c'),
+    ('a3', 'repo_a'), ('d1', 'repo_d'), ('b2', 'repo_b'), ('e1', 'repo_e'),
+]
+
+
+def _packages(order=PACKAGES):
+    return [SimpleNamespace(name=name, repo=repo) for name, repo in order]
+
+
+def _assign(packages, count):
+    shards = assign_shards(packages, count, lambda pkg: pkg.repo)
+    return [[pkg.name for pkg in shard] for shard in shards]
+
+
+@pytest.mark.parametrize('value, shard', [
+    ('1/1', (1, 1)),
+    ('2/4', (2, 4)),
+    ('4/4', (4, 4)),
+])
+def test_parse_shard(value, shard):
+    assert parse_shard(value) == shard
+    assert format_shard(shard) == value
+
+
+@pytest.mark.parametrize('value', [
+    '0/4', '5/4', '1/0', '-1/2', '1', '1/2/3', 'a/b', ''])
+def test_parse_invalid_shard(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(value)
+
+
+def test_assign_shards():
+    shards = _assign(_packages(), 3)
+    # The largest group is assigned first, the others fill the smallest
+    # shard in the order of their keys
+    assert shards == [['a1', 'a2', 'a3'], ['b1', 'b2', 'e1'], ['c1', 'd1']]
+
+
+def test_assign_shards_keeps_groups_together():
+    for count in range(1, 10):
+        shards = _assign(_packages(), count)
+        assert len(shards) == count
+        assert sorted(sum(shards, [])) == sorted(
+            name for name, _ in PACKAGES)
+        repos = [{dict(PACKAGES)[name] for name in shard} for shard in shards]
+        for index, repo_set in enumerate(repos):
+            assert not any(repo_set & other for other in repos[index + 1:])
+
+
+def test_assign_shards_independent_of_order():
+    expected = [sorted(shard) for shard in _assign(_packages(), 3)]
+    shards = _assign(_packages(list(reversed(PACKAGES))), 3)
+    assert [sorted(shard) for shard in shards] == expected
+    # The packages of a shard keep the topological order
+    assert shards[0] == ['a3', 'a2', 'a1']
+
+
+@pytest.fixture(scope='module')
+def synthetic_workspace(tmp_path_factory):
+    pytest.importorskip('rosdep2')
+    sys.path.insert(0, str(BENCHMARK_PATH))
+    try:
+        from synthetic_workspace import generate
+    finally:
+        sys.path.remove(str(BENCHMARK_PATH))
+    root = tmp_path_factory.mktemp('synthetic')
+    env = generate(
+        str(root), packages=12, repositories=3, released=4, system_keys=4)
+    return root, env
+
+
+def _mash(root, env, *args):
+    subprocess.run(
+        [sys.executable, '-m', 'mash', *args], cwd=root / 'ws',
+        env={**os.environ, **env}, check=True, stdout=subprocess.DEVNULL)
+
+
+def _read_recipes(path):
+    return {
+        recipe.relative_to(path): recipe.read_text()
+        for recipe in path.glob('*/*.bb')}
+
+
+def test_merge_shards(synthetic_workspace):
+    root, env = synthetic_workspace
+    _mash(root, env, '--build-base', 'full')
+    _mash(root, env, '--build-base', 'shard_1', '--shard', '1/2')
+    _mash(root, env, '--build-base', 'shard_2', '--shard', '2/2')
+    _mash(root, env, 'merge', 'shard_1', 'shard_2', '--build-base', 'merged')
+
+    full = _read_recipes(root / 'ws' / 'full')
+    shards = [
+        _read_recipes(root / 'ws' / f'shard_{index}') for index in (1, 2)]
+    assert len(full) == 12
+    assert all(shards)
+    assert not set(shards[0]) & set(shards[1])
+    assert _read_recipes(root / 'ws' / 'merged') == full
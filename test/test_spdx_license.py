@@ -0,0 +1,113 @@
+# Copyright 2025 Wind River Systems, Inc.
+# Licensed under the Apache License, Version 2.0
+
+from mash.SPDXLicense import convert_license
+from mash.SPDXLicense import get_guessed_licenses
+from mash.SPDXLicense import normalize_exception
+from mash.SPDXLicense import normalize_license
+from mash.SPDXLicense import parse_license_expression
+import pytest
+
+
+@pytest.mark.parametrize('license_str, spdx_id', [
+    ('Apache-2.0', 'Apache-2.0'),
+    ('apache-2.0', 'Apache-2.0'),
+    ('Apache 2.0', 'Apache-2.0'),
+    ('Apache License 2.0', 'Apache-2.0'),
+    ('Apache License, Version 2.0', 'Apache-2.0'),
+    ('BSD', 'BSD-3-Clause'),
+    ('BSD License', 'BSD-3-Clause'),
+    ('3-Clause BSD', 'BSD-3-Clause'),
+    ('Simplified BSD', 'BSD-2-Clause'),
+    ('MIT', 'MIT'),
+    ('Boost Software License', 'BSL-1.0'),
+    ('GPLv2', 'GPL-2.0-only'),
+    ('GPL-2.0+', 'GPL-2.0-or-later'),
+    ('GPL v2 or later', 'GPL-2.0-or-later'),
+    ('GNU GPL v2', 'GPL-2.0-only'),
+    ('GNU GPL v3', 'GPL-3.0-only'),
+    ('GNU GPLv3', 'GPL-3.0-only'),
+    ('GNU GPL v3 or later', 'GPL-3.0-or-later'),
+    ('GNU General Public License v3.0', 'GPL-3.0-only'),
+    ('LGPLv3', 'LGPL-3.0-only'),
+    ('GNU LGPL v2.1', 'LGPL-2.1-only'),
+    ('Public Domain', 'PD'),
+    (' MIT ', 'MIT'),
+])
+def test_normalize_license(license_str, spdx_id):
+    assert normalize_license(license_str) == spdx_id
+
+
+def test_normalize_unknown_license():
+    assert normalize_license('Proprietary') is None
+    assert normalize_license('BSD and GPL') is None
+    assert normalize_exception('llvm-exception') == 'LLVM-exception'
+    assert normalize_exception('Unknown-exception') is None
+
+
+@pytest.mark.parametrize('expression, node', [
+    ('MIT', 'MIT'),
+    ('MIT OR Apache 2.0', ('OR', 'MIT', 'Apache-2.0')),
+    ('BSD AND MIT AND Zlib', ('AND', 'BSD-3-Clause', 'MIT', 'Zlib')),
+    ('MIT OR BSD AND Zlib', ('OR', 'MIT', ('AND', 'BSD-3-Clause', 'Zlib'))),
+    ('(MIT OR BSD) AND Zlib',
+     ('AND', ('OR', 'MIT', 'BSD-3-Clause'), 'Zlib')),
+    ('Apache-2.0 WITH LLVM-exception',
+     ('WITH', 'Apache-2.0', 'LLVM-exception')),
+    ('Apache-2.0 with llvm-exception',
+     ('WITH', 'Apache-2.0', 'LLVM-exception')),
+    ('BSD and GPL', ('AND', 'BSD-3-Clause', 'GPL')),
+    ('bsd or mit', ('OR', 'BSD-3-Clause', 'MIT')),
+    ('BSD, GPL', ('AND', 'BSD-3-Clause', 'GPL')),
+    ('BSD, MIT, and Zlib', ('AND', 'BSD-3-Clause', 'MIT', 'Zlib')),
+    ('Apache License, Version 2.0, MIT', ('AND', 'Apache-2.0', 'MIT')),
+    ('GPL v2 or later OR MIT', ('OR', 'GPL-2.0-or-later', 'MIT')),
+    ('Proprietary OR MIT', ('OR', 'Proprietary', 'MIT')),
+])
+def test_parse_license_expression(expression, node):
+    assert parse_license_expression(expression) == node
+
+
+@pytest.mark.parametrize('expression', [
+    'MIT OR',
+    'AND MIT',
+    '(MIT OR BSD',
+    'MIT OR BSD)',
+    'MIT WITH',
+    'MIT WITH (BSD)',
+    '',
+])
+def test_parse_invalid_license_expression(expression):
+    with pytest.raises(ValueError):
+        parse_license_expression(expression)
+
+
+@pytest.mark.parametrize('license_str, nested, bitbake', [
+    ('Apache License 2.0', False, 'Apache-2.0'),
+    ('MIT OR Apache-2.0', False, 'MIT | Apache-2.0'),
+    ('MIT OR Apache-2.0', True, '(MIT | Apache-2.0)'),
+    ('(MIT OR BSD) AND Zlib', False, '(MIT | BSD-3-Clause) & Zlib'),
+    ('MIT OR BSD AND Zlib', False, 'MIT | (BSD-3-Clause & Zlib)'),
+    ('Apache-2.0 with LLVM-exception', False, 'Apache-2.0 & LLVM-exception'),
+    ('BSD, GNU GPL v3', False, 'BSD-3-Clause & GPL-3.0-only'),
+    ('Historical Permission Notice and Disclaimer', False,
+     'Historical Permission Notice & Disclaimer'),
+    ('MIT OR', False, 'MIT OR'),
+    ('Proprietary', False, 'Proprietary'),
+])
+def test_convert_license(license_str, nested, bitbake):
+    assert convert_license(license_str, nested) == bitbake
+
+
+@pytest.mark.parametrize('license_str, guessed', [
+    ('BSD', [('BSD', 'BSD-3-Clause')]),
+    ('BSD License', [('BSD License', 'BSD-3-Clause')]),
+    ('Apache', [('Apache', 'Apache-2.0')]),
+    ('bsd or MIT', [('bsd', 'BSD-3-Clause')]),
+    ('BSD, Apache', [('BSD', 'BSD-3-Clause'), ('Apache', 'Apache-2.0')]),
+    ('BSD-3-Clause', []),
+    ('Apache 2.0', []),
+    ('MIT OR', []),
+])
+def test_get_guessed_licenses(license_str, guessed):
+    assert get_guessed_licenses(license_str) == guessed
@@ -7,6 +7,11 @@ import pytest
 
 spell_check_words_path = Path(__file__).parent / 'spell_check.words'
 
+# Generated files, e.g. the identifiers of the SPDX license list
+generated_files = [
+    Path(__file__).parents[1] / 'mash' / 'spdx_license_list.py',
+]
+
 
 @pytest.fixture(scope='module')
 def known_words():
@@ -24,6 +29,8 @@ def test_spell_check(known_words):
             (Path(__file__).parents[1] / 'mash')
             .glob('**/*.py')) + \
         list((Path(__file__).parents[1] / 'test').glob('**/*.py'))
+    source_filenames = [
+        path for path in source_filenames if path not in generated_files]
 
     for source_filename in sorted(source_filenames):
         print('Spell checking:', source_filename)